@@ -0,0 +1,1363 @@
+from __future__ import annotations
+import argparse, asyncio, collections, itertools, json, os, random, re, socket, subprocess, sys, tempfile, time, typing
+import aiogram, aiogram.types, aiogram.client.session.aiohttp, aiogram.client.telegram, aiohttp, aiohttp.web
+import models, data, client, constants, utils
+
+
+# region Helpers
+
+class TemporaryDatabaseManager(data.DatabaseManager):
+    def __init__(self, path: str) -> None:
+        self._PATH = path
+        super().__init__()
+
+
+class DatasetGenerator:
+    _BATCH_SIZE = 10000
+    _REFERRED_SHARE = 0.3
+    _SUBSCRIPTIONS_PER_USER = 2
+    _PAYMENTS_PER_USER = 3
+    _FIRST_USER_ID = 1000000000
+
+    def __init__(self, database: data.DatabaseManager, users: int, seed: int, timestamp: int) -> None:
+        self._database = database
+        self._users = users
+        self._random = random.Random(seed)
+        self._timestamp = timestamp
+        self._data = data.DataProvider.get_instance()
+        self._config = data.ConfigProvider.get_instance()
+
+    @property
+    def users_ids(self) -> range:
+        return range(self._FIRST_USER_ID, self._FIRST_USER_ID + self._users)
+
+    @classmethod
+    def insert(cls, database: data.DatabaseManager.IDatabase, columns: tuple[str, ...], rows: typing.Iterable) -> int:
+        rows_count = int()
+
+        for batch in itertools.batched(rows, cls._BATCH_SIZE):
+            database.executemany(
+                f"INSERT INTO {database._NAME} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                batch,
+            )
+            database.commit()
+            rows_count += len(batch)
+
+        return rows_count
+
+    def _get_users(self) -> typing.Iterator[tuple]:
+        for tg_id in self.users_ids:
+            is_referred = tg_id > self._FIRST_USER_ID and self._random.random() < self._REFERRED_SHARE
+
+            yield (
+                tg_id,
+                f"user{tg_id}",
+                self._random.randint(0, self._config.payments.max_balance),
+                self._random.randrange(self._FIRST_USER_ID, tg_id) if is_referred else None,
+            )
+
+    def _get_subscriptions(self) -> typing.Iterator[tuple]:
+        subscription_id = itertools.count(start=1)
+
+        for tg_id in self.users_ids:
+            for _ in range(self._random.randint(0, self._SUBSCRIPTIONS_PER_USER)):
+                current_id = next(subscription_id)
+                current_plan_id = self._random.randrange(len(self._data.plans.plans))
+                subscribed_at = self._timestamp - self._random.randint(0, 365 * constants.SECONDS_IN_DAY)
+
+                yield (
+                    current_id,
+                    current_plan_id,
+                    self._random.randint(0, 1),
+                    self._random.randint(0, 1),
+                    subscribed_at,
+                    subscribed_at + self._data.plans.get_plan_by_id(current_plan_id).days * constants.SECONDS_IN_DAY,
+                    tg_id,
+                    current_id,
+                )
+
+    def _get_configs(self, subscriptions_count: int) -> typing.Iterator[tuple]:
+        for config_id in range(1, subscriptions_count + self._users // 10 + 1):
+            yield (
+                config_id,
+                f"config_{config_id}",
+                f"[Interface]\nPrivateKey = {self._random.getrandbits(256):064x}\n",
+                config_id if config_id <= subscriptions_count else None,
+            )
+
+    def _get_payments(self) -> typing.Iterator[tuple]:
+        for tg_id in self.users_ids:
+            for _ in range(self._random.randint(0, self._PAYMENTS_PER_USER)):
+                amount = self._random.randint(self._data.plans.minimum_plan.cost, self._config.payments.max_balance)
+
+                yield (
+                    f"{tg_id}_{self._random.getrandbits(32)}",
+                    amount,
+                    self._config.payments.currency,
+                    f"add_funds_invoice {amount}",
+                    self._timestamp - self._random.randint(0, 365 * constants.SECONDS_IN_DAY),
+                    tg_id,
+                )
+
+    def generate(self) -> dict[str, int]:
+        users_count = self.insert(
+            database=self._database.users,
+            columns=("tg_id", "tg_username", "balance", "referrer_id"),
+            rows=self._get_users(),
+        )
+        subscriptions_count = self.insert(
+            database=self._database.subscriptions,
+            columns=("id", "plan_id", "is_active", "is_checked", "subscribed_at", "expires_at", "tg_id", "config_id"),
+            rows=self._get_subscriptions(),
+        )
+        current_configs = list(self._get_configs(subscriptions_count))
+        current_blobs = {
+            config[2]: self._database.config._get_blob(config[2]) for config in current_configs
+        }
+        config_blobs_count = self.insert(
+            database=self._database.config_blobs,
+            columns=("hash", "data", "size"),
+            rows=current_blobs.values(),
+        )
+        configs_count = self.insert(
+            database=self._database.config,
+            columns=("id", "name", "data_hash", "subscription_id"),
+            rows=(
+                (config_id, name, current_blobs[data][0], subscription_id)
+                for config_id, name, data, subscription_id in current_configs
+            ),
+        )
+        self._database.users.execute(
+            f"""
+            UPDATE {self._database.users._NAME} SET referrals_count = (
+            SELECT COUNT(*) FROM {self._database.users._NAME} AS referrals
+            WHERE referrals.referrer_id == {self._database.users._NAME}.tg_id
+            )
+            """,
+        )
+        self._database.users.commit()
+
+        payments_count = self.insert(
+            database=self._database.payments,
+            columns=("provider_id", "amount", "currency", "payload", "date", "tg_id"),
+            rows=self._get_payments(),
+        )
+        ledger_count = self._database.ledger.add_opening_balances(
+            date=self._timestamp,
+        )
+        ledger_snapshots_count = self._database.ledger.add_snapshots(
+            date=self._timestamp,
+        )
+
+        return {
+            "users": users_count,
+            "subscriptions": subscriptions_count,
+            "configs": configs_count,
+            "config_blobs": config_blobs_count,
+            "payments": payments_count,
+            "ledger": ledger_count,
+            "ledger_snapshots": ledger_snapshots_count,
+        }
+
+
+class FakeTelegramServer:
+    _MESSAGE_METHODS = {
+        "sendMessage",
+        "editMessageText",
+        "sendDocument",
+        "sendInvoice",
+    }
+    _BOOLEAN_METHODS = {
+        "answerCallbackQuery",
+        "answerPreCheckoutQuery",
+        "deleteMessage",
+        "deleteWebhook",
+        "setMyCommands",
+        "close",
+    }
+
+    def __init__(self, bot: aiogram.types.User, latency: float = 0.0) -> None:
+        self._bot = bot
+        self._latency = latency
+        self._updates: asyncio.Queue[dict] = asyncio.Queue()
+        self._update_ids = itertools.count(start=1)
+        self._message_ids = itertools.count(start=1)
+        self._runner = None
+        self.requests_count = collections.Counter()
+        self.errors_count = collections.Counter()
+
+    def add_update(self, **kwargs) -> int:
+        update_id = next(self._update_ids)
+
+        self._updates.put_nowait(
+            {
+                "update_id": update_id,
+                **kwargs,
+            },
+        )
+
+        return update_id
+
+    def get_message(self, chat_id: int, **kwargs) -> dict:
+        return {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {
+                "id": chat_id,
+                "type": "private",
+            },
+            **kwargs,
+        }
+
+    async def _get_updates(self, timeout: int) -> list[dict]:
+        try:
+            updates = [await asyncio.wait_for(self._updates.get(), timeout=timeout)]
+        except asyncio.TimeoutError:
+            return list()
+
+        while not self._updates.empty():
+            updates.append(self._updates.get_nowait())
+
+        return updates
+
+    async def _method_handler(self, request: aiohttp.web.Request) -> aiohttp.web.Response:
+        method = request.match_info["method"]
+        parameters = await request.post()
+
+        self.requests_count[method] += 1
+
+        if method != "getUpdates" and self._latency:
+            await asyncio.sleep(self._latency)
+
+        if method == "getUpdates":
+            result = await self._get_updates(
+                timeout=int(parameters.get("timeout", 0)),
+            )
+        elif method == "getMe":
+            result = self._bot.model_dump(
+                exclude_none=True,
+            )
+        elif method in self._MESSAGE_METHODS:
+            result = self.get_message(
+                chat_id=int(parameters.get("chat_id", 0)),
+                text=str(parameters.get("text", str())),
+            )
+        elif method in self._BOOLEAN_METHODS:
+            result = True
+        else:
+            self.errors_count[method] += 1
+
+            return aiohttp.web.json_response(
+                {
+                    "ok": False,
+                    "error_code": 400,
+                    "description": f"Bad Request: method {method} is not supported",
+                },
+                status=400,
+            )
+
+        return aiohttp.web.json_response(
+            {
+                "ok": True,
+                "result": result,
+            },
+        )
+
+    async def start(self) -> str:
+        application = aiohttp.web.Application()
+        application.router.add_post("/bot{token}/{method}", self._method_handler)
+
+        current_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        current_socket.bind(("127.0.0.1", 0))
+
+        self._runner = aiohttp.web.AppRunner(application)
+        await self._runner.setup()
+        await aiohttp.web.SockSite(self._runner, current_socket).start()
+
+        return "http://{0}:{1}".format(*current_socket.getsockname())
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+
+
+# endregion
+
+
+# region Benchmarks
+
+class StringsBenchmark:
+    def __init__(self, iterations: int) -> None:
+        self._iterations = iterations
+        self._config = data.ConfigProvider.get_instance()
+        self._strings = data.StringsProvider()
+        self._timestamp = int(time.time())
+
+        self._user = models.UserValues(
+            tg_id=1095920589,
+            tg_username="diquoks",
+            balance=825,
+            referrer_id=5737203096,
+        )
+        self._referrer_user = models.UserValues(
+            tg_id=5737203096,
+            tg_username=None,
+            balance=0,
+            referrer_id=None,
+        )
+        self._subscription = models.SubscriptionValues(
+            id=1,
+            plan_id=models.PlansType.QUARTER.value,
+            is_active=1,
+            is_checked=0,
+            subscribed_at=self._timestamp,
+            expires_at=self._timestamp + 7776000,
+            tg_id=self._user.tg_id,
+            config_id=1,
+        )
+        self._payment = models.PaymentValues(
+            id=1,
+            provider_id="2204811234_1234567890",
+            amount=825,
+            currency="RUB",
+            payload="add_funds_invoice 825",
+            date=self._timestamp,
+            tg_id=self._user.tg_id,
+        )
+        self._bot = aiogram.types.User(
+            id=8205533074,
+            is_bot=True,
+            first_name="SampleVPNBot",
+        )
+
+    def _measure(self, name: str, func: typing.Callable[[], str]) -> dict:
+        time_started = time.perf_counter()
+
+        for _ in range(self._iterations):
+            func()
+
+        elapsed = time.perf_counter() - time_started
+
+        return {
+            "benchmark": f"strings.{name}",
+            "renders": self._iterations,
+            "seconds": round(elapsed, 6),
+            "renders_per_second": round(self._iterations / elapsed, 2),
+        }
+
+    def run(self) -> list[dict]:
+        return [
+            self._measure(
+                name="profile",
+                func=lambda: self._strings.menu.profile(
+                    user=self._user,
+                    referrer_model=self._config.referral,
+                    referrer_user=self._referrer_user,
+                    subscriptions_count=3,
+                    friends_count=12,
+                ),
+            ),
+            self._measure(
+                name="subscription",
+                func=lambda: self._strings.menu.subscription(
+                    subscription=self._subscription,
+                    timestamp=self._timestamp,
+                    user=self._user,
+                    include_checked=True,
+                ),
+            ),
+            self._measure(
+                name="admin_payment",
+                func=lambda: self._strings.menu.admin_payment(
+                    payment=self._payment,
+                    user=self._user,
+                ),
+            ),
+            self._measure(
+                name="admin_settings",
+                func=lambda: self._strings.menu.admin_settings(
+                    bot=self._bot,
+                    users_count=100000,
+                    configs_count=5000,
+                    subscriptions_count=25000,
+                    payments_count=300000,
+                    date_started=self._timestamp,
+                ),
+            ),
+        ]
+
+
+class DatabaseBenchmark:
+    def __init__(self, users: int, iterations: int, all_iterations: int, seed: int) -> None:
+        self._users = users
+        self._iterations = iterations
+        self._all_iterations = all_iterations
+        self._random = random.Random(seed)
+        self._seed = seed
+        self._timestamp = int(time.time())
+
+    @classmethod
+    def _get_size(cls, value: typing.Any) -> int:
+        match value:
+            case None:
+                return int()
+            case str():
+                return len(value.encode())
+            case bytes():
+                return len(value)
+            case bool() | int() | float():
+                return 8
+            case list() | tuple() | set():
+                return sum(cls._get_size(item) for item in value)
+            case dict():
+                return sum(cls._get_size(item) for item in value.values())
+            case _:
+                return cls._get_size(vars(value))
+
+    def _measure(self, name: str, func: typing.Callable[[], typing.Any], iterations: int) -> dict:
+        latencies = list()
+        bytes_read = int()
+
+        for _ in range(iterations):
+            time_started = time.perf_counter()
+            result = func()
+            latencies.append(time.perf_counter() - time_started)
+            bytes_read += self._get_size(result)
+
+        return {
+            "benchmark": f"database.{name}",
+            "users": self._users,
+            "calls": iterations,
+            "seconds": round(sum(latencies), 6),
+            "mean_ms": round(sum(latencies) / iterations * 1000, 4),
+            "p50_ms": round(utils.get_percentile(latencies, 0.50) * 1000, 4),
+            "p99_ms": round(utils.get_percentile(latencies, 0.99) * 1000, 4),
+            "bytes_per_call": bytes_read // iterations,
+        }
+
+    def _run_reads(self, database: data.DatabaseManager, generator: DatasetGenerator, counts: dict) -> list[dict]:
+        get_tg_id = lambda: self._random.choice(generator.users_ids)
+        get_subscription_id = lambda: self._random.randint(1, counts["subscriptions"])
+
+        return [
+            self._measure(
+                name="users.get_user",
+                func=lambda: database.users.get_user(
+                    tg_id=get_tg_id(),
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="users.get_ref_count",
+                func=lambda: database.users.get_ref_count(
+                    tg_id=get_tg_id(),
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="users.get_referral_tree",
+                func=lambda: database.users.get_referral_tree(
+                    tg_id=get_tg_id(),
+                    max_depth=constants.REFERRAL_TREE_DEPTH,
+                    limit=constants.REFERRAL_TREE_LIMIT,
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="users.get_all_users",
+                func=database.users.get_all_users,
+                iterations=self._all_iterations,
+            ),
+            self._measure(
+                name="users.get_all_users_labels",
+                func=database.users.get_all_users_labels,
+                iterations=self._all_iterations,
+            ),
+            self._measure(
+                name="users.get_users_count",
+                func=database.users.get_users_count,
+                iterations=self._all_iterations,
+            ),
+            self._measure(
+                name="subscriptions.get_subscription",
+                func=lambda: database.subscriptions.get_subscription(
+                    subscription_id=get_subscription_id(),
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="subscriptions.get_user_subscriptions",
+                func=lambda: database.subscriptions.get_user_subscriptions(
+                    tg_id=get_tg_id(),
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="subscriptions.get_user_subscriptions_labels",
+                func=lambda: database.subscriptions.get_user_subscriptions_labels(
+                    tg_id=get_tg_id(),
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="subscriptions.get_user_active_subscriptions",
+                func=lambda: database.subscriptions.get_user_active_subscriptions(
+                    tg_id=get_tg_id(),
+                    timestamp=self._timestamp,
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="subscriptions.get_user_active_subscriptions_labels",
+                func=lambda: database.subscriptions.get_user_active_subscriptions_labels(
+                    tg_id=get_tg_id(),
+                    timestamp=self._timestamp,
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="subscriptions.get_user_active_subscriptions_count",
+                func=lambda: database.subscriptions.get_user_active_subscriptions_count(
+                    tg_id=get_tg_id(),
+                    timestamp=self._timestamp,
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="subscriptions.get_unchecked_expired_subscriptions",
+                func=lambda: database.subscriptions.get_unchecked_expired_subscriptions(
+                    timestamp=self._timestamp,
+                ),
+                iterations=self._all_iterations,
+            ),
+            self._measure(
+                name="subscriptions.get_all_subscriptions",
+                func=database.subscriptions.get_all_subscriptions,
+                iterations=self._all_iterations,
+            ),
+            self._measure(
+                name="subscriptions.get_all_subscriptions_labels",
+                func=database.subscriptions.get_all_subscriptions_labels,
+                iterations=self._all_iterations,
+            ),
+            self._measure(
+                name="subscriptions.get_subscriptions_count",
+                func=database.subscriptions.get_subscriptions_count,
+                iterations=self._all_iterations,
+            ),
+            self._measure(
+                name="configs.get_config",
+                func=lambda: database.config.get_config(
+                    config_id=self._random.randint(1, counts["configs"]),
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="configs.get_config_data",
+                func=lambda: database.config.get_config_data(
+                    config_id=self._random.randint(1, counts["configs"]),
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="configs.check_config_name",
+                func=lambda: database.config.check_config_name(
+                    name=f"config_{self._random.randint(1, counts['configs'])}",
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="configs.get_available_configs",
+                func=database.config.get_available_configs,
+                iterations=self._all_iterations,
+            ),
+            self._measure(
+                name="configs.get_available_config_ids",
+                func=lambda: database.config.get_available_config_ids(
+                    timestamp=self._timestamp,
+                    limit=data.ConfigProvider.get_instance().config_pool.size,
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="configs.get_recyclable_configs",
+                func=lambda: database.config.get_recyclable_configs(
+                    timestamp=self._timestamp,
+                    limit=data.ConfigProvider.get_instance().config_pool.recycle_batch_size,
+                ),
+                iterations=self._all_iterations,
+            ),
+            self._measure(
+                name="configs.get_available_configs_count",
+                func=lambda: database.config.get_available_configs_count(
+                    timestamp=self._timestamp,
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="configs.get_all_configs",
+                func=database.config.get_all_configs,
+                iterations=self._all_iterations,
+            ),
+            self._measure(
+                name="configs.get_all_configs_labels",
+                func=database.config.get_all_configs_labels,
+                iterations=self._all_iterations,
+            ),
+            self._measure(
+                name="configs.get_configs_count",
+                func=database.config.get_configs_count,
+                iterations=self._all_iterations,
+            ),
+            self._measure(
+                name="payments.get_payment",
+                func=lambda: database.payments.get_payment(
+                    payment_id=self._random.randint(1, max(counts["payments"], 1)),
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="payments.get_user_payments",
+                func=lambda: database.payments.get_user_payments(
+                    tg_id=get_tg_id(),
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="payments.get_user_payments_labels",
+                func=lambda: database.payments.get_user_payments_labels(
+                    tg_id=get_tg_id(),
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="payments.check_first_payment",
+                func=lambda: database.payments.check_first_payment(
+                    tg_id=get_tg_id(),
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="payments.get_all_payments",
+                func=database.payments.get_all_payments,
+                iterations=self._all_iterations,
+            ),
+            self._measure(
+                name="payments.get_all_payments_labels",
+                func=database.payments.get_all_payments_labels,
+                iterations=self._all_iterations,
+            ),
+            self._measure(
+                name="payments.get_payments_count",
+                func=database.payments.get_payments_count,
+                iterations=self._all_iterations,
+            ),
+            self._measure(
+                name="ledger.get_user_entries",
+                func=lambda: database.ledger.get_user_entries(
+                    tg_id=get_tg_id(),
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="ledger.get_balance",
+                func=lambda: database.ledger.get_balance(
+                    tg_id=get_tg_id(),
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="ledger.verify_balance",
+                func=lambda: database.ledger.verify_balance(
+                    tg_id=get_tg_id(),
+                ),
+                iterations=self._iterations,
+            ),
+        ]
+
+    def _run_writes(self, database: data.DatabaseManager, generator: DatasetGenerator, counts: dict) -> list[dict]:
+        get_tg_id = lambda: self._random.choice(generator.users_ids)
+        get_subscription_id = lambda: self._random.randint(1, counts["subscriptions"])
+        new_users_ids = itertools.count(start=generator.users_ids.stop)
+        new_configs_ids = itertools.count(start=counts["configs"] + 1)
+
+        return [
+            self._measure(
+                name="users.add_user",
+                func=lambda: database.users.add_user(
+                    tg_id=next(new_users_ids),
+                    tg_username=None,
+                    balance=int(),
+                    referrer_id=get_tg_id(),
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="users.edit_balance",
+                func=lambda: database.users.edit_balance(
+                    tg_id=get_tg_id(),
+                    balance=self._random.randint(0, 1000),
+                    date=self._timestamp,
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="users.add_balance",
+                func=lambda: database.users.add_balance(
+                    tg_id=get_tg_id(),
+                    amount=1,
+                    kind=models.LedgerEntryType.PAYMENT,
+                    date=self._timestamp,
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="users.reduce_balance",
+                func=lambda: database.users.reduce_balance(
+                    tg_id=get_tg_id(),
+                    amount=1,
+                    kind=models.LedgerEntryType.PURCHASE,
+                    date=self._timestamp,
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="payments.add_payment",
+                func=lambda: database.payments.add_payment(
+                    provider_id=None,
+                    amount=1,
+                    currency="RUB",
+                    payload="benchmark",
+                    date=self._timestamp,
+                    tg_id=get_tg_id(),
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="configs.add_config",
+                func=lambda: database.config.add_config(
+                    name=f"benchmark_{next(new_configs_ids)}",
+                    data="benchmark",
+                    subscription_id=None,
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="subscriptions.add_subscription",
+                func=lambda: database.subscriptions.add_subscription(
+                    plan_id=models.PlansType.MONTH.value,
+                    is_active=True,
+                    is_checked=False,
+                    subscribed_at=self._timestamp,
+                    expires_at=self._timestamp + constants.DAYS_IN_MONTH * constants.SECONDS_IN_DAY,
+                    tg_id=get_tg_id(),
+                    config_id=int(),
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="subscriptions.edit_expires_at",
+                func=lambda: database.subscriptions.edit_expires_at(
+                    subscription_id=get_subscription_id(),
+                    expires_at=self._timestamp,
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="subscriptions.switch_active",
+                func=lambda: database.subscriptions.switch_active(
+                    subscription_id=get_subscription_id(),
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="subscriptions.switch_checked",
+                func=lambda: database.subscriptions.switch_checked(
+                    subscription_id=get_subscription_id(),
+                ),
+                iterations=self._iterations,
+            ),
+            self._measure(
+                name="ledger.add_snapshots",
+                func=lambda: database.ledger.add_snapshots(
+                    date=self._timestamp,
+                ),
+                iterations=self._all_iterations,
+            ),
+        ]
+
+    def run(self) -> list[dict]:
+        with tempfile.TemporaryDirectory() as database_path:
+            database = TemporaryDatabaseManager(
+                path=database_path,
+            )
+            generator = DatasetGenerator(
+                database=database,
+                users=self._users,
+                seed=self._seed,
+                timestamp=self._timestamp,
+            )
+
+            time_started = time.perf_counter()
+            counts = generator.generate()
+
+            try:
+                return [
+                    {
+                        "benchmark": "database.generate",
+                        "users": self._users,
+                        "seconds": round(time.perf_counter() - time_started, 6),
+                        "rows": counts,
+                    },
+                    *self._run_reads(database, generator, counts),
+                    *self._run_writes(database, generator, counts),
+                ]
+            finally:
+                database.close_all()
+
+
+class WorkerBenchmark:
+    DISTRIBUTIONS = ("uniform", "month_end")
+    _SPIKE_SHARE = 0.8
+    _SPIKE_SECONDS = constants.SECONDS_IN_HOUR
+    _FIRST_USER_ID = 1000000000
+
+    def __init__(self, subscriptions: int, distribution: str, window: int, interval: int, seed: int) -> None:
+        self._subscriptions = subscriptions
+        self._distribution = distribution
+        self._window = window
+        self._interval = interval
+        self._random = random.Random(seed)
+        self._timestamp = int(time.time())
+        self._data = data.DataProvider.get_instance()
+        self._config = data.ConfigProvider.get_instance()
+
+    def _get_expires_at(self) -> int:
+        if self._distribution == "month_end" and self._random.random() < self._SPIKE_SHARE:
+            return self._timestamp + self._window - self._random.randint(0, self._SPIKE_SECONDS)
+        else:
+            return self._timestamp + self._random.randint(0, self._window)
+
+    def _seed(self, database: data.DatabaseManager) -> list[int]:
+        expires_at_list = sorted(self._get_expires_at() for _ in range(self._subscriptions))
+        users_ids = range(self._FIRST_USER_ID, self._FIRST_USER_ID + self._subscriptions)
+
+        DatasetGenerator.insert(
+            database=database.users,
+            columns=("tg_id", "tg_username", "balance", "referrer_id"),
+            rows=(
+                (
+                    tg_id,
+                    f"user{tg_id}",
+                    self._random.randint(0, self._config.payments.max_balance),
+                    None,
+                ) for tg_id in users_ids
+            ),
+        )
+        DatasetGenerator.insert(
+            database=database.subscriptions,
+            columns=("plan_id", "is_active", "is_checked", "subscribed_at", "expires_at", "tg_id", "config_id"),
+            rows=(
+                (
+                    self._random.randrange(len(self._data.plans.plans)),
+                    self._random.randint(0, 1),
+                    0,
+                    expires_at - self._data.plans.minimum_plan.days * constants.SECONDS_IN_DAY,
+                    expires_at,
+                    tg_id,
+                    tg_id,
+                ) for tg_id, expires_at in zip(users_ids, self._random.sample(expires_at_list, len(expires_at_list)))
+            ),
+        )
+
+        return expires_at_list
+
+    def run(self) -> list[dict]:
+        with tempfile.TemporaryDirectory() as database_path:
+            database = TemporaryDatabaseManager(
+                path=database_path,
+            )
+            expires_at_list = self._seed(database)
+
+            current_time = float(self._timestamp)
+            current_client = client.AiogramClient(
+                clock=utils.Clock(
+                    time_source=lambda: current_time,
+                ),
+                database=database,
+            )
+            database.enable_profiling(
+                slow_query_threshold=float("inf"),
+            )
+
+            cycles_count = int()
+            idle_cycles_skipped = int()
+            elapsed_total = float()
+            lags = list()
+            expires_at_iterator = iter(expires_at_list)
+            next_expires_at = next(expires_at_iterator, None)
+
+            while next_expires_at is not None:
+                current_timestamp = int(current_time)
+                time_started = time.perf_counter()
+
+                current_subscriptions = current_client.process_expired_subscriptions(
+                    timestamp=current_timestamp,
+                )
+
+                elapsed = time.perf_counter() - time_started
+                elapsed_total += elapsed
+                cycles_count += 1
+                current_time += elapsed
+
+                for subscription in current_subscriptions:
+                    lags.append(current_time - subscription.expires_at)
+
+                while next_expires_at is not None and next_expires_at <= current_timestamp:
+                    next_expires_at = next(expires_at_iterator, None)
+
+                current_time += self._interval
+
+                if next_expires_at is not None and next_expires_at > current_time:
+                    idle_cycles_skipped += int(next_expires_at - current_time) // self._interval
+                    current_time = float(next_expires_at)
+
+            current_subscriptions = database.subscriptions.get_all_subscriptions()
+            commits_count = sum(
+                current_statistics.count for current_statistics in database.profiler.get_statistics()
+                if current_statistics.statement == "COMMIT"
+            )
+
+            database.close_all()
+
+        return [
+            {
+                "benchmark": f"worker.{self._distribution}",
+                "subscriptions": self._subscriptions,
+                "renewed": sum(not subscription.is_checked for subscription in current_subscriptions),
+                "expired": sum(bool(subscription.is_checked) for subscription in current_subscriptions),
+                "cycles": cycles_count,
+                "idle_cycles_skipped": idle_cycles_skipped,
+                "seconds": round(elapsed_total, 6),
+                "subscriptions_per_second": round(len(lags) / elapsed_total, 2) if elapsed_total else float(),
+                "max_lag_seconds": round(max(lags, default=float()), 3),
+                "p99_lag_seconds": round(utils.get_percentile(lags, 0.99), 3),
+                "commits": commits_count,
+                "commits_per_subscription": round(commits_count / len(lags), 3) if lags else float(),
+            },
+        ]
+
+
+class LoadBenchmark:
+    _UPDATE_TIMEOUT = 30
+    _MINIMUM_PLAN_ID = 0
+
+    def __init__(self, users: int, iterations: int, api_latency: float = 0.0) -> None:
+        self._users = users
+        self._iterations = iterations
+        self._config = data.ConfigProvider.get_instance()
+        self._data = data.DataProvider.get_instance()
+        self._bot = aiogram.types.User(
+            id=8205533074,
+            is_bot=True,
+            first_name="SampleVPNBot",
+            username="SampleVPNBot",
+        )
+        self._server = FakeTelegramServer(
+            bot=self._bot,
+            latency=api_latency,
+        )
+        self._pending: dict[int, tuple[str, asyncio.Future]] = dict()
+        self._latencies: dict[str, list[float]] = collections.defaultdict(list)
+        self._errors = collections.Counter()
+
+    async def _measure_middleware(
+            self,
+            handler: typing.Callable[[aiogram.types.TelegramObject, dict[str, typing.Any]], typing.Awaitable[typing.Any]],
+            event: aiogram.types.Update,
+            event_data: dict[str, typing.Any],
+    ) -> typing.Any:
+        route, future = self._pending.pop(event.update_id, (event.event_type, None))
+        time_started = time.perf_counter()
+
+        try:
+            return await handler(event, event_data)
+        except Exception:
+            self._errors[route] += 1
+            raise
+        finally:
+            self._latencies[route].append(time.perf_counter() - time_started)
+
+            if future and not future.done():
+                future.set_result(None)
+
+    async def _send_update(self, route: str, **kwargs) -> None:
+        future = asyncio.get_running_loop().create_future()
+        update_id = self._server.add_update(**kwargs)
+
+        self._pending[update_id] = (route, future)
+
+        try:
+            await asyncio.wait_for(future, timeout=self._UPDATE_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._pending.pop(update_id, None)
+            self._errors[route] += 1
+
+    @staticmethod
+    def _get_user(tg_id: int) -> dict:
+        return {
+            "id": tg_id,
+            "is_bot": False,
+            "first_name": f"User {tg_id}",
+            "username": f"user{tg_id}",
+            "language_code": "ru",
+        }
+
+    async def _send_command(self, tg_id: int, command: str, args: str | None = None) -> None:
+        text = f"/{command} {args}" if args else f"/{command}"
+
+        await self._send_update(
+            route=f"/{command}",
+            message=self._server.get_message(
+                chat_id=tg_id,
+                text=text,
+                entities=[
+                    {
+                        "type": "bot_command",
+                        "offset": 0,
+                        "length": len(command) + 1,
+                    },
+                ],
+                **{
+                    "from": self._get_user(tg_id),
+                },
+            ),
+        )
+
+    async def _send_callback(self, tg_id: int, callback_data: str) -> None:
+        await self._send_update(
+            route=callback_data.split()[0],
+            callback_query={
+                "id": str(tg_id),
+                "chat_instance": str(tg_id),
+                "data": callback_data,
+                "message": self._server.get_message(
+                    chat_id=tg_id,
+                    text=callback_data,
+                ),
+                "from": self._get_user(tg_id),
+            },
+        )
+
+    async def _send_payment(self, tg_id: int, amount: int) -> None:
+        payload = f"add_funds_invoice {amount}"
+        total_amount = amount * self._config.payments.currency_multiplier
+
+        await self._send_update(
+            route="pre_checkout_query",
+            pre_checkout_query={
+                "id": str(tg_id),
+                "currency": self._config.payments.currency,
+                "total_amount": total_amount,
+                "invoice_payload": payload,
+                "from": self._get_user(tg_id),
+            },
+        )
+        await self._send_update(
+            route="successful_payment",
+            message=self._server.get_message(
+                chat_id=tg_id,
+                successful_payment={
+                    "currency": self._config.payments.currency,
+                    "total_amount": total_amount,
+                    "invoice_payload": payload,
+                    "telegram_payment_charge_id": f"{tg_id}_{time.time_ns()}",
+                    "provider_payment_charge_id": f"{tg_id}_{time.time_ns()}",
+                },
+                **{
+                    "from": self._get_user(tg_id),
+                },
+            ),
+        )
+
+    async def _run_user(self, tg_id: int, referrer_id: int) -> None:
+        minimum_cost = self._data.plans.minimum_plan.cost
+
+        for _ in range(self._iterations):
+            await self._send_command(tg_id, "start", str(referrer_id))
+            await self._send_callback(tg_id, "plans")
+            await self._send_callback(tg_id, f"plan {self._MINIMUM_PLAN_ID}")
+            await self._send_callback(tg_id, f"add_funds {minimum_cost}")
+            await self._send_payment(tg_id, minimum_cost)
+            await self._send_callback(tg_id, f"plan_subscribe {self._MINIMUM_PLAN_ID}")
+            await self._send_callback(tg_id, "subscriptions 0")
+            await self._send_callback(tg_id, "profile")
+
+    async def _run_admin(self, tg_id: int) -> None:
+        for _ in range(self._iterations):
+            await self._send_command(tg_id, "admin")
+            await self._send_callback(tg_id, "admin_users 0")
+            await self._send_callback(tg_id, "admin_configs 0")
+            await self._send_callback(tg_id, "admin_subscriptions 0")
+            await self._send_callback(tg_id, "admin_payments 0")
+
+    async def _run(self) -> list[dict]:
+        base_url = await self._server.start()
+
+        with tempfile.TemporaryDirectory() as database_path:
+            database = TemporaryDatabaseManager(
+                path=database_path,
+            )
+
+            for config_id in range(self._users * self._iterations):
+                database.config.add_config(
+                    name=f"load_{config_id}",
+                    data=f"config_{config_id}",
+                    subscription_id=None,
+                )
+
+            current_client = client.AiogramClient(
+                database=database,
+                session=aiogram.client.session.aiohttp.AiohttpSession(
+                    api=aiogram.client.telegram.TelegramAPIServer.from_base(base_url),
+                ),
+            )
+            current_client.update.outer_middleware(
+                self._measure_middleware,
+            )
+
+            polling_task = asyncio.create_task(current_client.polling_coroutine())
+            users_ids = [self._bot.id + tg_id for tg_id in range(1, self._users + 1)]
+
+            time_started = time.perf_counter()
+
+            await asyncio.gather(
+                *[
+                    self._run_user(
+                        tg_id=tg_id,
+                        referrer_id=users_ids[0],
+                    ) for tg_id in users_ids
+                ],
+                *[
+                    self._run_admin(
+                        tg_id=tg_id,
+                    ) for tg_id in self._config.settings.admin_list
+                ],
+            )
+
+            elapsed = time.perf_counter() - time_started
+
+            await current_client.terminate_polling()
+            await polling_task
+
+        await self._server.stop()
+
+        return self._get_results(elapsed)
+
+    @staticmethod
+    def _get_result(name: str, latencies: list[float], errors: int) -> dict:
+        return {
+            "benchmark": name,
+            "updates": len(latencies),
+            "errors": errors,
+            "error_rate": round(errors / len(latencies), 6) if latencies else float(),
+            "p50_ms": round(utils.get_percentile(latencies, 0.50) * 1000, 3),
+            "p99_ms": round(utils.get_percentile(latencies, 0.99) * 1000, 3),
+        }
+
+    def _get_results(self, elapsed: float) -> list[dict]:
+        all_latencies = list(itertools.chain.from_iterable(self._latencies.values()))
+        api_errors = sum(self._server.errors_count.values())
+
+        return [
+            {
+                **self._get_result(
+                    name="load",
+                    latencies=all_latencies,
+                    errors=sum(self._errors.values()) + api_errors,
+                ),
+                "users": self._users,
+                "iterations": self._iterations,
+                "seconds": round(elapsed, 6),
+                "updates_per_second": round(len(all_latencies) / elapsed, 2),
+                "api_requests": sum(self._server.requests_count.values()),
+                "api_errors": api_errors,
+            },
+            *[
+                self._get_result(
+                    name=f"load.{route}",
+                    latencies=latencies,
+                    errors=self._errors[route],
+                ) for route, latencies in sorted(self._latencies.items())
+            ],
+        ]
+
+    def run(self) -> list[dict]:
+        return asyncio.run(self._run())
+
+
+class StartupBenchmark(LoadBenchmark):
+    _IMPORT_TIME_PATTERN = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \|\s+(\S+)$")
+    _MEASURED_MODULES = ("aiogram", "aiohttp", "pydantic", "pyquoks", "models", "data", "misc", "client")
+
+    def __init__(self, api_latency: float) -> None:
+        super().__init__(
+            users=1,
+            iterations=1,
+            api_latency=api_latency,
+        )
+
+    def _get_imports_ms(self) -> dict[str, float]:
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import client"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+        )
+        imports_ms = dict()
+
+        for line in process.stderr.splitlines():
+            if match := self._IMPORT_TIME_PATTERN.match(line):
+                cumulative_us, module = match.groups()
+
+                if module in self._MEASURED_MODULES:
+                    imports_ms.setdefault(module, round(int(cumulative_us) / 1000, 3))
+
+        return imports_ms
+
+    @staticmethod
+    def _measure_ms(func: typing.Callable[[], typing.Any]) -> tuple[typing.Any, float]:
+        time_started = time.perf_counter()
+        result = func()
+        return result, round((time.perf_counter() - time_started) * 1000, 3)
+
+    async def _run(self) -> list[dict]:
+        imports_ms = self._get_imports_ms()
+        base_url = await self._server.start()
+
+        _, providers_ms = self._measure_ms(
+            lambda: (data.DataProvider(), data.ConfigProvider(), data.StringsProvider()),
+        )
+
+        with tempfile.TemporaryDirectory() as database_path:
+            database, database_ms = self._measure_ms(
+                lambda: TemporaryDatabaseManager(
+                    path=database_path,
+                ),
+            )
+            current_client, client_ms = self._measure_ms(
+                lambda: client.AiogramClient(
+                    database=database,
+                    session=aiogram.client.session.aiohttp.AiohttpSession(
+                        api=aiogram.client.telegram.TelegramAPIServer.from_base(base_url),
+                    ),
+                ),
+            )
+            current_client.update.outer_middleware(
+                self._measure_middleware,
+            )
+
+            time_started = time.perf_counter()
+            polling_task = asyncio.create_task(current_client.polling_coroutine())
+
+            await self._send_command(self._bot.id + 1, "start")
+
+            first_update_ms = round((time.perf_counter() - time_started) * 1000, 3)
+
+            await current_client.terminate_polling()
+            await polling_task
+
+        await self._server.stop()
+
+        return [
+            {
+                "benchmark": "startup",
+                "imports_ms": imports_ms,
+                "providers_ms": providers_ms,
+                "database_ms": database_ms,
+                "client_ms": client_ms,
+                "first_update_ms": first_update_ms,
+                "total_ms": round(
+                    imports_ms.get("client", float()) + providers_ms + database_ms + client_ms + first_update_ms,
+                    3,
+                ),
+                "api_requests": dict(self._server.requests_count),
+            },
+        ]
+
+
+# endregion
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    strings_parser = subparsers.add_parser("strings")
+    strings_parser.add_argument("--iterations", type=int, default=100000)
+
+    database_parser = subparsers.add_parser("database")
+    database_parser.add_argument("--users", type=int, nargs="+", default=[10000, 100000, 1000000])
+    database_parser.add_argument("--iterations", type=int, default=1000)
+    database_parser.add_argument("--all-iterations", type=int, default=3)
+    database_parser.add_argument("--seed", type=int, default=0)
+
+    worker_parser = subparsers.add_parser("worker")
+    worker_parser.add_argument("--subscriptions", type=int, default=10000)
+    worker_parser.add_argument("--distribution", choices=WorkerBenchmark.DISTRIBUTIONS, default="month_end")
+    worker_parser.add_argument("--window", type=int, default=constants.DAYS_IN_MONTH * constants.SECONDS_IN_DAY)
+    worker_parser.add_argument("--interval", type=int, default=1)
+    worker_parser.add_argument("--seed", type=int, default=0)
+
+    load_parser = subparsers.add_parser("load")
+    load_parser.add_argument("--users", type=int, default=100)
+    load_parser.add_argument("--iterations", type=int, default=5)
+    load_parser.add_argument("--api-latency", type=float, default=0.0)
+
+    startup_parser = subparsers.add_parser("startup")
+    startup_parser.add_argument("--api-latency", type=float, default=0.05)
+
+    args = parser.parse_args()
+
+    match args.benchmark:
+        case "strings":
+            results = StringsBenchmark(
+                iterations=args.iterations,
+            ).run()
+        case "database":
+            results = list(
+                itertools.chain.from_iterable(
+                    DatabaseBenchmark(
+                        users=users,
+                        iterations=args.iterations,
+                        all_iterations=args.all_iterations,
+                        seed=args.seed,
+                    ).run() for users in args.users
+                ),
+            )
+        case "worker":
+            results = WorkerBenchmark(
+                subscriptions=args.subscriptions,
+                distribution=args.distribution,
+                window=args.window,
+                interval=args.interval,
+                seed=args.seed,
+            ).run()
+        case "load":
+            results = LoadBenchmark(
+                users=args.users,
+                iterations=args.iterations,
+                api_latency=args.api_latency,
+            ).run()
+        case "startup":
+            results = StartupBenchmark(
+                api_latency=args.api_latency,
+            ).run()
+        case _:
+            results = list()
+
+    for result in results:
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
 from __future__ import annotations
-import datetime, asyncio, logging
-import aiogram, aiogram.exceptions, aiogram.filters, aiogram.client.default, aiogram.utils.keyboard, \
-    aiogram.fsm.context, aiogram.fsm.state
-import models, data, misc, constants
+import datetime, asyncio, logging, typing, os, time
+import aiogram, aiogram.exceptions, aiogram.filters, aiogram.client.default, aiogram.client.session.base, \
+    aiogram.utils.keyboard, aiogram.fsm.context, aiogram.fsm.state, aiogram.fsm.storage.memory, aiogram.methods
+import models, data, misc, constants, utils
 
 
 class AiogramClient(aiogram.Dispatcher):
@@ -19,29 +19,98 @@ class AiogramClient(aiogram.Dispatcher):
         admin_subscriptions_enter = aiogram.fsm.state.State()
         admin_payments_enter = aiogram.fsm.state.State()
 
-    def __init__(self) -> None:
-        self._user = None
-        self._data = data.DataProvider()
-        self._config = data.ConfigProvider()
+    def __init__(
+            self,
+            clock: utils.Clock | None = None,
+            database: data.IDatabaseBackend | None = None,
+            session: aiogram.client.session.base.BaseSession | None = None,
+    ) -> None:
+        self._clock = clock if clock else utils.Clock()
+        self._data = data.DataProvider.get_instance()
+        self._config = data.ConfigProvider.get_instance()
+        self._identity = data.IdentityProvider(
+            bot_token=self._config.settings.bot_token,
+            ttl=constants.BOT_IDENTITY_TTL,
+            clock=self._clock,
+        )
+        self._user = self._identity.load()
         self._strings = data.StringsProvider()
-        self._database = data.DatabaseManager()
         self._logger = data.LoggerService(
             name=__name__,
             file_handling=self._config.settings.file_logging,
             level=logging.DEBUG if self._config.settings.debug_logging else logging.INFO,
+            queue_size=self._config.logging.queue_size,
+            rotation_when=self._config.logging.rotation_when,
+            max_bytes=self._config.logging.max_bytes,
+            backup_count=self._config.logging.backup_count,
+            sample_rate=self._config.logging.sample_rate,
+            sampled_routes=self._config.logging.sampled_routes,
+        )
+        self._database = database if database else self._get_database()
+        self._ledger_snapshot_timestamp = int()
+        self._config_recycle_timestamp = int()
+        self._config_pool = data.ConfigPoolService(
+            database=self._database,
+            clock=self._clock,
+            size=self._config.config_pool.size,
+            reservation_ttl=self._config.config_pool.reservation_ttl,
+            low_stock_threshold=self._config.config_pool.low_stock_threshold,
+            recycle_grace_period=self._config.config_pool.recycle_grace_period,
+            recycle_batch_size=self._config.config_pool.recycle_batch_size,
+            recycle_without_rotation=self._config.config_pool.recycle_without_rotation,
+        )
+        self._metrics = data.MetricsService(
+            host=self._config.metrics.host,
+            port=self._config.metrics.port,
         )
         self._states = self.States()
         self._router = aiogram.Router()
         self._buttons = misc.ButtonsContainer()
         self._bot = aiogram.Bot(
             token=self._config.settings.bot_token,
+            session=session,
             default=aiogram.client.default.DefaultBotProperties(
                 parse_mode=aiogram.enums.ParseMode.HTML,
             ),
         )
+        self._bot.session.middleware(
+            self.api_middleware,
+        )
         super().__init__(name="AiogramClientDispatcher")
         self.include_router(self._router)
 
+        self.update.outer_middleware(
+            self.interaction_middleware,
+        )
+        self.update.outer_middleware(
+            self.locale_middleware,
+        )
+        if self._config.database.profiling:
+            self._database.enable_profiling(
+                slow_query_threshold=self._config.database.slow_query_ms / 1000,
+            )
+        self._database.add_observer(
+            self._logger.add_database_time,
+        )
+        self._database.add_observer(
+            self._metrics.observe_database,
+        )
+        self._database.add_slow_query_observer(
+            self._logger.log_slow_query,
+        )
+        self._database.ledger.add_opening_balances(
+            date=self._clock.timestamp(),
+        )
+        self._metrics.fsm_states.set_callback(
+            self._get_states_count,
+        )
+        self._metrics.log_records_dropped.set_callback(
+            lambda: {tuple(): self._logger.dropped_count},
+        )
+        self._metrics.configs_available.set_callback(
+            lambda: {tuple(): self._config_pool.available_count},
+        )
+
         self.errors.register(
             self.error_handler,
         )
@@ -111,11 +180,22 @@ class AiogramClient(aiogram.Dispatcher):
     # region Properties and helpers
 
     @property
-    async def user(self) -> aiogram.types.User:
-        if not self._user:
-            self._user = (await self._bot.get_me())
+    def user(self) -> aiogram.types.User:
         return self._user
 
+    def _get_database(self) -> data.IDatabaseBackend:
+        match self._config.database.backend:
+            case "postgresql":
+                return data.PostgresDatabaseManager(
+                    dsn=self._config.database.postgres_dsn,
+                    pool_min_size=self._config.database.pool_min_size,
+                    pool_max_size=self._config.database.pool_max_size,
+                )
+            case _:
+                return data.DatabaseManager(
+                    logger=self._logger,
+                )
+
     @staticmethod
     def _get_message_thread_id(message: aiogram.types.Message) -> int | None:
         if message.reply_to_message and message.reply_to_message.is_topic_message:
@@ -128,9 +208,11 @@ class AiogramClient(aiogram.Dispatcher):
     def _get_max_balance(
             self,
             tg_id: int,
+            timestamp: int,
     ) -> int:
-        current_subscriptions = self._database.subscriptions.get_user_active_subscriptions(
+        current_subscriptions = self._database.subscriptions.get_user_active_subscriptions_labels(
             tg_id=tg_id,
+            timestamp=timestamp,
         )
 
         return max(
@@ -138,6 +220,16 @@ class AiogramClient(aiogram.Dispatcher):
             sum([self._data.plans.get_plan_by_id(subscription.plan_id).cost for subscription in current_subscriptions])
         )
 
+    def _get_states_count(self) -> dict[tuple, int]:
+        states_count = dict()
+
+        if isinstance(self.storage, aiogram.fsm.storage.memory.MemoryStorage):
+            for record in list(self.storage.storage.values()):
+                if record.state:
+                    states_count[(record.state,)] = states_count.get((record.state,), 0) + 1
+
+        return states_count
+
     def _get_referrer_id(self, user_id: int, args: str | None) -> int | None:
         try:
             referrer_id = int(args)
@@ -150,9 +242,26 @@ class AiogramClient(aiogram.Dispatcher):
         except:
             return None
 
+    async def _load_user(self) -> None:
+        if not self._user:
+            self._user = await self._bot.get_me()
+
+            self._identity.save(
+                user=self._user,
+            )
+
     async def polling_coroutine(self) -> None:
         try:
-            await self._bot.delete_webhook(drop_pending_updates=self._config.settings.skip_updates)
+            await asyncio.gather(
+                self._bot.delete_webhook(
+                    drop_pending_updates=self._config.settings.skip_updates,
+                ),
+                self._bot.set_my_commands(
+                    commands=self._COMMANDS,
+                    scope=aiogram.types.BotCommandScopeDefault(),
+                ),
+                self._load_user(),
+            )
             await self.start_polling(self._bot)
         except Exception as e:
             self._logger.log_exception(e)
@@ -161,48 +270,179 @@ class AiogramClient(aiogram.Dispatcher):
         await self.stop_polling()
         await self._bot.close()
 
-    async def worker(self) -> None:
-        self._logger.info(f"{self.worker.__name__} initialized!")
+    def process_expired_subscriptions(self, timestamp: int) -> list[models.SubscriptionValues]:
+        current_subscriptions = self._database.subscriptions.get_unchecked_expired_subscriptions(
+            timestamp=timestamp,
+        )
 
-        while True:
-            current_subscriptions = self._database.subscriptions.get_unchecked_expired_subscriptions()
+        self._metrics.worker_backlog.set(
+            value=len(current_subscriptions),
+        )
 
-            for subscription in current_subscriptions:
+        for subscription in current_subscriptions:
 
-                current_plan = self._data.plans.get_plan_by_id(
-                    plan_id=subscription.plan_id,
-                )
+            current_plan = self._data.plans.get_plan_by_id(
+                plan_id=subscription.plan_id,
+            )
 
-                current_user = self._database.users.get_user(
-                    tg_id=subscription.tg_id,
+            current_user = self._database.users.get_user(
+                tg_id=subscription.tg_id,
+            )
+
+            is_renewable = subscription.is_active and current_plan.cost <= current_user.balance
+
+            self._logger.info(f"{self.worker.__name__} ({subscription.id=}, {is_renewable=})")
+
+            if is_renewable:
+                self._database.users.reduce_balance(
+                    tg_id=current_user.tg_id,
+                    amount=current_plan.cost,
+                    kind=models.LedgerEntryType.RENEWAL,
+                    date=timestamp,
+                    reference=f"subscription {subscription.id}",
                 )
 
-                is_renewable = subscription.is_active and current_plan.cost <= current_user.balance
+                self._database.subscriptions.edit_expires_at(
+                    subscription_id=subscription.id,
+                    expires_at=int(
+                        (datetime.datetime.fromtimestamp(timestamp) + datetime.timedelta(
+                            days=current_plan.days,
+                        )).timestamp()
+                    ),
+                )
 
-                self._logger.info(f"{self.worker.__name__} ({subscription.id=}, {is_renewable=})")
+                markup_builder = aiogram.utils.keyboard.InlineKeyboardBuilder()
+                markup_builder.row(self._buttons.view_subscriptions())
+                markup_builder.row(self._buttons.view_start)
+            else:
+                self._database.subscriptions.switch_checked(
+                    subscription_id=subscription.id,
+                )
 
-                if is_renewable:
-                    self._database.users.reduce_balance(
-                        tg_id=current_user.tg_id,
-                        amount=current_plan.cost,
+        return current_subscriptions
+
+    def import_configs(self, archive: typing.BinaryIO) -> list[tuple[str, models.ConfigImportStatus]]:
+        current_names = self._database.config.get_config_names()
+        current_configs = list()
+        current_results = list()
+
+        for filename, file_data in utils.get_archive_files(
+                file=archive,
+                max_size=constants.CONFIG_MAX_SIZE,
+        ):
+            _filename_list = filename.split(".")
+            current_config_name = ".".join(_filename_list[:-1])
+            current_config_extension = _filename_list[-1]
+
+            if len(_filename_list) < 2 or current_config_extension != self._config.settings.config_extension:
+                current_status = models.ConfigImportStatus.INVALID_EXTENSION
+            elif not current_config_name or current_config_name in current_names:
+                current_status = models.ConfigImportStatus.INVALID_NAME
+            elif file_data is None:
+                current_status = models.ConfigImportStatus.INVALID_DATA
+            else:
+                try:
+                    current_configs.append(
+                        (
+                            current_config_name,
+                            file_data.decode(),
+                        ),
                     )
+                    current_names.add(current_config_name)
+                    current_status = models.ConfigImportStatus.ADDED
+                except UnicodeDecodeError:
+                    current_status = models.ConfigImportStatus.INVALID_DATA
+
+            current_results.append(
+                (
+                    filename,
+                    current_status,
+                ),
+            )
+
+        if current_configs:
+            self._database.config.add_configs(
+                configs=current_configs,
+            )
+
+        return current_results
+
+    def process_ledger_snapshots(self, timestamp: int) -> int:
+        if timestamp - self._ledger_snapshot_timestamp < constants.LEDGER_SNAPSHOT_INTERVAL:
+            return int()
+
+        self._ledger_snapshot_timestamp = timestamp
+
+        snapshots_count = self._database.ledger.add_snapshots(
+            date=timestamp,
+        )
+
+        self._logger.info(f"{self.process_ledger_snapshots.__name__} ({snapshots_count=})")
+
+        return snapshots_count
+
+    def process_config_recycling(self, timestamp: int) -> int:
+        if timestamp - self._config_recycle_timestamp < constants.CONFIG_RECYCLE_INTERVAL:
+            return int()
+
+        self._config_recycle_timestamp = timestamp
+
+        recycled_count = self._config_pool.recycle(
+            timestamp=timestamp,
+        )
+
+        self._metrics.configs_recycled.inc(
+            amount=recycled_count,
+        )
+        self._logger.info(f"{self.process_config_recycling.__name__} ({recycled_count=})")
+
+        return recycled_count
+
+    async def process_config_pool(self) -> None:
+        if self._config_pool.is_refill_needed:
+            self._config_pool.refill()
 
-                    self._database.subscriptions.edit_expires_at(
-                        subscription_id=subscription.id,
-                        expires_at=int(
-                            (datetime.datetime.now() + datetime.timedelta(
-                                days=current_plan.days,
-                            )).timestamp()
+        if self._config_pool.check_low_stock():
+            self._logger.warning(f"{self.process_config_pool.__name__} ({self._config_pool.available_count=})")
+
+            markup_builder = aiogram.utils.keyboard.InlineKeyboardBuilder()
+            markup_builder.row(self._buttons.admin_configs_add)
+            markup_builder.row(self._buttons.back_to_admin)
+
+            for admin_id in self._config.settings.admin_list:
+                try:
+                    await self._bot.send_message(
+                        chat_id=admin_id,
+                        text=self._strings.menu.admin_configs_low_stock(
+                            available_count=self._config_pool.available_count,
                         ),
+                        reply_markup=markup_builder.as_markup(),
                     )
+                except Exception as e:
+                    self._logger.log_exception(e)
 
-                    markup_builder = aiogram.utils.keyboard.InlineKeyboardBuilder()
-                    markup_builder.row(self._buttons.view_subscriptions())
-                    markup_builder.row(self._buttons.view_start)
-                else:
-                    self._database.subscriptions.switch_checked(
-                        subscription_id=subscription.id,
-                    )
+    async def worker(self) -> None:
+        self._logger.info(f"{self.worker.__name__} initialized!")
+
+        while True:
+            time_started = time.perf_counter()
+
+            current_timestamp = self._clock.timestamp()
+
+            self.process_expired_subscriptions(
+                timestamp=current_timestamp,
+            )
+            self.process_ledger_snapshots(
+                timestamp=current_timestamp,
+            )
+            self.process_config_recycling(
+                timestamp=current_timestamp,
+            )
+            await self.process_config_pool()
+
+            self._metrics.worker_duration.observe(
+                value=time.perf_counter() - time_started,
+            )
 
             await asyncio.sleep(1)
 
@@ -222,7 +462,7 @@ class AiogramClient(aiogram.Dispatcher):
             markup_builder.row(self._buttons.add_funds)
             markup_builder.row(
                 self._buttons.invite_friend(
-                    bot_username=(await self.user).username,
+                    bot_username=self.user.username,
                     tg_id=current_user.tg_id,
                 ),
             )
@@ -232,7 +472,7 @@ class AiogramClient(aiogram.Dispatcher):
                 chat_id=call.message.chat.id,
                 message_thread_id=self._get_message_thread_id(call.message),
                 text=self._strings.menu.start(
-                    bot_full_name=(await self.user).full_name,
+                    bot_full_name=self.user.full_name,
                 ),
                 reply_markup=markup_builder.as_markup(),
             )
@@ -268,7 +508,7 @@ class AiogramClient(aiogram.Dispatcher):
             subscription_id=subscription_id,
         )
 
-        current_config = self._database.config.get_config(
+        current_config_data = self._database.config.get_config_data(
             config_id=current_subscription.config_id,
         )
 
@@ -291,9 +531,9 @@ class AiogramClient(aiogram.Dispatcher):
                 chat_id=call.message.chat.id,
                 message_thread_id=self._get_message_thread_id(call.message),
                 document=aiogram.types.BufferedInputFile(
-                    file=current_config.data.encode(),
+                    file=current_config_data.encode(),
                     filename=".".join([
-                        f"{(await self.user).full_name}_{current_subscription.id}",
+                        f"{self.user.full_name}_{current_subscription.id}",
                         self._config.settings.config_extension,
                     ]),
                 ),
@@ -306,7 +546,7 @@ class AiogramClient(aiogram.Dispatcher):
             subscription_id=subscription_id,
         )
 
-        current_config = self._database.config.get_config(
+        current_config_data = self._database.config.get_config_data(
             config_id=current_subscription.config_id,
         )
 
@@ -329,35 +569,117 @@ class AiogramClient(aiogram.Dispatcher):
                 chat_id=call.message.chat.id,
                 message_thread_id=self._get_message_thread_id(call.message),
                 text=self._strings.menu.subscription_config_copy(
-                    config_key=current_config.data,
+                    config_key=current_config_data,
                 ),
                 reply_markup=markup_builder.as_markup(),
             )
 
     # endregion
 
+    # region Middlewares
+
+    async def interaction_middleware(
+            self,
+            handler: typing.Callable[[aiogram.types.TelegramObject, dict[str, typing.Any]], typing.Awaitable[typing.Any]],
+            event: aiogram.types.Update,
+            event_data: dict[str, typing.Any],
+    ) -> typing.Any:
+        current_interaction = self._logger.start_interaction(
+            event_type=event.event_type,
+        )
+
+        self._metrics.updates.inc(
+            event.event_type,
+        )
+
+        try:
+            return await handler(event, event_data)
+        finally:
+            self._logger.finish_interaction(
+                interaction=current_interaction,
+            )
+
+            self._metrics.handler_duration.observe(
+                current_interaction.handler or "unhandled",
+                value=time.perf_counter() - current_interaction.time_started,
+            )
+
+            if current_interaction.route and event.event_type == "callback_query":
+                self._metrics.callback_queries.inc(
+                    current_interaction.route,
+                )
+
+    async def api_middleware(
+            self,
+            make_request: typing.Callable[[aiogram.Bot, aiogram.methods.TelegramMethod], typing.Awaitable[typing.Any]],
+            bot: aiogram.Bot,
+            method: aiogram.methods.TelegramMethod,
+    ) -> typing.Any:
+        time_started = time.perf_counter()
+
+        self._metrics.api_requests.inc(
+            method.__api_method__,
+        )
+
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            self._metrics.api_errors.inc(
+                method.__api_method__,
+                type(e).__name__,
+            )
+            raise
+        finally:
+            elapsed = time.perf_counter() - time_started
+
+            self._logger.add_api_time(
+                elapsed=elapsed,
+            )
+            self._metrics.api_duration.observe(
+                method.__api_method__,
+                value=elapsed,
+            )
+
+    async def locale_middleware(
+            self,
+            handler: typing.Callable[[aiogram.types.TelegramObject, dict[str, typing.Any]], typing.Awaitable[typing.Any]],
+            event: aiogram.types.TelegramObject,
+            event_data: dict[str, typing.Any],
+    ) -> typing.Any:
+        current_user: aiogram.types.User | None = event_data.get("event_from_user")
+
+        self._strings.set_language_code(
+            language_code=current_user.language_code if current_user else None,
+        )
+
+        return await handler(event, event_data)
+
+    # endregion
+
     # region Handlers
 
     async def error_handler(self, event: aiogram.types.ErrorEvent) -> None:
         self._logger.log_exception(event.exception)
 
     async def startup_handler(self) -> None:
-        await self._bot.set_my_commands(
-            commands=self._COMMANDS,
-            scope=aiogram.types.BotCommandScopeDefault(),
-        )
+        if self._config.metrics.enabled:
+            await self._metrics.start()
 
+        self._logger.info(f"database schema versions: {self._database.get_schema_versions()}")
         self._logger.info(f"{self.name} started!")
 
     async def shutdown_handler(self) -> None:
+        await self._metrics.stop()
         self._database.close_all()
 
         self._logger.info(f"{self.name} terminated")
+        self._logger.stop_listener()
 
     async def start_handler(self, message: aiogram.types.Message, command: aiogram.filters.CommandObject) -> None:
         self._logger.log_user_interaction(
             user=message.from_user,
             interaction=command.text,
+            handler=self.start_handler.__name__,
         )
 
         self._database.users.add_user(
@@ -376,7 +698,7 @@ class AiogramClient(aiogram.Dispatcher):
         markup_builder.row(self._buttons.add_funds)
         markup_builder.row(
             self._buttons.invite_friend(
-                bot_username=(await self.user).username,
+                bot_username=self.user.username,
                 tg_id=current_user.tg_id,
             ),
         )
@@ -386,7 +708,7 @@ class AiogramClient(aiogram.Dispatcher):
             chat_id=message.chat.id,
             message_thread_id=self._get_message_thread_id(message),
             text=self._strings.menu.start(
-                bot_full_name=(await self.user).full_name,
+                bot_full_name=self.user.full_name,
             ),
             reply_markup=markup_builder.as_markup(),
         )
@@ -401,6 +723,7 @@ class AiogramClient(aiogram.Dispatcher):
         self._logger.log_user_interaction(
             user=message.from_user,
             interaction=f"{command.text} ({is_admin=})",
+            handler=self.admin_handler.__name__,
         )
 
         if is_admin:
@@ -422,8 +745,11 @@ class AiogramClient(aiogram.Dispatcher):
         self._logger.log_user_interaction(
             user=call.from_user,
             interaction=call.data,
+            handler=self.callback_handler.__name__,
         )
 
+        current_timestamp = self._clock.timestamp()
+
         await state.clear()
 
         self._database.users.add_user(
@@ -447,7 +773,7 @@ class AiogramClient(aiogram.Dispatcher):
                     markup_builder.row(self._buttons.add_funds)
                     markup_builder.row(
                         self._buttons.invite_friend(
-                            bot_username=(await self.user).username,
+                            bot_username=self.user.username,
                             tg_id=current_user.tg_id,
                         ),
                     )
@@ -457,7 +783,7 @@ class AiogramClient(aiogram.Dispatcher):
                         chat_id=call.message.chat.id,
                         message_id=call.message.message_id,
                         text=self._strings.menu.start(
-                            bot_full_name=(await self.user).full_name,
+                            bot_full_name=self.user.full_name,
                         ),
                         reply_markup=markup_builder.as_markup(),
                     )
@@ -493,8 +819,9 @@ class AiogramClient(aiogram.Dispatcher):
                 case ["subscriptions", _current_page_id]:
                     current_page_id = int(_current_page_id)
 
-                    current_subscriptions = self._database.subscriptions.get_user_active_subscriptions(
+                    current_subscriptions = self._database.subscriptions.get_user_active_subscriptions_labels(
                         tg_id=current_user.tg_id,
+                        timestamp=current_timestamp,
                     )
 
                     if current_subscriptions:
@@ -537,8 +864,9 @@ class AiogramClient(aiogram.Dispatcher):
                         ),
                     )
 
-                    current_subscriptions = self._database.subscriptions.get_user_active_subscriptions(
+                    current_subscriptions_count = self._database.subscriptions.get_user_active_subscriptions_count(
                         tg_id=current_user.tg_id,
+                        timestamp=current_timestamp,
                     )
 
                     markup_builder = aiogram.utils.keyboard.InlineKeyboardBuilder()
@@ -551,7 +879,7 @@ class AiogramClient(aiogram.Dispatcher):
                             user=current_user,
                             referrer_model=current_referrer_model,
                             referrer_user=current_referrer_user,
-                            subscriptions_count=len(current_subscriptions),
+                            subscriptions_count=current_subscriptions_count,
                             friends_count=self._database.users.get_ref_count(
                                 tg_id=current_user.tg_id,
                             ),
@@ -587,55 +915,67 @@ class AiogramClient(aiogram.Dispatcher):
                     )
 
                     if current_plan.cost <= current_user.balance:
-                        current_configs = self._database.config.get_available_configs()
+                        current_config_id = self._config_pool.claim()
 
-                        if current_configs:
-                            current_subscriptions = self._database.subscriptions.get_user_active_subscriptions(
+                        if current_config_id:
+                            current_subscriptions_count = self._database.subscriptions.get_user_active_subscriptions_count(
                                 tg_id=current_user.tg_id,
+                                timestamp=current_timestamp,
                             )
 
-                            if len(current_subscriptions) < self._config.payments.max_subscriptions:
-                                current_config = current_configs[0]
-
-                                self._database.users.reduce_balance(
-                                    tg_id=current_user.tg_id,
-                                    amount=current_plan.cost,
-                                )
-                                datetime_subscribed = datetime.datetime.now()
-
-                                self._database.payments.add_payment(
-                                    provider_id=None,
-                                    amount=-current_plan.cost,
-                                    currency=self._config.payments.currency,
-                                    payload=call.data,
-                                    date=int(datetime_subscribed.timestamp()),
-                                    tg_id=current_user.tg_id,
-                                )
+                            if current_subscriptions_count < self._config.payments.max_subscriptions:
+                                try:
+                                    self._database.users.reduce_balance(
+                                        tg_id=current_user.tg_id,
+                                        amount=current_plan.cost,
+                                        kind=models.LedgerEntryType.PURCHASE,
+                                        date=current_timestamp,
+                                        reference=call.data,
+                                    )
+                                    datetime_subscribed = datetime.datetime.fromtimestamp(current_timestamp)
+
+                                    self._database.payments.add_payment(
+                                        provider_id=None,
+                                        amount=-current_plan.cost,
+                                        currency=self._config.payments.currency,
+                                        payload=call.data,
+                                        date=int(datetime_subscribed.timestamp()),
+                                        tg_id=current_user.tg_id,
+                                    )
 
-                                current_subscription = self._database.subscriptions.add_subscription(
-                                    plan_id=current_plan_id,
-                                    is_active=True,
-                                    is_checked=False,
-                                    subscribed_at=int(datetime_subscribed.timestamp()),
-                                    expires_at=int(
-                                        (datetime_subscribed + datetime.timedelta(
-                                            days=current_plan.days,
-                                        )).timestamp()
-                                    ),
-                                    tg_id=current_user.tg_id,
-                                    config_id=current_config.id,
-                                )
+                                    current_subscription = self._database.subscriptions.add_subscription(
+                                        plan_id=current_plan_id,
+                                        is_active=True,
+                                        is_checked=False,
+                                        subscribed_at=int(datetime_subscribed.timestamp()),
+                                        expires_at=int(
+                                            (datetime_subscribed + datetime.timedelta(
+                                                days=current_plan.days,
+                                            )).timestamp()
+                                        ),
+                                        tg_id=current_user.tg_id,
+                                        config_id=current_config_id,
+                                    )
 
-                                self._database.config.attach_subscription(
-                                    config_id=current_config.id,
-                                    subscription_id=current_subscription.id,
-                                )
+                                    self._database.config.attach_subscription(
+                                        config_id=current_config_id,
+                                        subscription_id=current_subscription.id,
+                                    )
+                                except:
+                                    self._config_pool.release(
+                                        config_id=current_config_id,
+                                    )
+                                    raise
 
                                 await self.subscription_config_file(
                                     call=call,
                                     subscription_id=current_subscription.id,
                                 )
                             else:
+                                self._config_pool.release(
+                                    config_id=current_config_id,
+                                )
+
                                 await self._bot.answer_callback_query(
                                     callback_query_id=call.id,
                                     text=self._strings.alert.plan_subscribe_limit,
@@ -677,6 +1017,7 @@ class AiogramClient(aiogram.Dispatcher):
                 case ["add_funds_enter"]:
                     if current_user.balance + self._data.plans.minimum_plan.cost <= self._get_max_balance(
                             tg_id=current_user.tg_id,
+                            timestamp=current_timestamp,
                     ):
                         markup_builder = aiogram.utils.keyboard.InlineKeyboardBuilder()
                         markup_builder.row(self._buttons.back_to_add_funds)
@@ -686,7 +1027,10 @@ class AiogramClient(aiogram.Dispatcher):
                             message_id=call.message.message_id,
                             text=self._strings.menu.add_funds_enter(
                                 min_amount=self._data.plans.minimum_plan.cost,
-                                max_amount=self._get_max_balance(tg_id=current_user.tg_id) - current_user.balance,
+                                max_amount=self._get_max_balance(
+                                    tg_id=current_user.tg_id,
+                                    timestamp=current_timestamp,
+                                ) - current_user.balance,
                             ),
                             reply_markup=markup_builder.as_markup(),
                         )
@@ -701,7 +1045,10 @@ class AiogramClient(aiogram.Dispatcher):
                 case ["add_funds", _amount]:
                     amount = int(_amount)
 
-                    if current_user.balance + amount <= self._get_max_balance(tg_id=current_user.tg_id):
+                    if current_user.balance + amount <= self._get_max_balance(
+                            tg_id=current_user.tg_id,
+                            timestamp=current_timestamp,
+                    ):
                         try:
                             await self._bot.delete_message(
                                 chat_id=call.message.chat.id,
@@ -755,16 +1102,28 @@ class AiogramClient(aiogram.Dispatcher):
                         message_id=call.message.message_id,
                         text=self._strings.menu.subscription(
                             subscription=current_subscription,
+                            timestamp=current_timestamp,
                         ),
                         reply_markup=markup_builder.as_markup(),
                     )
                 case ["subscription_config_file" | "subscription_config_copy", _current_subscription_id]:
                     current_subscription_id = int(_current_subscription_id)
-
-                    await getattr(self, call.data.split()[0])(
-                        call=call,
+                    current_subscription = self._database.subscriptions.get_subscription(
                         subscription_id=current_subscription_id,
                     )
+                    is_owned = current_subscription and current_subscription.tg_id == current_user.tg_id
+
+                    if is_owned and not current_subscription.is_expired(current_timestamp):
+                        await getattr(self, call.data.split()[0])(
+                            call=call,
+                            subscription_id=current_subscription_id,
+                        )
+                    else:
+                        await self._bot.answer_callback_query(
+                            callback_query_id=call.id,
+                            text=self._strings.alert.button_unavailable,
+                            show_alert=True,
+                        )
                 # endregion
 
                 # region view_*
@@ -799,7 +1158,7 @@ class AiogramClient(aiogram.Dispatcher):
                             case ["admin_users", _current_page_id]:
                                 current_page_id = int(_current_page_id)
 
-                                current_users = self._database.users.get_all_users()
+                                current_users = self._database.users.get_all_users_labels()
 
                                 if current_users:
                                     page_enter_button, page_items, page_buttons = self._buttons.get_page_buttons(
@@ -850,8 +1209,9 @@ class AiogramClient(aiogram.Dispatcher):
                                     ),
                                 )
 
-                                current_subscriptions = self._database.subscriptions.get_user_active_subscriptions(
+                                current_subscriptions_count = self._database.subscriptions.get_user_active_subscriptions_count(
                                     tg_id=current_user.tg_id,
+                                    timestamp=current_timestamp,
                                 )
 
                                 markup_builder = aiogram.utils.keyboard.InlineKeyboardBuilder()
@@ -870,6 +1230,11 @@ class AiogramClient(aiogram.Dispatcher):
                                         tg_id=current_user.tg_id,
                                     ),
                                 )
+                                markup_builder.row(
+                                    self._buttons.admin_user_referrals(
+                                        tg_id=current_user.tg_id,
+                                    ),
+                                )
                                 if referrer_user:
                                     markup_builder.row(
                                         self._buttons.admin_user_referrer(
@@ -885,13 +1250,38 @@ class AiogramClient(aiogram.Dispatcher):
                                         user=current_user,
                                         referrer_model=current_referrer_model,
                                         referrer_user=referrer_user,
-                                        subscriptions_count=len(current_subscriptions),
+                                        subscriptions_count=current_subscriptions_count,
                                         friends_count=self._database.users.get_ref_count(
                                             tg_id=current_user.tg_id,
                                         ),
                                     ),
                                     reply_markup=markup_builder.as_markup(),
                                 )
+                            case ["admin_user_referrals", _current_user_id]:
+                                current_user_id = int(_current_user_id)
+
+                                current_referrals = self._database.users.get_referral_tree(
+                                    tg_id=current_user_id,
+                                    max_depth=constants.REFERRAL_TREE_DEPTH,
+                                    limit=constants.REFERRAL_TREE_LIMIT,
+                                )
+
+                                markup_builder = aiogram.utils.keyboard.InlineKeyboardBuilder()
+                                markup_builder.row(
+                                    self._buttons.admin_user(
+                                        tg_id=current_user_id,
+                                    ),
+                                )
+                                markup_builder.row(self._buttons.back_to_admin)
+
+                                await self._bot.edit_message_text(
+                                    chat_id=call.message.chat.id,
+                                    message_id=call.message.message_id,
+                                    text=self._strings.menu.admin_user_referrals(
+                                        referrals=current_referrals,
+                                    ),
+                                    reply_markup=markup_builder.as_markup(),
+                                )
                             case ["admin_user_balance_enter", _current_user_id]:
                                 current_user_id = int(_current_user_id)
 
@@ -909,6 +1299,7 @@ class AiogramClient(aiogram.Dispatcher):
                                         current_user=current_user,
                                         max_balance=self._get_max_balance(
                                             tg_id=current_user.tg_id,
+                                            timestamp=current_timestamp,
                                         ),
                                     ),
                                     reply_markup=markup_builder.as_markup(),
@@ -923,7 +1314,7 @@ class AiogramClient(aiogram.Dispatcher):
                             case ["admin_configs", _current_page_id]:
                                 current_page_id = int(_current_page_id)
 
-                                current_configs = self._database.config.get_all_configs()
+                                current_configs = self._database.config.get_all_configs_labels()
 
                                 page_enter_button, page_items, page_buttons = self._buttons.get_page_buttons(
                                     page="admin_configs",
@@ -999,12 +1390,15 @@ class AiogramClient(aiogram.Dispatcher):
                                 current_config = self._database.config.get_config(
                                     config_id=current_config_id,
                                 )
+                                current_config_data = self._database.config.get_config_data(
+                                    config_id=current_config_id,
+                                )
 
                                 await self._bot.send_document(
                                     chat_id=call.message.chat.id,
                                     message_thread_id=self._get_message_thread_id(call.message),
                                     document=aiogram.types.BufferedInputFile(
-                                        file=current_config.data.encode(),
+                                        file=current_config_data.encode(),
                                         filename=".".join([
                                             current_config.name,
                                             self._config.settings.config_extension,
@@ -1019,9 +1413,9 @@ class AiogramClient(aiogram.Dispatcher):
                                 current_page_id = int(_current_page_id)
                                 current_user_id = int(_current_user_id[0]) if _current_user_id else None
 
-                                current_subscriptions = self._database.subscriptions.get_user_subscriptions(
+                                current_subscriptions = self._database.subscriptions.get_user_subscriptions_labels(
                                     tg_id=current_user_id,
-                                ) if current_user_id else self._database.subscriptions.get_all_subscriptions()
+                                ) if current_user_id else self._database.subscriptions.get_all_subscriptions_labels()
 
                                 if current_subscriptions:
                                     subscription: models.SubscriptionValues
@@ -1064,7 +1458,7 @@ class AiogramClient(aiogram.Dispatcher):
                                 if "admin_subscription_expire" in call.data.split():
                                     self._database.subscriptions.edit_expires_at(
                                         subscription_id=current_subscription_id,
-                                        expires_at=int(datetime.datetime.now().timestamp()),
+                                        expires_at=current_timestamp,
                                     )
                                     self._database.subscriptions.switch_checked(
                                         subscription_id=current_subscription_id,
@@ -1079,7 +1473,7 @@ class AiogramClient(aiogram.Dispatcher):
                                 )
 
                                 markup_builder = aiogram.utils.keyboard.InlineKeyboardBuilder()
-                                if not current_subscription.is_expired:
+                                if not current_subscription.is_expired(current_timestamp):
                                     markup_builder.row(
                                         self._buttons.subscription_config(
                                             subscription_id=current_subscription.id,
@@ -1107,6 +1501,7 @@ class AiogramClient(aiogram.Dispatcher):
                                     message_id=call.message.message_id,
                                     text=self._strings.menu.subscription(
                                         subscription=current_subscription,
+                                        timestamp=current_timestamp,
                                         user=current_user,
                                         include_checked=True,
                                     ),
@@ -1120,9 +1515,9 @@ class AiogramClient(aiogram.Dispatcher):
                                 current_page_id = int(_current_page_id)
                                 current_user_id = int(_current_user_id[0]) if _current_user_id else None
 
-                                current_payments = self._database.payments.get_user_payments(
+                                current_payments = self._database.payments.get_user_payments_labels(
                                     tg_id=current_user_id,
-                                ) if current_user_id else self._database.payments.get_all_payments()
+                                ) if current_user_id else self._database.payments.get_all_payments_labels()
 
                                 if current_payments:
                                     payment: models.PaymentValues
@@ -1201,33 +1596,112 @@ class AiogramClient(aiogram.Dispatcher):
                                 )
 
                                 await state.set_state(getattr(self._states, call.data))
+                            case [
+                                "admin_logs" | "admin_logs_tail" | "admin_logs_range" | "admin_logs_export",
+                                *_,
+                            ] if not self._config.settings.file_logging:
+                                await self._bot.answer_callback_query(
+                                    callback_query_id=call.id,
+                                    text=self._strings.alert.admin_logs_unavailable,
+                                    show_alert=True,
+                                )
                             case ["admin_logs"]:
-                                if self._config.settings.file_logging:
-                                    logs_file = self._logger.get_logs_file()
+                                current_logs_paths = self._logger.get_logs_paths()[:constants.ITEMS_PER_PAGE]
+
+                                markup_builder = aiogram.utils.keyboard.InlineKeyboardBuilder()
+                                markup_builder.row(self._buttons.admin_logs_tail)
+                                markup_builder.row(self._buttons.admin_logs_range_hour, self._buttons.admin_logs_range_day)
+                                markup_builder.row(
+                                    *[
+                                        self._buttons.admin_logs_export(
+                                            logs_file_name=os.path.basename(logs_path),
+                                        ) for logs_path in current_logs_paths
+                                    ],
+                                    width=constants.ITEMS_PER_ROW,
+                                )
+                                markup_builder.row(self._buttons.back_to_admin)
+
+                                await self._bot.edit_message_text(
+                                    chat_id=call.message.chat.id,
+                                    message_id=call.message.message_id,
+                                    text=self._strings.menu.admin_logs(
+                                        logs_files=[
+                                            (
+                                                os.path.basename(logs_path),
+                                                os.path.getsize(logs_path),
+                                            ) for logs_path in current_logs_paths
+                                        ],
+                                    ),
+                                    reply_markup=markup_builder.as_markup(),
+                                )
+                            case ["admin_logs_tail" | "admin_logs_range", *_current_seconds] if len(_current_seconds) <= 1:
+                                if "admin_logs_range" in call.data.split():
+                                    current_logs = await asyncio.to_thread(
+                                        self._logger.get_logs_since,
+                                        date=datetime.datetime.fromtimestamp(current_timestamp - int(_current_seconds[0])),
+                                        max_size=constants.LOGS_MAX_SIZE,
+                                    )
+                                else:
+                                    current_logs = await asyncio.to_thread(
+                                        self._logger.get_logs_tail,
+                                        lines_count=constants.LOGS_TAIL_LINES,
+                                    )
 
+                                if current_logs:
                                     await self._bot.send_document(
                                         chat_id=call.message.chat.id,
                                         message_thread_id=self._get_message_thread_id(call.message),
                                         document=aiogram.types.BufferedInputFile(
-                                            file=logs_file.read(),
-                                            filename=logs_file.name,
+                                            file=current_logs,
+                                            filename=os.path.basename(self._logger.logs_path),
                                         ),
                                     )
+                                else:
+                                    await self._bot.answer_callback_query(
+                                        callback_query_id=call.id,
+                                        text=self._strings.alert.admin_logs_empty,
+                                        show_alert=True,
+                                    )
+                            case ["admin_logs_export", _current_logs_file_name]:
+                                current_logs_path = next(
+                                    (
+                                        logs_path for logs_path in self._logger.get_logs_paths()
+                                        if os.path.basename(logs_path) == _current_logs_file_name
+                                    ),
+                                    None,
+                                )
+
+                                if current_logs_path:
+                                    current_export_path = await asyncio.to_thread(
+                                        self._logger.export_logs,
+                                        path=current_logs_path,
+                                    )
 
-                                    logs_file.close()
+                                    try:
+                                        await self._bot.send_document(
+                                            chat_id=call.message.chat.id,
+                                            message_thread_id=self._get_message_thread_id(call.message),
+                                            document=aiogram.types.FSInputFile(
+                                                path=current_export_path,
+                                                filename=f"{os.path.basename(current_logs_path)}.gz",
+                                            ),
+                                        )
+                                    finally:
+                                        os.remove(current_export_path)
                                 else:
                                     await self._bot.answer_callback_query(
                                         callback_query_id=call.id,
-                                        text=self._strings.alert.admin_logs_unavailable,
+                                        text=self._strings.alert.admin_logs_file_unavailable,
                                         show_alert=True,
                                     )
                             case ["admin_settings"]:
-                                current_users = self._database.users.get_all_users()
-                                current_configs = self._database.config.get_all_configs()
-                                current_subscriptions = self._database.subscriptions.get_all_subscriptions()
-                                current_payments = self._database.payments.get_all_payments()
+                                current_users_count = self._database.users.get_users_count()
+                                current_configs_count = self._database.config.get_configs_count()
+                                current_subscriptions_count = self._database.subscriptions.get_subscriptions_count()
+                                current_payments_count = self._database.payments.get_payments_count()
 
                                 markup_builder = aiogram.utils.keyboard.InlineKeyboardBuilder()
+                                markup_builder.row(self._buttons.admin_settings_queries)
                                 markup_builder.row(self._buttons.admin_settings_stop)
                                 markup_builder.row(self._buttons.back_to_admin)
 
@@ -1235,15 +1709,39 @@ class AiogramClient(aiogram.Dispatcher):
                                     chat_id=call.message.chat.id,
                                     message_id=call.message.message_id,
                                     text=self._strings.menu.admin_settings(
-                                        bot=(await self.user),
-                                        users_count=len(current_users),
-                                        configs_count=len(current_configs),
-                                        subscriptions_count=len(current_subscriptions),
-                                        payments_count=len(current_payments),
+                                        bot=self.user,
+                                        users_count=current_users_count,
+                                        configs_count=current_configs_count,
+                                        subscriptions_count=current_subscriptions_count,
+                                        payments_count=current_payments_count,
                                         date_started=self._date_started,
                                     ),
                                     reply_markup=markup_builder.as_markup(),
                                 )
+                            case [
+                                "admin_settings_queries" | "admin_settings_queries_reset",
+                            ] if not self._database.profiler:
+                                await self._bot.answer_callback_query(
+                                    callback_query_id=call.id,
+                                    text=self._strings.alert.admin_queries_unavailable,
+                                    show_alert=True,
+                                )
+                            case ["admin_settings_queries" | "admin_settings_queries_reset"]:
+                                if call.data == "admin_settings_queries_reset":
+                                    self._database.profiler.reset()
+
+                                markup_builder = aiogram.utils.keyboard.InlineKeyboardBuilder()
+                                markup_builder.row(self._buttons.admin_settings_queries_reset)
+                                markup_builder.row(self._buttons.admin_settings)
+
+                                await self._bot.edit_message_text(
+                                    chat_id=call.message.chat.id,
+                                    message_id=call.message.message_id,
+                                    text=self._strings.menu.admin_queries(
+                                        statistics=self._database.profiler.get_statistics()[:constants.ITEMS_PER_PAGE],
+                                    ),
+                                    reply_markup=markup_builder.as_markup(),
+                                )
                             case ["admin_settings_stop"]:
                                 await self.terminate_polling()
                             case _:
@@ -1274,8 +1772,11 @@ class AiogramClient(aiogram.Dispatcher):
         self._logger.log_user_interaction(
             user=pre_checkout_query.from_user,
             interaction=f"{self.pre_add_funds_handler.__name__} ({amount=})",
+            handler=self.pre_add_funds_handler.__name__,
         )
 
+        current_timestamp = self._clock.timestamp()
+
         self._database.users.add_user(
             tg_id=pre_checkout_query.from_user.id,
             tg_username=pre_checkout_query.from_user.username,
@@ -1290,19 +1791,26 @@ class AiogramClient(aiogram.Dispatcher):
         await pre_checkout_query.answer(
             ok=self._data.plans.minimum_plan.cost <= current_user.balance + amount <= self._get_max_balance(
                 tg_id=current_user.tg_id,
+                timestamp=current_timestamp,
             ),
             error_message=self._strings.alert.add_funds_unavailable,
         )
 
     async def success_add_funds_handler(self, message: aiogram.types.Message) -> None:
         amount = int(message.successful_payment.total_amount / self._config.payments.currency_multiplier)
-        successful_payment_date = int(datetime.datetime.now().timestamp())
+        successful_payment_date = self._clock.timestamp()
 
         self._logger.log_user_interaction(
             user=message.from_user,
             interaction=f"{self.success_add_funds_handler.__name__} ({amount=})",
+            handler=self.success_add_funds_handler.__name__,
         )
 
+        if self._database.payments.check_provider_payment(
+                provider_id=message.successful_payment.provider_payment_charge_id,
+        ):
+            return
+
         current_user = self._database.users.get_user(
             tg_id=message.from_user.id,
         )
@@ -1315,20 +1823,6 @@ class AiogramClient(aiogram.Dispatcher):
             tg_id=current_user.tg_id,
         )
 
-        self._database.payments.add_payment(
-            provider_id=message.successful_payment.provider_payment_charge_id,
-            amount=amount,
-            currency=message.successful_payment.currency,
-            payload=message.successful_payment.invoice_payload,
-            date=successful_payment_date,
-            tg_id=current_user.tg_id,
-        )
-
-        self._database.users.add_balance(
-            tg_id=current_user.tg_id,
-            amount=amount
-        )
-
         if referrer_user:
             referrer_model = self._config.referral.get_referrer_model(
                 referrer=self._data.referrers.get_referrer_by_id(
@@ -1339,21 +1833,26 @@ class AiogramClient(aiogram.Dispatcher):
             referrer_multiplier = referrer_model.get_referrer_multiplier(is_first_payment)
 
             referrer_bonus_amount = int(amount * referrer_multiplier)
+        else:
+            referrer_multiplier = float()
+            referrer_bonus_amount = int()
 
-            self._database.payments.add_payment(
-                provider_id=None,
-                amount=referrer_bonus_amount,
-                currency=self._config.payments.currency,
-                payload=f"referral {current_user.tg_id} {amount} ({is_first_payment=})",
-                date=successful_payment_date,
-                tg_id=referrer_user.tg_id,
-            )
+        is_processed = self._database.payments.add_successful_payment(
+            provider_id=message.successful_payment.provider_payment_charge_id,
+            amount=amount,
+            currency=message.successful_payment.currency,
+            payload=message.successful_payment.invoice_payload,
+            date=successful_payment_date,
+            tg_id=current_user.tg_id,
+            referrer_id=referrer_user.tg_id if referrer_user else None,
+            referrer_amount=referrer_bonus_amount,
+            referrer_payload=f"referral {current_user.tg_id} {amount} ({is_first_payment=})",
+        )
 
-            self._database.users.add_balance(
-                tg_id=referrer_user.tg_id,
-                amount=referrer_bonus_amount,
-            )
+        if not is_processed:
+            return
 
+        if referrer_user:
             try:
                 markup_builder = aiogram.utils.keyboard.InlineKeyboardBuilder()
                 markup_builder.row(self._buttons.view_start)
@@ -1399,8 +1898,11 @@ class AiogramClient(aiogram.Dispatcher):
         self._logger.log_user_interaction(
             user=message.from_user,
             interaction=f"{self.add_funds_enter_handler.__name__} ({_amount=})",
+            handler=self.add_funds_enter_handler.__name__,
         )
 
+        current_timestamp = self._clock.timestamp()
+
         self._database.users.add_user(
             tg_id=message.from_user.id,
             tg_username=message.from_user.username,
@@ -1417,6 +1919,7 @@ class AiogramClient(aiogram.Dispatcher):
 
             if self._data.plans.minimum_plan.cost <= current_user.balance + amount <= self._get_max_balance(
                     tg_id=current_user.tg_id,
+                    timestamp=current_timestamp,
             ):
                 await self.add_funds_invoice(
                     message=message,
@@ -1436,7 +1939,10 @@ class AiogramClient(aiogram.Dispatcher):
                 message_thread_id=self._get_message_thread_id(message),
                 text=self._strings.menu.add_funds_enter(
                     min_amount=self._data.plans.minimum_plan.cost,
-                    max_amount=self._get_max_balance(tg_id=current_user.tg_id) - current_user.balance,
+                    max_amount=self._get_max_balance(
+                        tg_id=current_user.tg_id,
+                        timestamp=current_timestamp,
+                    ) - current_user.balance,
                     error=True,
                 ),
                 reply_markup=markup_builder.as_markup(),
@@ -1453,8 +1959,11 @@ class AiogramClient(aiogram.Dispatcher):
         self._logger.log_user_interaction(
             user=message.from_user,
             interaction=f"{self.admin_user_balance_enter_handler.__name__} ({current_user_id=}, {_amount=})",
+            handler=self.admin_user_balance_enter_handler.__name__,
         )
 
+        current_timestamp = self._clock.timestamp()
+
         current_user = self._database.users.get_user(
             tg_id=current_user_id,
         )
@@ -1465,6 +1974,7 @@ class AiogramClient(aiogram.Dispatcher):
             self._database.users.edit_balance(
                 tg_id=current_user.tg_id,
                 balance=amount,
+                date=current_timestamp,
             )
 
             current_user = self._database.users.get_user(
@@ -1495,6 +2005,7 @@ class AiogramClient(aiogram.Dispatcher):
                     current_user=current_user,
                     max_balance=self._get_max_balance(
                         tg_id=current_user.tg_id,
+                        timestamp=current_timestamp,
                     ),
                     error=True,
                 ),
@@ -1508,6 +2019,7 @@ class AiogramClient(aiogram.Dispatcher):
         self._logger.log_user_interaction(
             user=message.from_user,
             interaction=self.admin_config_add_handler.__name__,
+            handler=self.admin_config_add_handler.__name__,
         )
 
         try:
@@ -1518,27 +2030,27 @@ class AiogramClient(aiogram.Dispatcher):
                                     file_id=message.document.file_id,
                                 )
                         ).file_path,
-                ) as current_config:
+                ) as current_file:
                     _filename_list = message.document.file_name.split(".")
                     current_config_name = ".".join(_filename_list[:-1])
                     current_config_extension = _filename_list[-1]
 
-                    if not self._database.config.check_config_name(
-                            name=current_config_name,
-                    ):
-                        raise Exception()
+                    markup_builder = aiogram.utils.keyboard.InlineKeyboardBuilder()
+                    markup_builder.row(self._buttons.admin_configs_add)
+                    markup_builder.row(self._buttons.back_to_admin)
 
                     if current_config_extension == self._config.settings.config_extension:
+                        if not self._database.config.check_config_name(
+                                name=current_config_name,
+                        ):
+                            raise Exception()
+
                         self._database.config.add_config(
                             name=current_config_name,
-                            data=current_config.read().decode(),
+                            data=current_file.read().decode(),
                             subscription_id=None,
                         )
 
-                        markup_builder = aiogram.utils.keyboard.InlineKeyboardBuilder()
-                        markup_builder.row(self._buttons.admin_configs_add)
-                        markup_builder.row(self._buttons.back_to_admin)
-
                         await self._bot.send_message(
                             chat_id=message.chat.id,
                             message_thread_id=self._get_message_thread_id(message),
@@ -1546,7 +2058,21 @@ class AiogramClient(aiogram.Dispatcher):
                             reply_markup=markup_builder.as_markup(),
                         )
                     else:
-                        raise Exception()
+                        current_results = await asyncio.to_thread(
+                            self.import_configs,
+                            archive=current_file,
+                        )
+
+                        self._logger.info(f"{self.import_configs.__name__} ({len(current_results)=})")
+
+                        await self._bot.send_message(
+                            chat_id=message.chat.id,
+                            message_thread_id=self._get_message_thread_id(message),
+                            text=self._strings.menu.admin_configs_import(
+                                results=current_results,
+                            ),
+                            reply_markup=markup_builder.as_markup(),
+                        )
             else:
                 raise Exception()
         except:
@@ -1573,8 +2099,11 @@ class AiogramClient(aiogram.Dispatcher):
         self._logger.log_user_interaction(
             user=message.from_user,
             interaction=f"{self.admin_page_enter_handler.__name__} ({current_state=}, {_element_id=})",
+            handler=self.admin_page_enter_handler.__name__,
         )
 
+        current_timestamp = self._clock.timestamp()
+
         try:
             match current_state:
                 case self._states.admin_users_enter:
@@ -1594,8 +2123,9 @@ class AiogramClient(aiogram.Dispatcher):
                         ),
                     )
 
-                    current_subscriptions = self._database.subscriptions.get_user_active_subscriptions(
+                    current_subscriptions_count = self._database.subscriptions.get_user_active_subscriptions_count(
                         tg_id=current_user.tg_id,
+                        timestamp=current_timestamp,
                     )
 
                     markup_builder = aiogram.utils.keyboard.InlineKeyboardBuilder()
@@ -1629,7 +2159,7 @@ class AiogramClient(aiogram.Dispatcher):
                             user=current_user,
                             referrer_model=current_referrer_model,
                             referrer_user=referrer_user,
-                            subscriptions_count=len(current_subscriptions),
+                            subscriptions_count=current_subscriptions_count,
                             friends_count=self._database.users.get_ref_count(
                                 tg_id=current_user.tg_id,
                             ),
@@ -1677,7 +2207,7 @@ class AiogramClient(aiogram.Dispatcher):
                     )
 
                     markup_builder = aiogram.utils.keyboard.InlineKeyboardBuilder()
-                    if not current_subscription.is_expired:
+                    if not current_subscription.is_expired(current_timestamp):
                         markup_builder.row(
                             self._buttons.subscription_config(
                                 subscription_id=current_subscription.id,
@@ -1700,6 +2230,7 @@ class AiogramClient(aiogram.Dispatcher):
                         message_thread_id=self._get_message_thread_id(message),
                         text=self._strings.menu.subscription(
                             subscription=current_subscription,
+                            timestamp=current_timestamp,
                             user=current_user,
                             include_checked=True,
                         ),
@@ -4,3 +4,15 @@ ITEMS_PER_ROW = 1
 FIRST_PAGE_ID = 0
 MINIMUM_PLAN_ID = 0
 PLANS_PER_ROW = 2
+LOGS_TAIL_LINES = 200
+LOGS_MAX_SIZE = 50 * 1024 * 1024
+SECONDS_IN_HOUR = 3600
+SECONDS_IN_DAY = 86400
+BOT_IDENTITY_TTL = SECONDS_IN_DAY
+REFERRAL_TREE_DEPTH = 3
+REFERRAL_TREE_LIMIT = 30
+LEDGER_SNAPSHOT_INTERVAL = SECONDS_IN_DAY
+CONFIG_RECYCLE_INTERVAL = SECONDS_IN_HOUR
+WORKER_CLAIM_TTL = SECONDS_IN_HOUR
+CONFIG_MAX_SIZE = 64 * 1024
+CONFIGS_IMPORT_REPORT_SIZE = 50
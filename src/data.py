@@ -1,8 +1,12 @@
 from __future__ import annotations
-import datetime
+import abc, asyncio, datetime, contextvars, threading, json, os, re, logging, logging.handlers, typing, queue, \
+    functools, time, random, bisect, sqlite3, collections, html, hashlib, zlib
 import aiogram, aiogram.types
 import pyquoks.data, pyquoks.utils
-import models, utils
+import models, constants, utils
+
+if typing.TYPE_CHECKING:
+    import aiohttp.web
 
 
 # region Providers
@@ -15,8 +19,46 @@ class DataProvider(pyquoks.data.IDataProvider):
     plans: models.PlansContainer
     referrers: models.ReferrersContainer
 
+    @classmethod
+    @functools.cache
+    def get_instance(cls) -> DataProvider:
+        return cls()
+
 
 class ConfigProvider(pyquoks.data.IConfigProvider):
+    class ConfigPoolConfig(pyquoks.data.IConfigProvider.IConfig):
+        _SECTION = "ConfigPool"
+        low_stock_threshold: int
+        recycle_batch_size: int
+        recycle_grace_period: int
+        recycle_without_rotation: bool
+        reservation_ttl: int
+        size: int
+
+    class DatabaseConfig(pyquoks.data.IConfigProvider.IConfig):
+        _SECTION = "Database"
+        backend: str
+        pool_max_size: int
+        pool_min_size: int
+        postgres_dsn: str
+        profiling: bool
+        slow_query_ms: int
+
+    class LoggingConfig(pyquoks.data.IConfigProvider.IConfig):
+        _SECTION = "Logging"
+        backup_count: int
+        max_bytes: int
+        queue_size: int
+        rotation_when: str
+        sample_rate: float
+        sampled_routes: list[str]
+
+    class MetricsConfig(pyquoks.data.IConfigProvider.IConfig):
+        _SECTION = "Metrics"
+        enabled: bool
+        host: str
+        port: int
+
     class PaymentsConfig(pyquoks.data.IConfigProvider.IConfig):
         _SECTION = "Payments"
         currency: str
@@ -26,7 +68,10 @@ class ConfigProvider(pyquoks.data.IConfigProvider):
         provider_token: str
 
         def get_amount_with_currency(self, amount: int) -> str:
-            return f"{amount} {self.currency}"
+            return utils.get_formatted_amount(
+                amount=amount,
+                currency=self.currency,
+            )
 
     class ReferralConfig(pyquoks.data.IConfigProvider.IConfig):
         _SECTION = "Referral"
@@ -61,6 +106,39 @@ class ConfigProvider(pyquoks.data.IConfigProvider):
             return tg_id in self.admin_list
 
     _CONFIG_VALUES = {
+        "ConfigPool":
+            {
+                "low_stock_threshold": int,
+                "recycle_batch_size": int,
+                "recycle_grace_period": int,
+                "recycle_without_rotation": bool,
+                "reservation_ttl": int,
+                "size": int,
+            },
+        "Database":
+            {
+                "backend": str,
+                "pool_max_size": int,
+                "pool_min_size": int,
+                "postgres_dsn": str,
+                "profiling": bool,
+                "slow_query_ms": int,
+            },
+        "Logging":
+            {
+                "backup_count": int,
+                "max_bytes": int,
+                "queue_size": int,
+                "rotation_when": str,
+                "sample_rate": float,
+                "sampled_routes": list,
+            },
+        "Metrics":
+            {
+                "enabled": bool,
+                "host": str,
+                "port": int,
+            },
         "Payments":
             {
                 "currency": str,
@@ -85,27 +163,149 @@ class ConfigProvider(pyquoks.data.IConfigProvider):
             },
     }
     _CONFIG_OBJECTS = {
+        "config_pool": ConfigPoolConfig,
+        "database": DatabaseConfig,
+        "logging": LoggingConfig,
+        "metrics": MetricsConfig,
         "payments": PaymentsConfig,
         "referral": ReferralConfig,
         "settings": SettingsConfig,
     }
+    config_pool: ConfigPoolConfig
+    database: DatabaseConfig
+    logging: LoggingConfig
+    metrics: MetricsConfig
     payments: PaymentsConfig
     referral: ReferralConfig
     settings: SettingsConfig
 
+    @classmethod
+    @functools.cache
+    def get_instance(cls) -> ConfigProvider:
+        return cls()
+
+
+class LocalesProvider:
+    _DEFAULT_LANGUAGE_CODE = "ru"
+    _PATH = pyquoks.utils.get_path("locales/")
+    _CATALOGS: dict[str, dict[str, dict[str, utils.Template]]] = dict()
+    _LANGUAGE_CODES: set[str] | None = None
+    _LANGUAGE_CODE = contextvars.ContextVar("language_code", default=_DEFAULT_LANGUAGE_CODE)
+    _LOCK = threading.RLock()
+
+    @property
+    def language_code(self) -> str:
+        return self._LANGUAGE_CODE.get()
+
+    @property
+    def language_codes(self) -> set[str]:
+        if LocalesProvider._LANGUAGE_CODES is None:
+            LocalesProvider._LANGUAGE_CODES = {
+                os.path.splitext(filename)[0] for filename in os.listdir(self._PATH) if filename.endswith(".json")
+            }
+        return LocalesProvider._LANGUAGE_CODES
+
+    def set_language_code(self, language_code: str | None) -> None:
+        language_code = language_code.split("-")[0].lower() if language_code else None
+
+        self._LANGUAGE_CODE.set(
+            language_code if language_code in self.language_codes else self._DEFAULT_LANGUAGE_CODE,
+        )
+
+    def _load_catalog(self, language_code: str) -> dict[str, dict[str, utils.Template]]:
+        with open(os.path.join(self._PATH, f"{language_code}.json"), encoding="utf-8") as catalog_file:
+            catalog_data = json.load(catalog_file)
+
+        catalog = {
+            section: dict(strings) for section, strings in self.get_catalog(
+                language_code=self._DEFAULT_LANGUAGE_CODE,
+            ).items()
+        } if language_code != self._DEFAULT_LANGUAGE_CODE else dict()
+
+        for section, strings in catalog_data.items():
+            catalog.setdefault(section, dict()).update(
+                {
+                    key: utils.Template(value) for key, value in strings.items()
+                }
+            )
+
+        return catalog
+
+    def get_catalog(self, language_code: str) -> dict[str, dict[str, utils.Template]]:
+        try:
+            return self._CATALOGS[language_code]
+        except KeyError:
+            with self._LOCK:
+                if language_code not in self._CATALOGS:
+                    self._CATALOGS[language_code] = self._load_catalog(
+                        language_code=language_code,
+                    )
+                return self._CATALOGS[language_code]
+
+    def render(self, section: str, key: str, **kwargs) -> str:
+        return self.get_catalog(self.language_code)[section][key].render(**kwargs)
+
+
+class IdentityProvider:
+    _PATH = pyquoks.utils.get_path("cache/identity.json")
+
+    def __init__(self, bot_token: str, ttl: int, clock: utils.Clock) -> None:
+        self._bot_id = bot_token.split(":")[0]
+        self._ttl = ttl
+        self._clock = clock
+
+    def load(self) -> aiogram.types.User | None:
+        try:
+            with open(self._PATH, encoding="utf-8") as identity_file:
+                identity_data = json.load(identity_file)
+        except (OSError, ValueError):
+            return None
+
+        if identity_data.get("bot_id") != self._bot_id:
+            return None
+
+        if self._clock.timestamp() - identity_data.get("cached_at", 0) >= self._ttl:
+            return None
+
+        try:
+            return aiogram.types.User.model_validate(identity_data["user"])
+        except (KeyError, ValueError):
+            return None
+
+    def save(self, user: aiogram.types.User) -> None:
+        os.makedirs(os.path.dirname(self._PATH), exist_ok=True)
+
+        with open(self._PATH, "w", encoding="utf-8") as identity_file:
+            json.dump(
+                {
+                    "bot_id": self._bot_id,
+                    "cached_at": self._clock.timestamp(),
+                    "user": user.model_dump(
+                        mode="json",
+                        exclude_none=True,
+                    ),
+                },
+                identity_file,
+                ensure_ascii=False,
+            )
+
 
 class StringsProvider(pyquoks.data.IStringsProvider):
     class AlertStrings(pyquoks.data.IStringsProvider.IStrings):
+        _SECTION = "alert"
+
+        def __init__(self):
+            self._locales = LocalesProvider()
 
         # region plans
 
         @property
-        def plan_subscribe_limit(self):
-            return "Достигнут лимит активных подписок!"
+        def plan_subscribe_limit(self) -> str:
+            return self._locales.render(self._SECTION, "plan_subscribe_limit")
 
         @property
-        def plan_subscribe_config_unavailable(self):
-            return "Доступные конфигурации отсутствуют!"
+        def plan_subscribe_config_unavailable(self) -> str:
+            return self._locales.render(self._SECTION, "plan_subscribe_config_unavailable")
 
         # endregion
 
@@ -113,11 +313,11 @@ class StringsProvider(pyquoks.data.IStringsProvider):
 
         @property
         def add_funds_enter_unavailable(self) -> str:
-            return "Сейчас вы не можете выбрать сумму пополнения!"
+            return self._locales.render(self._SECTION, "add_funds_enter_unavailable")
 
         @property
         def add_funds_unavailable(self) -> str:
-            return "Сумма пополнения выходит за доступные пределы!"
+            return self._locales.render(self._SECTION, "add_funds_unavailable")
 
         # endregion
 
@@ -125,7 +325,7 @@ class StringsProvider(pyquoks.data.IStringsProvider):
 
         @property
         def subscriptions_unavailable(self) -> str:
-            return "У вас нет активных подписок!"
+            return self._locales.render(self._SECTION, "subscriptions_unavailable")
 
         # endregion
 
@@ -133,60 +333,67 @@ class StringsProvider(pyquoks.data.IStringsProvider):
 
         @property
         def admin_users_unavailable(self) -> str:
-            return "Пользователи отсутствуют!"
+            return self._locales.render(self._SECTION, "admin_users_unavailable")
 
         @property
         def admin_subscriptions_unavailable(self) -> str:
-            return "Купленные подписки отсутствуют!"
+            return self._locales.render(self._SECTION, "admin_subscriptions_unavailable")
 
         @property
         def admin_payments_unavailable(self) -> str:
-            return "Совершённые платежи отсутствуют!"
+            return self._locales.render(self._SECTION, "admin_payments_unavailable")
 
         @property
         def admin_logs_unavailable(self) -> str:
-            return "Логирование отключено!"
+            return self._locales.render(self._SECTION, "admin_logs_unavailable")
+
+        @property
+        def admin_logs_empty(self) -> str:
+            return self._locales.render(self._SECTION, "admin_logs_empty")
+
+        @property
+        def admin_logs_file_unavailable(self) -> str:
+            return self._locales.render(self._SECTION, "admin_logs_file_unavailable")
+
+        @property
+        def admin_queries_unavailable(self) -> str:
+            return self._locales.render(self._SECTION, "admin_queries_unavailable")
 
         # endregion
 
         @property
         def button_unavailable(self) -> str:
-            return "Эта кнопка недоступна!"
+            return self._locales.render(self._SECTION, "button_unavailable")
 
     class MenuStrings(pyquoks.data.IStringsProvider.IStrings):
+        _SECTION = "menu"
+
         def __init__(self):
-            self._data = DataProvider()
-            self._config = ConfigProvider()
+            self._data = DataProvider.get_instance()
+            self._config = ConfigProvider.get_instance()
+            self._locales = LocalesProvider()
+            self._status = StringsProvider.StatusStrings()
 
         # region /start
 
-        @staticmethod
-        def start(bot_full_name: str) -> str:
-            return (
-                f"<b>Добро пожаловать в {bot_full_name}!</b>\n"
-                f"\n"
-                f"Благодарим за выбор нашего сервиса,\n"
-                f"ваша безопасность — наш приоритет!\n"
+        def start(self, bot_full_name: str) -> str:
+            return self._locales.render(
+                self._SECTION,
+                "start",
+                bot_full_name=bot_full_name,
             )
 
         @property
         def plans(self) -> str:
-            # (TEXT_PENDING)
-            return "<b>Выбор тарифа:</b>"
+            return self._locales.render(self._SECTION, "plans")
 
         @property
         def add_funds(self) -> str:
-            return (
-                "<b>Пополнение баланса:</b>\n"
-                "\n"
-                "Выберите нужную сумму для\n"
-                "пополнения или введите свою:\n"
-            )
+            return self._locales.render(self._SECTION, "add_funds")
 
         @property
         def subscriptions(self) -> str:
-            # (TEXT_PENDING)
-            return "<b>Выбор подписки:</b>"
+            return self._locales.render(self._SECTION, "subscriptions")
 
         def profile(
                 self,
@@ -196,43 +403,44 @@ class StringsProvider(pyquoks.data.IStringsProvider):
                 subscriptions_count: int,
                 friends_count: int,
         ) -> str:
-            return (
-                f"<b>Профиль {user.html_text}:</b>\n"
-                f"\n"
-                f"<b>Баланс: {self._config.payments.get_amount_with_currency(user.balance)}</b>\n"
-                f"Активных подписок: <b>{subscriptions_count}</b>\n"
-                f"Приглашено друзей: <b>{friends_count}</b>\n"
-                f"\n"
-                f"<b>Реферальные выплаты:</b>\n"
-                f"Первое пополнение: <b>{referrer_model.multiplier_first:.0%}</b>\n"
-                f"Следующие пополнения: <b>{referrer_model.multiplier_common:.0%}</b>\n"
-            ) + (
-                (
-                    f"\n"
-                    f"Пригласил: <b>{referrer_user.html_text}</b>\n"
-                ) if referrer_user else str()
-            )
+            return "".join([
+                self._locales.render(
+                    self._SECTION,
+                    "profile",
+                    user=user.html_text,
+                    balance=self._config.payments.get_amount_with_currency(user.balance),
+                    subscriptions_count=subscriptions_count,
+                    friends_count=friends_count,
+                    multiplier_first=referrer_model.multiplier_first,
+                    multiplier_common=referrer_model.multiplier_common,
+                ),
+                self._locales.render(
+                    self._SECTION,
+                    "profile_referrer",
+                    referrer=referrer_user.html_text,
+                ) if referrer_user else str(),
+            ])
 
         # endregion
 
         # region plans
 
         def plan(self, user: models.UserValues, plan: models.Plan) -> str:
-            return (
-                f"<b>Тариф «{plan.name}»:</b>\n"
-                f"{plan.description}\n"
-                f"\n"
-                f"Период подписки: <b>{plan.days} дней</b>\n"
-                f"\n"
-                f"<b>(Текущий баланс: {self._config.payments.get_amount_with_currency(user.balance)})</b>\n"
+            return self._locales.render(
+                self._SECTION,
+                "plan",
+                name=plan.name,
+                description=plan.description,
+                days=plan.days,
+                balance=self._config.payments.get_amount_with_currency(user.balance),
             )
 
         def plan_subscribe_unavailable(self, current_plan: models.Plan, amount: int) -> str:
-            return (
-                f"<b>Недостаточно средств!</b>\n"
-                f"\n"
-                f"Пополните баланс на <b>{self._config.payments.get_amount_with_currency(amount)}</b>\n"
-                f"для подписки на «{current_plan.name}»!\n"
+            return self._locales.render(
+                self._SECTION,
+                "plan_subscribe_unavailable",
+                amount=self._config.payments.get_amount_with_currency(amount),
+                name=current_plan.name,
             )
 
         # endregion
@@ -241,27 +449,32 @@ class StringsProvider(pyquoks.data.IStringsProvider):
 
         @property
         def add_funds_title(self) -> str:
-            return "Пополнение баланса"
+            return self._locales.render(self._SECTION, "add_funds_title")
 
         def add_funds_description(self, amount: int) -> str:
-            return f"Счёт на сумму {self._config.payments.get_amount_with_currency(amount)}"
-
-        @staticmethod
-        def add_funds_enter(min_amount: int, max_amount: int, error: bool = False) -> str:
-            return (
-                (
-                    f"<b>Сумма пополнения выходит\n"
-                    f"за доступные пределы!</b>\n"
-                    f"\n"
-                ) if error else str()
-            ) + (
-                f"Введите сумму, на которую\n"
-                f"хотите пополнить баланс:\n"
-                f"<b>(число от {min_amount} до {max_amount})</b>\n"
+            return self._locales.render(
+                self._SECTION,
+                "add_funds_description",
+                amount=self._config.payments.get_amount_with_currency(amount),
             )
 
+        def add_funds_enter(self, min_amount: int, max_amount: int, error: bool = False) -> str:
+            return "".join([
+                self._locales.render(self._SECTION, "add_funds_enter_error") if error else str(),
+                self._locales.render(
+                    self._SECTION,
+                    "add_funds_enter",
+                    min_amount=min_amount,
+                    max_amount=max_amount,
+                ),
+            ])
+
         def add_funds_success(self, amount: int) -> str:
-            return f"Баланс пополнен на <b>{self._config.payments.get_amount_with_currency(amount)}</b>!"
+            return self._locales.render(
+                self._SECTION,
+                "add_funds_success",
+                amount=self._config.payments.get_amount_with_currency(amount),
+            )
 
         def add_funds_referrer(
                 self,
@@ -270,10 +483,13 @@ class StringsProvider(pyquoks.data.IStringsProvider):
                 referrer_bonus_amount: int,
                 referrer_multiplier: float,
         ) -> str:
-            return (
-                f"<b>{self._config.payments.get_amount_with_currency(amount)}</b> | {user.html_text}\n"
-                f"\n"
-                f"Ваш бонус: <b>{self._config.payments.get_amount_with_currency(referrer_bonus_amount)}</b> ({referrer_multiplier:.0%})"
+            return self._locales.render(
+                self._SECTION,
+                "add_funds_referrer",
+                amount=self._config.payments.get_amount_with_currency(amount),
+                user=user.html_text,
+                referrer_bonus_amount=self._config.payments.get_amount_with_currency(referrer_bonus_amount),
+                referrer_multiplier=referrer_multiplier,
             )
 
         # endregion
@@ -283,6 +499,7 @@ class StringsProvider(pyquoks.data.IStringsProvider):
         def subscription(
                 self,
                 subscription: models.SubscriptionValues,
+                timestamp: int,
                 user: models.UserValues = None,
                 include_checked: bool = False,
         ) -> str:
@@ -290,143 +507,246 @@ class StringsProvider(pyquoks.data.IStringsProvider):
                 plan_id=subscription.plan_id,
             )
 
-            return (
-                f"<b>Подписка #{subscription.id}:</b>\n"
-                f"Тариф «{current_plan.name}»\n"
-                f"\n"
-                f"<b>Статус: {subscription.status}</b>\n"
-            ) + (
-                (
-                    f"Проверена: <b>{bool(subscription.is_checked)}</b>\n"
-                ) if include_checked else str()
-            ) + (
-                f"Подключена: <b>{utils.get_formatted_date(subscription.subscribed_at)}</b>\n"
-                f"Истекает: <b>{utils.get_formatted_date(subscription.expires_at)}</b>\n"
-            ) + (
-                (
-                    f"\n"
-                    f"Пользователь: {user.html_text}\n"
-                ) if user else str()
-            )
+            return "".join([
+                self._locales.render(
+                    self._SECTION,
+                    "subscription",
+                    id=subscription.id,
+                    name=current_plan.name,
+                    status=self._status.subscription_status(
+                        subscription=subscription,
+                        timestamp=timestamp,
+                    ),
+                ),
+                self._locales.render(
+                    self._SECTION,
+                    "subscription_checked",
+                    is_checked=bool(subscription.is_checked),
+                ) if include_checked else str(),
+                self._locales.render(
+                    self._SECTION,
+                    "subscription_dates",
+                    subscribed_at=utils.get_formatted_date(subscription.subscribed_at),
+                    expires_at=utils.get_formatted_date(subscription.expires_at),
+                ),
+                self._locales.render(
+                    self._SECTION,
+                    "subscription_user",
+                    user=user.html_text,
+                ) if user else str(),
+            ])
 
         @property
         def subscription_config_file(self) -> str:
-            return (
-                "Ваш файл конфигурации\n"
-                "доступен для скачивания!\n"
-            )
+            return self._locales.render(self._SECTION, "subscription_config_file")
 
-        @staticmethod
-        def subscription_config_copy(config_key: str) -> str:
-            return (
-                f"Ключ для подключения:\n"
-                f"<pre>{config_key}</pre>\n"
+        def subscription_config_copy(self, config_key: str) -> str:
+            return self._locales.render(
+                self._SECTION,
+                "subscription_config_copy",
+                config_key=config_key,
             )
 
         # endregion
 
         # region /admin
 
-        @staticmethod
-        def admin(tg_full_name: str) -> str:
-            return (
-                f"<b>Меню администратора</b>\n"
-                f"\n"
-                f"Добро пожаловать, {tg_full_name}!\n"
+        def admin(self, tg_full_name: str) -> str:
+            return self._locales.render(
+                self._SECTION,
+                "admin",
+                tg_full_name=tg_full_name,
             )
 
-        @staticmethod
-        def admin_users(users_count: int) -> str:
-            return (
-                f"<b>Выберите пользователя:</b>\n"
-                f"(Всего: {users_count})\n"
+        def admin_users(self, users_count: int) -> str:
+            return self._locales.render(
+                self._SECTION,
+                "admin_users",
+                users_count=users_count,
             )
 
-        @staticmethod
-        def admin_user_balance_enter(current_user: models.UserValues, max_balance: int, error: bool = False) -> str:
-            return (
-                (
-                    f"<b>Баланс должен быть числом!</b>\n"
-                    f"\n"
-                ) if error else str()
-            ) + (
-                f"Введите новый баланс для\n"
-                f"{current_user.html_text}:\n"
-                f"(Сейчас: {current_user.balance}/{max_balance})\n"
-            )
+        def admin_user_balance_enter(
+                self,
+                current_user: models.UserValues,
+                max_balance: int,
+                error: bool = False,
+        ) -> str:
+            return "".join([
+                self._locales.render(self._SECTION, "admin_user_balance_enter_error") if error else str(),
+                self._locales.render(
+                    self._SECTION,
+                    "admin_user_balance_enter",
+                    user=current_user.html_text,
+                    balance=current_user.balance,
+                    max_balance=max_balance,
+                ),
+            ])
 
         def admin_user_balance_enter_success(self, current_user: models.UserValues) -> str:
-            return (
-                f"<b>Баланс изменён!</b>\n"
-                f"<b>{self._config.payments.get_amount_with_currency(current_user.balance)}</b> | {current_user.html_text})\n"
+            return self._locales.render(
+                self._SECTION,
+                "admin_user_balance_enter_success",
+                balance=self._config.payments.get_amount_with_currency(current_user.balance),
+                user=current_user.html_text,
             )
 
-        @staticmethod
-        def admin_configs(configs_count: int) -> str:
-            return (
-                f"<b>Выберите конфигурацию:</b>\n"
-                f"(Всего: {configs_count})\n"
+        def admin_configs(self, configs_count: int) -> str:
+            return self._locales.render(
+                self._SECTION,
+                "admin_configs",
+                configs_count=configs_count,
             )
 
-        @staticmethod
-        def admin_configs_add(error: bool = False) -> str:
-            return (
-                (
-                    "Файл имеет некорректное\n"
-                    "содержимое или имя!\n"
-                    "\n"
-                ) if error else str()
-            ) + (
-                "Отправьте файл конфигурации\n"
-                "с уникальным именем:\n"
-            )
+        def admin_configs_add(self, error: bool = False) -> str:
+            return "".join([
+                self._locales.render(self._SECTION, "admin_configs_add_error") if error else str(),
+                self._locales.render(self._SECTION, "admin_configs_add"),
+            ])
 
         @property
         def admin_configs_add_success(self) -> str:
-            return "Файл конфигурации добавлен!"
+            return self._locales.render(self._SECTION, "admin_configs_add_success")
 
-        @staticmethod
-        def admin_config(config: models.ConfigValues) -> str:
-            return (
-                f"<b>Конфигурация #{config.id}:</b>\n"
-                f"\n"
-                f"<b>Имя: «{config.name}»</b>\n"
+        def admin_configs_low_stock(self, available_count: int) -> str:
+            return self._locales.render(
+                self._SECTION,
+                "admin_configs_low_stock",
+                available_count=available_count,
             )
 
-        @staticmethod
-        def admin_subscriptions(subscriptions_count: int) -> str:
-            return (
-                f"<b>Выберите подписку:</b>\n"
-                f"(Всего: {subscriptions_count})\n"
+        def admin_configs_import(self, results: list[tuple[str, models.ConfigImportStatus]]) -> str:
+            added_count = sum(status == models.ConfigImportStatus.ADDED for _, status in results)
+
+            return "".join([
+                self._locales.render(
+                    self._SECTION,
+                    "admin_configs_import",
+                    added_count=added_count,
+                    skipped_count=len(results) - added_count,
+                ),
+                *[
+                    self._locales.render(
+                        self._SECTION,
+                        "admin_configs_import_item",
+                        name=html.escape(name),
+                        status=self._status.config_import_status(
+                            status=status,
+                        ),
+                    ) for name, status in results[:constants.CONFIGS_IMPORT_REPORT_SIZE]
+                ],
+                self._locales.render(
+                    self._SECTION,
+                    "admin_configs_import_more",
+                    count=len(results) - constants.CONFIGS_IMPORT_REPORT_SIZE,
+                ) if len(results) > constants.CONFIGS_IMPORT_REPORT_SIZE else str(),
+            ])
+
+        def admin_config(self, config: models.ConfigValues) -> str:
+            return self._locales.render(
+                self._SECTION,
+                "admin_config",
+                id=config.id,
+                name=config.name,
             )
 
-        @staticmethod
-        def admin_payments(payments_count: int) -> str:
-            return (
-                f"<b>Выберите платёж:</b>\n"
-                f"(Всего: {payments_count})\n"
+        def admin_subscriptions(self, subscriptions_count: int) -> str:
+            return self._locales.render(
+                self._SECTION,
+                "admin_subscriptions",
+                subscriptions_count=subscriptions_count,
             )
 
-        @staticmethod
-        def admin_payment(payment: models.PaymentValues, user: models.UserValues) -> str:
-            return (
-                f"<b>Платёж #{payment.id}:</b>\n"
-                f"\n"
-                f"<b>Информация: «{payment.payload}»</b>\n"
-                f"Сумма: <b>{payment.amount} {payment.currency}</b>\n"
-                f"Совершён: <b>{utils.get_formatted_date(payment.date)}</b>\n"
-            ) + (
-                (
-                    f"\n"
-                    f"ID платежа: <code>{payment.provider_id}</code>\n"
-                ) if payment.provider_id else str()
-            ) + (
-                f"\n"
-                f"Пользователь: {user.html_text}\n"
+        def admin_payments(self, payments_count: int) -> str:
+            return self._locales.render(
+                self._SECTION,
+                "admin_payments",
+                payments_count=payments_count,
             )
 
-        @staticmethod
+        def admin_payment(self, payment: models.PaymentValues, user: models.UserValues) -> str:
+            return "".join([
+                self._locales.render(
+                    self._SECTION,
+                    "admin_payment",
+                    id=payment.id,
+                    payload=payment.payload,
+                    amount=payment.amount,
+                    currency=payment.currency,
+                    date=utils.get_formatted_date(payment.date),
+                ),
+                self._locales.render(
+                    self._SECTION,
+                    "admin_payment_provider",
+                    provider_id=payment.provider_id,
+                ) if payment.provider_id else str(),
+                self._locales.render(
+                    self._SECTION,
+                    "admin_payment_user",
+                    user=user.html_text,
+                ),
+            ])
+
+        def admin_logs(self, logs_files: list[tuple[str, int]]) -> str:
+            return "".join([
+                self._locales.render(self._SECTION, "admin_logs"),
+                *[
+                    self._locales.render(
+                        self._SECTION,
+                        "admin_logs_file",
+                        name=logs_file_name,
+                        size=utils.get_formatted_size(logs_file_size),
+                    ) for logs_file_name, logs_file_size in logs_files
+                ],
+            ])
+
+        def admin_user_referrals(self, referrals: list[models.ReferralValues]) -> str:
+            return "".join([
+                self._locales.render(
+                    self._SECTION,
+                    "admin_user_referrals",
+                    user=referrals[0].html_text,
+                    referrals_count=referrals[0].referrals_count,
+                    earnings=self._config.payments.get_amount_with_currency(referrals[0].earnings),
+                ),
+                *[
+                    self._locales.render(
+                        self._SECTION,
+                        "admin_user_referrals_item",
+                        indent="  " * (referral.depth - 1),
+                        depth=referral.depth,
+                        user=referral.html_text,
+                        referrals_count=referral.referrals_count,
+                        earnings=self._config.payments.get_amount_with_currency(referral.earnings),
+                    ) for referral in referrals[1:]
+                ],
+            ])
+
+        def admin_queries(self, statistics: list[DatabaseManager.QueryProfiler.Statistics]) -> str:
+            if not statistics:
+                return "".join([
+                    self._locales.render(self._SECTION, "admin_queries"),
+                    self._locales.render(self._SECTION, "admin_queries_empty"),
+                ])
+
+            return "".join([
+                self._locales.render(self._SECTION, "admin_queries"),
+                *[
+                    self._locales.render(
+                        self._SECTION,
+                        "admin_queries_statement",
+                        statement=html.escape(current_statistics.statement),
+                        count=current_statistics.count,
+                        rows=current_statistics.rows,
+                        total_ms=current_statistics.total_time * 1000,
+                        p50_ms=current_statistics.get_percentile(0.50) * 1000,
+                        p95_ms=current_statistics.get_percentile(0.95) * 1000,
+                        p99_ms=current_statistics.get_percentile(0.99) * 1000,
+                    ) for current_statistics in statistics
+                ],
+            ])
+
         def admin_settings(
+                self,
                 bot: aiogram.types.User,
                 users_count: int,
                 configs_count: int,
@@ -434,48 +754,57 @@ class StringsProvider(pyquoks.data.IStringsProvider):
                 payments_count: int,
                 date_started: datetime.datetime,
         ) -> str:
-            return (
-                f"<b>Информация о {bot.full_name}:</b>\n"
-                f"\n"
-                f"Пользователей: <b>{users_count}</b>\n"
-                f"Конфигураций: <b>{configs_count}</b>\n"
-                f"Подписок: <b>{subscriptions_count}</b>\n"
-                f"Платежей: <b>{payments_count}</b>\n"
-                f"\n"
-                f"<b>Запущен: {utils.get_formatted_date(date_started)} UTC</b>\n"
+            return self._locales.render(
+                self._SECTION,
+                "admin_settings",
+                full_name=bot.full_name,
+                users_count=users_count,
+                configs_count=configs_count,
+                subscriptions_count=subscriptions_count,
+                payments_count=payments_count,
+                date_started=utils.get_formatted_date(date_started),
             )
 
         # endregion
 
         # region page
 
-        @staticmethod
-        def admin_page_enter(error: bool = False) -> str:
-            return (
-                (
-                    "<b>Элемент с выбранным ID не найден!</b>\n"
-                    "\n"
-                ) if error else str()
-            ) + (
-                "Введите ID элемента:\n"
-            )
+        def admin_page_enter(self, error: bool = False) -> str:
+            return "".join([
+                self._locales.render(self._SECTION, "admin_page_enter_error") if error else str(),
+                self._locales.render(self._SECTION, "admin_page_enter"),
+            ])
 
         # endregion
 
     class StatusStrings(pyquoks.data.IStringsProvider.IStrings):
+        _SECTION = "status"
+
+        def __init__(self):
+            self._locales = LocalesProvider()
 
         # region subscriptions
 
-        @property
-        def _subscription_disable_renewal(self) -> str:
-            return "Отключить автопродление"
+        def subscription_renewal(self, is_active: bool) -> str:
+            return self._locales.render(
+                self._SECTION,
+                "subscription_disable_renewal" if is_active else "subscription_enable_renewal",
+            )
 
-        @property
-        def _subscription_enable_renewal(self) -> str:
-            return "Подключить автопродление"
+        def subscription_status(self, subscription: models.SubscriptionValues, timestamp: int) -> str:
+            if subscription.is_expired(timestamp):
+                return self._locales.render(self._SECTION, "subscription_expired")
+            elif subscription.is_active:
+                return self._locales.render(self._SECTION, "subscription_active")
+            else:
+                return self._locales.render(self._SECTION, "subscription_cancelled")
 
-        def subscription_renewal(self, is_active: bool) -> str:
-            return self._subscription_disable_renewal if is_active else self._subscription_enable_renewal
+        # endregion
+
+        # region configs
+
+        def config_import_status(self, status: models.ConfigImportStatus) -> str:
+            return self._locales.render(self._SECTION, f"config_import_{status.name.lower()}")
 
         # endregion
 
@@ -488,591 +817,4260 @@ class StringsProvider(pyquoks.data.IStringsProvider):
     menu: MenuStrings
     status: StatusStrings
 
+    def set_language_code(self, language_code: str | None) -> None:
+        LocalesProvider().set_language_code(
+            language_code=language_code,
+        )
+
 
 # endregion
 
 # region Managers
 
-class DatabaseManager(pyquoks.data.IDatabaseManager):
-    class ConfigsDatabase(pyquoks.data.IDatabaseManager.IDatabase):
-        _NAME = "configs"
-        _SQL = f"""
-        CREATE TABLE IF NOT EXISTS {_NAME} (
-        id INTEGER PRIMARY KEY NOT NULL,
-        name TEXT NOT NULL,
-        data TEXT NOT NULL,
-        subscription_id INTEGER
+class IDatabaseBackend(abc.ABC):
+    class IDatabaseObject:
+        @staticmethod
+        def _get_values(values_type: type, result: typing.Any) -> typing.Any:
+            return values_type(
+                **dict(result),
+            ) if result else None
+
+        @staticmethod
+        def _get_values_list(values_type: type, rows: typing.Iterable) -> list:
+            return [
+                values_type(
+                    **dict(row),
+                ) for row in rows
+            ]
+
+        @staticmethod
+        def _get_ledger_entries(
+                kind: models.LedgerEntryType,
+                tg_id: int,
+                amount: int,
+        ) -> tuple[tuple[models.LedgerAccountType, int, int], ...]:
+            return (
+                (models.LedgerAccountType.USER, tg_id, amount),
+                (kind.counter_account_type, int(), -amount),
+            ) if amount else tuple()
+
+        @staticmethod
+        def _is_balance_verified(user_balance: int | None, ledger_balance: int) -> bool:
+            return (user_balance if user_balance is not None else int()) == ledger_balance
+
+    IDatabase: type
+    _DATABASE_OBJECTS: dict[str, type]
+
+    def migrate(self) -> dict[str, list[int]]:
+        return {
+            name: getattr(self, name).migrate() for name in self._DATABASE_OBJECTS
+        }
+
+    def get_schema_versions(self) -> dict[str, int]:
+        return {
+            name: getattr(self, name).get_schema_version() for name in self._DATABASE_OBJECTS
+        }
+
+    def add_observer(self, observer: typing.Callable[[str, float], None]) -> None:
+        self.IDatabase._OBSERVERS.append(observer)
+
+    def add_slow_query_observer(self, observer: typing.Callable[[str, float, list[str]], None]) -> None:
+        self.IDatabase._SLOW_QUERY_OBSERVERS.append(observer)
+
+    def enable_profiling(self, slow_query_threshold: float) -> None:
+        self.IDatabase._PROFILER = DatabaseManager.QueryProfiler(
+            slow_query_threshold=slow_query_threshold,
         )
-        """
 
-        def add_config(self, name: str, data: str, subscription_id: int | None) -> models.ConfigValues | None:
-            cursor = self.cursor()
+    @property
+    def profiler(self) -> DatabaseManager.QueryProfiler | None:
+        return self.IDatabase._PROFILER
 
-            cursor.execute(
-                f"""
-                INSERT INTO {self._NAME} (
-                name,
-                data,
-                subscription_id
+    @abc.abstractmethod
+    def close_all(self) -> None:
+        pass
+
+
+class DatabaseManager(pyquoks.data.IDatabaseManager, IDatabaseBackend):
+    class QueryProfiler:
+        class Statistics:
+            _SAMPLES_SIZE = 1024
+
+            def __init__(self, statement: str) -> None:
+                self.statement = statement
+                self.count = int()
+                self.rows = int()
+                self.total_time = float()
+                self.samples = collections.deque(maxlen=self._SAMPLES_SIZE)
+
+            def get_percentile(self, percentile: float) -> float:
+                return utils.get_percentile(
+                    samples=self.samples,
+                    percentile=percentile,
                 )
-                VALUES (?, ?, ?)
-                """,
-                (
-                    name,
-                    data,
-                    subscription_id,
-                ),
+
+        _EXPLAINED_STATEMENTS = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+        def __init__(self, slow_query_threshold: float) -> None:
+            self._slow_query_threshold = slow_query_threshold
+            self._statistics: dict[str, DatabaseManager.QueryProfiler.Statistics] = dict()
+            self._lock = threading.Lock()
+
+        @staticmethod
+        @functools.lru_cache(maxsize=1024)
+        def get_normalized_statement(sql: str) -> str:
+            return " ".join(sql.split())
+
+        def is_slow(self, elapsed: float) -> bool:
+            return elapsed >= self._slow_query_threshold
+
+        def is_explained(self, statement: str) -> bool:
+            return statement.upper().startswith(self._EXPLAINED_STATEMENTS)
+
+        def add_execution(self, statement: str, elapsed: float, rows: int = 0) -> None:
+            with self._lock:
+                if statement not in self._statistics:
+                    self._statistics[statement] = self.Statistics(
+                        statement=statement,
+                    )
+
+                current_statistics = self._statistics[statement]
+                current_statistics.count += 1
+                current_statistics.rows += rows
+                current_statistics.total_time += elapsed
+                current_statistics.samples.append(elapsed)
+
+        def add_rows(self, statement: str, rows: int) -> None:
+            with self._lock:
+                if current_statistics := self._statistics.get(statement):
+                    current_statistics.rows += rows
+
+        def get_statistics(self) -> list[DatabaseManager.QueryProfiler.Statistics]:
+            with self._lock:
+                return sorted(
+                    self._statistics.values(),
+                    key=lambda current_statistics: current_statistics.total_time,
+                    reverse=True,
+                )
+
+        def reset(self) -> None:
+            with self._lock:
+                self._statistics.clear()
+
+    class StatementsConnection(sqlite3.Connection):
+        _CACHED_STATEMENTS = 256
+
+        def __init__(self, *args, **kwargs) -> None:
+            kwargs.setdefault("cached_statements", self._CACHED_STATEMENTS)
+            super().__init__(*args, **kwargs)
+
+    class ReusableCursor(sqlite3.Cursor):
+        def fetchone(self) -> typing.Any:
+            row = super().fetchone()
+            super().fetchall()
+            return row
+
+    class ProfiledCursor(ReusableCursor):
+        def __init__(self, *args, **kwargs) -> None:
+            super().__init__(*args, **kwargs)
+            self._statement = None
+
+        def _get_query_plan(self, sql: str, parameters: typing.Any) -> list[str]:
+            try:
+                return [
+                    row[-1] for row in sqlite3.Cursor(self.connection).execute(
+                        f"EXPLAIN QUERY PLAN {sql}",
+                        parameters,
+                    ).fetchall()
+                ]
+            except sqlite3.Error:
+                return list()
+
+        def _profile(
+                self,
+                method: typing.Callable,
+                sql: str,
+                parameters: typing.Any,
+                explained_parameters: typing.Any,
+        ) -> sqlite3.Cursor:
+            current_profiler: DatabaseManager.QueryProfiler = self.connection._PROFILER
+            self._statement = current_profiler.get_normalized_statement(sql)
+            time_started = time.perf_counter()
+
+            try:
+                return method(sql, parameters)
+            finally:
+                elapsed = time.perf_counter() - time_started
+
+                current_profiler.add_execution(
+                    statement=self._statement,
+                    elapsed=elapsed,
+                    rows=max(self.rowcount, 0),
+                )
+
+                if current_profiler.is_slow(elapsed):
+                    current_query_plan = self._get_query_plan(
+                        sql=sql,
+                        parameters=explained_parameters,
+                    ) if current_profiler.is_explained(self._statement) else list()
+
+                    for observer in self.connection._SLOW_QUERY_OBSERVERS:
+                        observer(self._statement, elapsed, current_query_plan)
+
+        def _add_rows(self, rows: list) -> list:
+            if self._statement:
+                self.connection._PROFILER.add_rows(
+                    statement=self._statement,
+                    rows=len(rows),
+                )
+
+            return rows
+
+        def execute(self, sql: str, parameters: typing.Any = tuple()) -> sqlite3.Cursor:
+            return self._profile(
+                method=super().execute,
+                sql=sql,
+                parameters=parameters,
+                explained_parameters=parameters,
             )
 
-            self.commit()
+        def executemany(self, sql: str, parameters: typing.Iterable) -> sqlite3.Cursor:
+            current_parameters = list(parameters)
 
-            cursor.execute(
-                f"""
-                SELECT * FROM {self._NAME} WHERE rowid == ?
-                """,
-                (
-                    cursor.lastrowid,
-                ),
+            return self._profile(
+                method=super().executemany,
+                sql=sql,
+                parameters=current_parameters,
+                explained_parameters=current_parameters[0] if current_parameters else tuple(),
             )
-            result = cursor.fetchone()
 
-            return models.ConfigValues(
-                **dict(result),
-            ) if result else None
+        def fetchone(self) -> typing.Any:
+            row = super().fetchone()
+            self._add_rows([row] if row is not None else list())
+            return row
+
+        def fetchmany(self, *args, **kwargs) -> list:
+            return self._add_rows(super().fetchmany(*args, **kwargs))
+
+        def fetchall(self) -> list:
+            return self._add_rows(super().fetchall())
+
+    class IDatabase(pyquoks.data.IDatabaseManager.IDatabase, StatementsConnection, IDatabaseBackend.IDatabaseObject):
+        _OBSERVERS: list[typing.Callable[[str, float], None]] = list()
+        _SLOW_QUERY_OBSERVERS: list[typing.Callable[[str, float, list[str]], None]] = list()
+        _PROFILER: DatabaseManager.QueryProfiler | None = None
+        _LOGGER: logging.Logger | None = None
+        _LOCAL = threading.local()
+        _MIGRATIONS: dict[int, tuple[tuple[models.MigrationType, str, ...], ...]] = dict()
+        _MIGRATION_CHUNK_SIZE = 1000
+        _SCHEMA_VERSION_NAME = "schema_version"
+        _LEDGER_ALIAS = "ledger_database"
+        _CREATE_SCHEMA_VERSION_SQL = f"""
+        CREATE TABLE IF NOT EXISTS {_SCHEMA_VERSION_NAME} (
+        version INTEGER PRIMARY KEY NOT NULL,
+        date INTEGER NOT NULL
+        )
+        """
+        _GET_SCHEMA_VERSION_SQL = f"""
+        SELECT COALESCE(MAX(version), 0) FROM {_SCHEMA_VERSION_NAME}
+        """
+        _ADD_SCHEMA_VERSION_SQL = f"""
+        INSERT INTO {_SCHEMA_VERSION_NAME} (
+        version,
+        date
+        )
+        VALUES (?, CAST(strftime('%s', 'now') AS INTEGER))
+        """
+        _ADD_LEDGER_TRANSACTION_SQL = f"""
+        INSERT INTO {_LEDGER_ALIAS}.ledger (
+        transaction_id,
+        account_type,
+        account_id,
+        kind,
+        amount,
+        date,
+        reference
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """
+        _SET_LEDGER_TRANSACTION_ID_SQL = f"""
+        UPDATE {_LEDGER_ALIAS}.ledger SET transaction_id = id WHERE id == ?
+        """
+        _CHECK_LEDGER_ENTRIES_SQL = f"""
+        SELECT EXISTS (SELECT 1 FROM {_LEDGER_ALIAS}.ledger)
+        """
 
-        def get_config(self, config_id: int) -> models.ConfigValues | None:
-            cursor = self.cursor()
+        def __init__(self, *args, **kwargs) -> None:
+            self._cursors = threading.local()
+            self._lock = threading.RLock()
 
-            cursor.execute(
-                f"""
-                SELECT * FROM {self._NAME} WHERE id == ?
-                """,
+            super().__init__(*args, **kwargs)
+
+        def __enter__(self) -> typing.Self:
+            self._lock.acquire()
+
+            try:
+                return super().__enter__()
+            except BaseException:
+                self._lock.release()
+                raise
+
+        def __exit__(self, *args) -> bool:
+            try:
+                return super().__exit__(*args)
+            finally:
+                self._lock.release()
+
+        def attach_database(self, path: str, alias: str) -> None:
+            self.execute(
+                f"ATTACH DATABASE ? AS {alias}",
                 (
-                    config_id,
+                    path,
                 ),
             )
-            result = cursor.fetchone()
 
-            return models.ConfigValues(
-                **dict(result),
-            ) if result else None
+        @property
+        def path(self) -> str:
+            return self.execute("PRAGMA database_list").fetchone()[2]
 
-        def get_all_configs(self) -> list[models.ConfigValues] | None:
-            cursor = self.cursor()
+        def cursor(self, *args, **kwargs) -> sqlite3.Cursor:
+            if args or kwargs:
+                return super().cursor(*args, **kwargs)
 
-            cursor.execute(
-                f"""
-                SELECT * FROM {self._NAME}
-                """,
-            )
+            current_factory = DatabaseManager.ProfiledCursor if self._PROFILER else DatabaseManager.ReusableCursor
+            current_cursor = getattr(self._cursors, "cursor", None)
 
-            return [
-                models.ConfigValues(
-                    **dict(row),
-                ) for row in cursor.fetchall()
-            ]
+            if type(current_cursor) is not current_factory:
+                current_cursor = super().cursor(current_factory)
+                self._cursors.cursor = current_cursor
 
-        def get_available_configs(self) -> list[models.ConfigValues] | None:
-            cursor = self.cursor()
+            return current_cursor
 
-            cursor.execute(
-                f"""
-                SELECT * FROM {self._NAME} WHERE subscription_id IS NULL
-                """,
-            )
+        def commit(self) -> None:
+            if not self._PROFILER:
+                return super().commit()
 
-            return [
-                models.ConfigValues(
-                    **dict(row),
-                ) for row in cursor.fetchall()
-            ]
+            time_started = time.perf_counter()
 
-        def attach_subscription(self, config_id: int, subscription_id: int) -> None:
-            cursor = self.cursor()
+            try:
+                return super().commit()
+            finally:
+                self._PROFILER.add_execution(
+                    statement="COMMIT",
+                    elapsed=time.perf_counter() - time_started,
+                )
 
-            cursor.execute(
-                f"""
-                UPDATE {self._NAME} SET subscription_id = ? WHERE id == ?
-                """,
-                (
-                    subscription_id,
-                    config_id,
-                ),
-            )
+        def _get_columns(self, cursor: sqlite3.Cursor) -> set[str]:
+            cursor.execute(f"PRAGMA table_info({self._NAME})")
+
+            return {row[1] for row in cursor.fetchall()}
+
+        def _add_column(self, cursor: sqlite3.Cursor, column: str, definition: str) -> None:
+            if column not in self._get_columns(cursor):
+                cursor.execute(f"ALTER TABLE {self._NAME} ADD COLUMN {column} {definition}")
+
+        def _run_backfill(self, cursor: sqlite3.Cursor, statement: str) -> None:
+            chunk_start = int()
+
+            while True:
+                cursor.execute(
+                    f"""
+                    SELECT MAX(rowid) FROM (
+                    SELECT rowid FROM {self._NAME} WHERE rowid > ? ORDER BY rowid LIMIT ?
+                    )
+                    """,
+                    (
+                        chunk_start,
+                        self._MIGRATION_CHUNK_SIZE,
+                    ),
+                )
+                chunk_end = cursor.fetchone()[0]
+
+                if chunk_end is None:
+                    return
+
+                with self:
+                    cursor.execute(
+                        statement,
+                        (
+                            chunk_start,
+                            chunk_end,
+                        ),
+                    )
+
+                chunk_start = chunk_end
+
+        def _apply_migration(self, cursor: sqlite3.Cursor, version: int) -> None:
+            cursor.execute("BEGIN")
+
+            try:
+                for migration_type, *migration_arguments in self._MIGRATIONS[version]:
+                    match migration_type:
+                        case models.MigrationType.STATEMENT:
+                            cursor.execute(*migration_arguments)
+                        case models.MigrationType.COLUMN:
+                            self._add_column(cursor, *migration_arguments)
+                        case models.MigrationType.BACKFILL:
+                            self.commit()
+                            self._run_backfill(cursor, *migration_arguments)
+                            cursor.execute("BEGIN")
+                        case models.MigrationType.METHOD:
+                            getattr(self, *migration_arguments)(cursor)
+
+                cursor.execute(
+                    self._ADD_SCHEMA_VERSION_SQL,
+                    (
+                        version,
+                    ),
+                )
+            except Exception:
+                self.rollback()
+                raise
 
             self.commit()
 
-        def check_config_name(self, name: str) -> bool:
+        def get_schema_version(self) -> int:
             cursor = self.cursor()
 
-            cursor.execute(
-                f"""
-                SELECT * FROM {self._NAME} WHERE name == ?
-                """,
-                (
-                    name,
-                ),
-            )
+            cursor.execute(self._CREATE_SCHEMA_VERSION_SQL)
+            cursor.execute(self._GET_SCHEMA_VERSION_SQL)
 
-            return not bool(cursor.fetchone())
+            return cursor.fetchone()[0]
 
-    class PaymentsDatabase(pyquoks.data.IDatabaseManager.IDatabase):
-        _NAME = "payments"
-        _SQL = f"""
-        CREATE TABLE IF NOT EXISTS {_NAME} (
-        id INTEGER PRIMARY KEY NOT NULL,
-        provider_id TEXT,
-        amount INTEGER NOT NULL,
-        currency TEXT NOT NULL,
-        payload TEXT NOT NULL,
-        date INTEGER NOT NULL,
-        tg_id INTEGER NOT NULL
-        )
-        """
+        def migrate(self) -> list[int]:
+            cursor = self.cursor()
+            current_version = self.get_schema_version()
+            pending_versions = [version for version in sorted(self._MIGRATIONS) if version > current_version]
 
-        def add_payment(
+            for version in pending_versions:
+                self._apply_migration(
+                    cursor=cursor,
+                    version=version,
+                )
+
+            return pending_versions
+
+        def _add_ledger_transaction(
                 self,
-                provider_id: str | None,
+                cursor: sqlite3.Cursor,
+                kind: models.LedgerEntryType,
+                tg_id: int,
                 amount: int,
-                currency: str,
-                payload: str,
                 date: int,
-                tg_id: int,
-        ) -> models.PaymentValues | None:
-            cursor = self.cursor()
-
-            cursor.execute(
-                f"""
-                INSERT INTO {self._NAME} (
-                provider_id,
-                amount,
-                currency,
-                payload,
-                date,
-                tg_id
+                reference: str | None,
+        ) -> None:
+            transaction_id = int()
+
+            for account_type, account_id, entry_amount in self._get_ledger_entries(
+                    kind=kind,
+                    tg_id=tg_id,
+                    amount=amount,
+            ):
+                cursor.execute(
+                    self._ADD_LEDGER_TRANSACTION_SQL,
+                    (
+                        transaction_id,
+                        account_type.value,
+                        account_id,
+                        kind.value,
+                        entry_amount,
+                        date,
+                        reference,
+                    ),
                 )
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    provider_id,
-                    amount,
-                    currency,
-                    payload,
-                    date,
-                    tg_id,
-                ),
-            )
 
-            self.commit()
+                if not transaction_id:
+                    transaction_id = cursor.lastrowid
 
-            cursor.execute(
-                f"""
-                SELECT * FROM {self._NAME} WHERE rowid == ?
-                """,
-                (
-                    cursor.lastrowid,
-                ),
-            )
-            result = cursor.fetchone()
+                    cursor.execute(
+                        self._SET_LEDGER_TRANSACTION_ID_SQL,
+                        (
+                            transaction_id,
+                        ),
+                    )
 
-            return models.PaymentValues(
-                **dict(result),
-            ) if result else None
+        def __init_subclass__(cls, **kwargs) -> None:
+            super().__init_subclass__(**kwargs)
 
-        def get_payment(self, payment_id: int) -> models.PaymentValues | None:
-            cursor = self.cursor()
+            for name, value in list(vars(cls).items()):
+                if callable(value) and not name.startswith("_"):
+                    setattr(cls, name, cls._get_observed_method(f"{cls.__name__}.{name}", value))
 
-            cursor.execute(
-                f"""
-                SELECT * FROM {self._NAME} WHERE id == ?
-                """,
+        @staticmethod
+        def _get_observed_method(method_name: str, method: typing.Callable) -> typing.Callable:
+            @functools.wraps(method)
+            def observed_method(self, *args, **kwargs):
+                if getattr(self._LOCAL, "is_observed", False):
+                    return method(self, *args, **kwargs)
+
+                self._LOCAL.is_observed = True
+                time_started = time.perf_counter()
+
+                try:
+                    return method(self, *args, **kwargs)
+                finally:
+                    elapsed = time.perf_counter() - time_started
+                    self._LOCAL.is_observed = False
+
+                    for observer in self._OBSERVERS:
+                        observer(method_name, elapsed)
+
+            return observed_method
+
+    class ConfigBlobsDatabase(IDatabase):
+        _NAME = "config_blobs"
+        _SQL = f"""
+        CREATE TABLE IF NOT EXISTS {_NAME} (
+        hash TEXT PRIMARY KEY NOT NULL,
+        data BLOB NOT NULL,
+        size INTEGER NOT NULL
+        )
+        """
+
+    class ConfigsDatabase(IDatabase):
+        _NAME = "configs"
+        _SQL = f"""
+        CREATE TABLE IF NOT EXISTS {_NAME} (
+        id INTEGER PRIMARY KEY NOT NULL,
+        name TEXT NOT NULL,
+        data_hash TEXT NOT NULL,
+        subscription_id INTEGER,
+        reserved_until INTEGER
+        )
+        """
+        _MIGRATIONS = {
+            1: (
                 (
-                    payment_id,
+                    models.MigrationType.COLUMN,
+                    "data_hash",
+                    "TEXT",
                 ),
-            )
-            result = cursor.fetchone()
+                (
+                    models.MigrationType.COLUMN,
+                    "reserved_until",
+                    "INTEGER",
+                ),
+            ),
+            2: (
+                (
+                    models.MigrationType.METHOD,
+                    "_migrate_legacy_data",
+                ),
+            ),
+            3: (
+                (
+                    models.MigrationType.STATEMENT,
+                    f"CREATE INDEX IF NOT EXISTS {_NAME}_available ON {_NAME} (id, reserved_until) WHERE subscription_id IS NULL",
+                ),
+                (
+                    models.MigrationType.STATEMENT,
+                    f"CREATE INDEX IF NOT EXISTS {_NAME}_data_hash ON {_NAME} (data_hash)",
+                ),
+                (
+                    models.MigrationType.STATEMENT,
+                    f"CREATE INDEX IF NOT EXISTS {_NAME}_name ON {_NAME} (name)",
+                ),
+            ),
+        }
+        _BLOBS_ALIAS = "config_blobs_database"
+        _SUBSCRIPTIONS_ALIAS = "subscriptions_database"
+        _ADD_BLOBS_SQL = f"""
+        INSERT OR IGNORE INTO {_BLOBS_ALIAS}.config_blobs (
+        hash,
+        data,
+        size
+        )
+        VALUES (?, ?, ?)
+        """
+        _DELETE_UNUSED_BLOBS_SQL = f"""
+        DELETE FROM {_BLOBS_ALIAS}.config_blobs AS blobs
+        WHERE NOT EXISTS (SELECT 1 FROM {_NAME} WHERE data_hash == blobs.hash)
+        """
+        _GET_LEGACY_DATA_SQL = f"""
+        SELECT id, data FROM {_NAME} WHERE data_hash IS NULL
+        """
+        _SET_DATA_HASH_SQL = f"""
+        UPDATE {_NAME} SET data_hash = ? WHERE id == ?
+        """
+        _DROP_LEGACY_DATA_SQL = f"""
+        ALTER TABLE {_NAME} DROP COLUMN data
+        """
+        _ADD_CONFIG_SQL = f"""
+        INSERT INTO {_NAME} (
+        name,
+        data_hash,
+        subscription_id
+        )
+        VALUES (?, ?, ?)
+        """
+        _GET_BY_ROWID_SQL = f"""
+        SELECT * FROM {_NAME} WHERE rowid == ?
+        """
+        _ADD_CONFIGS_SQL = f"""
+        INSERT INTO {_NAME} (
+        name,
+        data_hash,
+        subscription_id
+        )
+        VALUES (?, ?, NULL)
+        """
+        _GET_CONFIG_DATA_SQL = f"""
+        SELECT blobs.data FROM {_NAME}
+        JOIN {_BLOBS_ALIAS}.config_blobs AS blobs
+        ON blobs.hash == {_NAME}.data_hash
+        WHERE {_NAME}.id == ?
+        """
+        _GET_CONFIG_SQL = f"""
+        SELECT * FROM {_NAME} WHERE id == ?
+        """
+        _GET_ALL_CONFIGS_SQL = f"""
+        SELECT * FROM {_NAME}
+        """
+        _GET_ALL_CONFIGS_LABELS_SQL = f"""
+        SELECT id, name FROM {_NAME}
+        """
+        _GET_CONFIGS_COUNT_SQL = f"""
+        SELECT COUNT(*) FROM {_NAME}
+        """
+        _GET_AVAILABLE_CONFIGS_SQL = f"""
+        SELECT * FROM {_NAME} WHERE subscription_id IS NULL
+        """
+        _GET_AVAILABLE_CONFIG_IDS_SQL = f"""
+        SELECT id FROM {_NAME}
+        WHERE subscription_id IS NULL AND (reserved_until IS NULL OR reserved_until <= ?)
+        ORDER BY id LIMIT ?
+        """
+        _GET_AVAILABLE_CONFIGS_COUNT_SQL = f"""
+        SELECT COUNT(*) FROM {_NAME}
+        WHERE subscription_id IS NULL AND (reserved_until IS NULL OR reserved_until <= ?)
+        """
+        _RESERVE_CONFIG_SQL = f"""
+        UPDATE {_NAME} SET reserved_until = ?
+        WHERE id == ? AND subscription_id IS NULL AND (reserved_until IS NULL OR reserved_until <= ?)
+        """
+        _RELEASE_CONFIG_SQL = f"""
+        UPDATE {_NAME} SET reserved_until = NULL WHERE id == ? AND subscription_id IS NULL
+        """
+        _GET_RECYCLABLE_CONFIGS_SQL = f"""
+        SELECT {_NAME}.* FROM {_NAME}
+        JOIN {_SUBSCRIPTIONS_ALIAS}.subscriptions AS subscriptions
+        ON subscriptions.id == {_NAME}.subscription_id
+        WHERE subscriptions.is_checked == 1 AND subscriptions.expires_at < ?
+        ORDER BY {_NAME}.id LIMIT ?
+        """
+        _RECYCLE_CONFIGS_SQL = f"""
+        UPDATE {_NAME} SET data_hash = COALESCE(?, data_hash), subscription_id = NULL, reserved_until = NULL
+        WHERE id == ? AND subscription_id == ?
+        """
+        _ATTACH_SUBSCRIPTION_SQL = f"""
+        UPDATE {_NAME} SET subscription_id = ?, reserved_until = NULL WHERE id == ?
+        """
+        _GET_CONFIG_NAMES_SQL = f"""
+        SELECT name FROM {_NAME}
+        """
+        _CHECK_CONFIG_NAME_SQL = f"""
+        SELECT EXISTS (SELECT 1 FROM {_NAME} WHERE name == ?)
+        """
 
-            return models.PaymentValues(
-                **dict(result),
-            ) if result else None
+        def _get_blob(self, data: str) -> tuple[str, bytes, int]:
+            encoded_data = data.encode()
 
-        def get_all_payments(self) -> list[models.PaymentValues] | None:
-            cursor = self.cursor()
+            return hashlib.sha256(encoded_data).hexdigest(), zlib.compress(encoded_data), len(encoded_data)
 
-            cursor.execute(
-                f"""
-                SELECT * FROM {self._NAME}
-                """,
+        def _add_blobs(self, cursor: sqlite3.Cursor, blobs: typing.Iterable[tuple[str, bytes, int]]) -> None:
+            cursor.executemany(
+                self._ADD_BLOBS_SQL,
+                blobs,
             )
 
-            return [
-                models.PaymentValues(
-                    **dict(row),
-                ) for row in cursor.fetchall()
-            ]
+        def _delete_unused_blobs(self, cursor: sqlite3.Cursor) -> None:
+            cursor.execute(
+                self._DELETE_UNUSED_BLOBS_SQL,
+            )
 
-        def get_user_payments(self, tg_id: int) -> list[models.PaymentValues]:
-            cursor = self.cursor()
+        def _migrate_legacy_data(self, cursor: sqlite3.Cursor) -> None:
+            if "data" not in self._get_columns(cursor):
+                return
 
             cursor.execute(
-                f"""
-                SELECT * FROM {self._NAME} WHERE tg_id == ?
-                """,
-                (
-                    tg_id,
-                ),
+                self._GET_LEGACY_DATA_SQL,
             )
+            current_blobs = {
+                config_id: self._get_blob(config_data) for config_id, config_data in cursor.fetchall()
+            }
 
-            return [
-                models.PaymentValues(
-                    **dict(row),
-                ) for row in cursor.fetchall()
-            ]
+            self._add_blobs(
+                cursor=cursor,
+                blobs=current_blobs.values(),
+            )
+            cursor.executemany(
+                self._SET_DATA_HASH_SQL,
+                [
+                    (
+                        blob[0],
+                        config_id,
+                    ) for config_id, blob in current_blobs.items()
+                ],
+            )
+            cursor.execute(self._DROP_LEGACY_DATA_SQL)
 
-        def check_first_payment(self, tg_id: int) -> bool:
+        def add_config(self, name: str, data: str, subscription_id: int | None) -> models.ConfigValues | None:
             cursor = self.cursor()
+            current_blob = self._get_blob(data)
+
+            with self:
+                self._add_blobs(
+                    cursor=cursor,
+                    blobs=[current_blob],
+                )
+                cursor.execute(
+                    self._ADD_CONFIG_SQL,
+                    (
+                        name,
+                        current_blob[0],
+                        subscription_id,
+                    ),
+                )
 
             cursor.execute(
-                f"""
-                SELECT * FROM {self._NAME} WHERE provider_id IS NOT NULL AND tg_id == ?
-                """,
+                self._GET_BY_ROWID_SQL,
                 (
-                    tg_id,
+                    cursor.lastrowid,
                 ),
             )
+            result = cursor.fetchone()
 
-            return not bool(cursor.fetchone())
+            return self._get_values(
+                values_type=models.ConfigValues,
+                result=result,
+            )
 
-    class SubscriptionsDatabase(pyquoks.data.IDatabaseManager.IDatabase):
-        _NAME = "subscriptions"
-        _SQL = f"""
-        CREATE TABLE IF NOT EXISTS {_NAME} (
-        id INTEGER PRIMARY KEY NOT NULL,
-        plan_id INTEGER NOT NULL,
-        is_active INTEGER NOT NULL,
-        is_checked INTEGER NOT NULL,
-        subscribed_at INTEGER NOT NULL,
-        expires_at INTEGER NOT NULL,
-        tg_id INTEGER NOT NULL,
-        config_id INTEGER NOT NULL
-        )
-        """
+        def add_configs(self, configs: list[tuple[str, str]]) -> int:
+            cursor = self.cursor()
+            current_blobs = [self._get_blob(data) for _, data in configs]
 
-        def add_subscription(
-                self,
-                plan_id: int,
-                is_active: int,
-                is_checked: int,
-                subscribed_at: int,
-                expires_at: int,
-                tg_id: int,
-                config_id: int,
-        ) -> models.SubscriptionValues | None:
+            with self:
+                self._add_blobs(
+                    cursor=cursor,
+                    blobs=current_blobs,
+                )
+                cursor.executemany(
+                    self._ADD_CONFIGS_SQL,
+                    [
+                        (
+                            name,
+                            blob[0],
+                        ) for (name, _), blob in zip(configs, current_blobs)
+                    ],
+                )
+
+            return cursor.rowcount
+
+        def get_config_data(self, config_id: int) -> str | None:
             cursor = self.cursor()
 
             cursor.execute(
-                f"""
-                INSERT INTO {self._NAME} (
-                plan_id,
-                is_active,
-                is_checked,
-                subscribed_at,
-                expires_at,
-                tg_id,
-                config_id
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
+                self._GET_CONFIG_DATA_SQL,
                 (
-                    plan_id,
-                    is_active,
-                    is_checked,
-                    subscribed_at,
-                    expires_at,
-                    tg_id,
                     config_id,
                 ),
             )
+            result = cursor.fetchone()
 
-            self.commit()
+            return zlib.decompress(result[0]).decode() if result else None
+
+        def get_config(self, config_id: int) -> models.ConfigValues | None:
+            cursor = self.cursor()
 
             cursor.execute(
-                f"""
-                SELECT * FROM {self._NAME} WHERE rowid == ?
-                """,
+                self._GET_CONFIG_SQL,
                 (
-                    cursor.lastrowid,
+                    config_id,
                 ),
             )
             result = cursor.fetchone()
 
-            return models.SubscriptionValues(
-                **dict(result),
-            ) if result else None
+            return self._get_values(
+                values_type=models.ConfigValues,
+                result=result,
+            )
 
-        def get_subscription(self, subscription_id: int) -> models.SubscriptionValues | None:
+        def get_all_configs(self) -> list[models.ConfigValues] | None:
             cursor = self.cursor()
 
             cursor.execute(
-                f"""
-                SELECT * FROM {self._NAME} WHERE id == ?
-                """,
-                (
-                    subscription_id,
-                ),
+                self._GET_ALL_CONFIGS_SQL,
             )
-            result = cursor.fetchone()
 
-            return models.SubscriptionValues(
-                **dict(result),
-            ) if result else None
+            return self._get_values_list(
+                values_type=models.ConfigValues,
+                rows=cursor.fetchall(),
+            )
 
-        def get_all_subscriptions(self) -> list[models.SubscriptionValues]:
+        def get_all_configs_labels(self) -> list[models.ConfigValues]:
             cursor = self.cursor()
 
             cursor.execute(
-                f"""
-                SELECT * FROM {self._NAME}
-                """,
+                self._GET_ALL_CONFIGS_LABELS_SQL,
             )
 
-            return [
-                models.SubscriptionValues(
-                    **dict(row),
-                ) for row in cursor.fetchall()
-            ]
+            return self._get_values_list(
+                values_type=models.ConfigValues,
+                rows=cursor.fetchall(),
+            )
 
-        def get_user_subscriptions(self, tg_id: int) -> list[models.SubscriptionValues]:
+        def get_configs_count(self) -> int:
             cursor = self.cursor()
 
             cursor.execute(
-                f"""
-                SELECT * FROM {self._NAME} WHERE tg_id == ?
-                """,
-                (
-                    tg_id,
-                ),
+                self._GET_CONFIGS_COUNT_SQL,
             )
 
-            return [
-                models.SubscriptionValues(
-                    **dict(row),
-                ) for row in cursor.fetchall()
-            ]
+            return cursor.fetchone()[0]
 
-        def get_user_active_subscriptions(self, tg_id: int) -> list[models.SubscriptionValues]:
-            subscriptions = self.get_user_subscriptions(tg_id)
+        def get_available_configs(self) -> list[models.ConfigValues] | None:
+            cursor = self.cursor()
 
-            return list(
-                filter(
-                    lambda subscription: not subscription.is_expired,
-                    subscriptions,
-                )
+            cursor.execute(
+                self._GET_AVAILABLE_CONFIGS_SQL,
             )
 
-        def get_unchecked_expired_subscriptions(self) -> list[models.SubscriptionValues]:
-            subscriptions = self.get_all_subscriptions()
-
-            return list(
-                filter(
-                    lambda subscription: not subscription.is_checked and subscription.is_expired,
-                    subscriptions,
-                )
+            return self._get_values_list(
+                values_type=models.ConfigValues,
+                rows=cursor.fetchall(),
             )
 
-        def edit_expires_at(self, subscription_id: int, expires_at: int) -> None:
+        def get_available_config_ids(self, timestamp: int, limit: int) -> list[int]:
             cursor = self.cursor()
 
             cursor.execute(
-                f"""
-                UPDATE {self._NAME} SET expires_at = ? WHERE id == ?
-                """,
+                self._GET_AVAILABLE_CONFIG_IDS_SQL,
                 (
-                    expires_at,
-                    subscription_id,
+                    timestamp,
+                    limit,
                 ),
             )
 
-            self.commit()
+            return [row[0] for row in cursor.fetchall()]
 
-        def switch_active(self, subscription_id: int) -> None:
+        def get_available_configs_count(self, timestamp: int) -> int:
             cursor = self.cursor()
 
-            current_subscription = self.get_subscription(
-                subscription_id=subscription_id,
-            )
-
             cursor.execute(
-                f"""
-                UPDATE {self._NAME} SET is_active = ? WHERE id == ?
-                """,
+                self._GET_AVAILABLE_CONFIGS_COUNT_SQL,
                 (
-                    int(
-                        not bool(current_subscription.is_active)
-                    ),
-                    subscription_id,
+                    timestamp,
                 ),
             )
 
-            self.commit()
+            return cursor.fetchone()[0]
 
-        def switch_checked(self, subscription_id: int) -> None:
+        def reserve_config(self, config_id: int, timestamp: int, reserved_until: int) -> bool:
             cursor = self.cursor()
 
-            current_subscription = self.get_subscription(
-                subscription_id=subscription_id,
-            )
-
-            cursor.execute(
-                f"""
-                UPDATE {self._NAME} SET is_checked = ? WHERE id == ?
-                """,
-                (
-                    int(
-                        not bool(current_subscription.is_checked)
+            with self:
+                cursor.execute(
+                    self._RESERVE_CONFIG_SQL,
+                    (
+                        reserved_until,
+                        config_id,
+                        timestamp,
                     ),
-                    subscription_id,
-                ),
-            )
+                )
 
-            self.commit()
+            return bool(cursor.rowcount)
 
-    class UsersDatabase(pyquoks.data.IDatabaseManager.IDatabase):
-        _NAME = "users"
-        _SQL = f"""
-        CREATE TABLE IF NOT EXISTS {_NAME} (
-        tg_id INTEGER PRIMARY KEY NOT NULL,
-        tg_username TEXT,
-        balance INTEGER NOT NULL,
-        referrer_id INTEGER
+        def release_config(self, config_id: int) -> None:
+            cursor = self.cursor()
+
+            with self:
+                cursor.execute(
+                    self._RELEASE_CONFIG_SQL,
+                    (
+                        config_id,
+                    ),
+                )
+
+        def get_recyclable_configs(self, timestamp: int, limit: int) -> list[models.ConfigValues]:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._GET_RECYCLABLE_CONFIGS_SQL,
+                (
+                    timestamp,
+                    limit,
+                ),
+            )
+
+            return self._get_values_list(
+                values_type=models.ConfigValues,
+                rows=cursor.fetchall(),
+            )
+
+        def recycle_configs(self, configs: list[tuple[str | None, int, int]]) -> int:
+            cursor = self.cursor()
+            current_blobs = {
+                data: self._get_blob(data) for data, _, _ in configs if data is not None
+            }
+
+            with self:
+                self._add_blobs(
+                    cursor=cursor,
+                    blobs=current_blobs.values(),
+                )
+                cursor.executemany(
+                    self._RECYCLE_CONFIGS_SQL,
+                    [
+                        (
+                            current_blobs[data][0] if data is not None else None,
+                            config_id,
+                            subscription_id,
+                        ) for data, config_id, subscription_id in configs
+                    ],
+                )
+                recycled_count = cursor.rowcount
+
+                if current_blobs:
+                    self._delete_unused_blobs(
+                        cursor=cursor,
+                    )
+
+            return recycled_count
+
+        def attach_subscription(self, config_id: int, subscription_id: int) -> None:
+            cursor = self.cursor()
+
+            with self:
+                cursor.execute(
+                    self._ATTACH_SUBSCRIPTION_SQL,
+                    (
+                        subscription_id,
+                        config_id,
+                    ),
+                )
+
+        def get_config_names(self) -> set[str]:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._GET_CONFIG_NAMES_SQL,
+            )
+
+            return {row[0] for row in cursor.fetchall()}
+
+        def check_config_name(self, name: str) -> bool:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._CHECK_CONFIG_NAME_SQL,
+                (
+                    name,
+                ),
+            )
+
+            return not bool(cursor.fetchone()[0])
+
+    class LedgerDatabase(IDatabase):
+        _NAME = "ledger"
+        _SQL = f"""
+        CREATE TABLE IF NOT EXISTS {_NAME} (
+        id INTEGER PRIMARY KEY NOT NULL,
+        transaction_id INTEGER NOT NULL,
+        account_type INTEGER NOT NULL,
+        account_id INTEGER NOT NULL,
+        kind INTEGER NOT NULL,
+        amount INTEGER NOT NULL,
+        date INTEGER NOT NULL,
+        reference TEXT
+        )
+        """
+        _MIGRATIONS = {
+            1: (
+                (
+                    models.MigrationType.STATEMENT,
+                    f"CREATE INDEX IF NOT EXISTS {_NAME}_account ON {_NAME} (account_type, account_id, id)",
+                ),
+                (
+                    models.MigrationType.STATEMENT,
+                    f"CREATE INDEX IF NOT EXISTS {_NAME}_transaction_id ON {_NAME} (transaction_id)",
+                ),
+            ),
+        }
+        _SNAPSHOTS_ALIAS = "snapshots_database"
+        _USERS_ALIAS = "users_database"
+        _GET_TRANSACTION_SQL = f"""
+        SELECT * FROM {_NAME} WHERE transaction_id == ? ORDER BY id
+        """
+        _GET_USER_ENTRIES_SQL = f"""
+        SELECT * FROM {_NAME} WHERE account_type == ? AND account_id == ? AND id > ? ORDER BY id
+        """
+        _GET_LATEST_SNAPSHOT_SQL = f"""
+        SELECT balance, entry_id FROM {_SNAPSHOTS_ALIAS}.ledger_snapshots
+        WHERE tg_id == ? ORDER BY entry_id DESC LIMIT 1
+        """
+        _GET_BALANCE_SQL = f"""
+        SELECT COALESCE(SUM(amount), 0) FROM {_NAME}
+        WHERE account_type == ? AND account_id == ? AND id > ?
+        """
+        _GET_USER_BALANCE_SQL = f"""
+        SELECT balance FROM {_USERS_ALIAS}.users WHERE tg_id == ?
+        """
+        _CHECK_ENTRIES_SQL = f"""
+        SELECT EXISTS (SELECT 1 FROM {_NAME})
+        """
+        _ADD_OPENING_BALANCES_SQL = f"""
+        INSERT INTO {_NAME} (
+        transaction_id,
+        account_type,
+        account_id,
+        kind,
+        amount,
+        date
+        )
+        SELECT 0, ?, tg_id, ?, balance, ?
+        FROM {_USERS_ALIAS}.users WHERE balance != 0
+        """
+        _ADD_OPENING_COUNTER_SQL = f"""
+        INSERT INTO {_NAME} (
+        transaction_id,
+        account_type,
+        account_id,
+        kind,
+        amount,
+        date
         )
+        SELECT 0, ?, 0, ?, -SUM(amount), ?
+        FROM {_NAME} HAVING COUNT(*) > 0
+        """
+        _ADD_SNAPSHOTS_SQL = f"""
+        INSERT INTO {_SNAPSHOTS_ALIAS}.ledger_snapshots (
+        tg_id,
+        entry_id,
+        balance,
+        date
+        )
+        SELECT
+        entries.account_id,
+        MAX(entries.id),
+        SUM(entries.amount) + COALESCE((
+        SELECT snapshots.balance FROM {_SNAPSHOTS_ALIAS}.ledger_snapshots AS snapshots
+        WHERE snapshots.tg_id == entries.account_id ORDER BY snapshots.entry_id DESC LIMIT 1
+        ), 0),
+        ?
+        FROM {_NAME} AS entries
+        WHERE entries.account_type == ? AND entries.id > (
+        SELECT COALESCE(MAX(entry_id), 0) FROM {_SNAPSHOTS_ALIAS}.ledger_snapshots
+        )
+        GROUP BY entries.account_id
         """
 
-        def add_user(
-                self,
-                tg_id: int,
-                tg_username: str | None,
-                balance: int,
-                referrer_id: int | None,
-        ) -> None:
+        def get_transaction(self, transaction_id: int) -> list[models.LedgerEntryValues]:
             cursor = self.cursor()
 
             cursor.execute(
-                f"""
-                INSERT OR IGNORE INTO {self._NAME} (
-                tg_id,
-                tg_username,
-                balance,
-                referrer_id
-                )
-                VALUES (?, ?, ?, ?)
-                """,
+                self._GET_TRANSACTION_SQL,
                 (
+                    transaction_id,
+                ),
+            )
+
+            return self._get_values_list(
+                values_type=models.LedgerEntryValues,
+                rows=cursor.fetchall(),
+            )
+
+        def get_user_entries(self, tg_id: int, entry_id: int = 0) -> list[models.LedgerEntryValues]:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._GET_USER_ENTRIES_SQL,
+                (
+                    models.LedgerAccountType.USER.value,
                     tg_id,
-                    tg_username,
-                    balance,
-                    referrer_id,
+                    entry_id,
                 ),
             )
 
-            self.commit()
+            return self._get_values_list(
+                values_type=models.LedgerEntryValues,
+                rows=cursor.fetchall(),
+            )
 
-        def get_user(self, tg_id: int) -> models.UserValues | None:
+        def get_balance(self, tg_id: int) -> int:
             cursor = self.cursor()
 
             cursor.execute(
-                f"""
-                SELECT * FROM {self._NAME} WHERE tg_id == ?
-                """,
+                self._GET_LATEST_SNAPSHOT_SQL,
+                (
+                    tg_id,
+                ),
+            )
+            snapshot = cursor.fetchone()
+
+            cursor.execute(
+                self._GET_BALANCE_SQL,
+                (
+                    models.LedgerAccountType.USER.value,
+                    tg_id,
+                    snapshot["entry_id"] if snapshot else int(),
+                ),
+            )
+
+            return (snapshot["balance"] if snapshot else int()) + cursor.fetchone()[0]
+
+        def verify_balance(self, tg_id: int) -> bool:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._GET_USER_BALANCE_SQL,
                 (
                     tg_id,
                 ),
             )
             result = cursor.fetchone()
 
-            return models.UserValues(
-                **dict(result),
-            ) if result else None
+            return self._is_balance_verified(
+                user_balance=result[0] if result else None,
+                ledger_balance=self.get_balance(
+                    tg_id=tg_id,
+                ),
+            )
 
-        def get_all_users(self) -> list[models.UserValues]:
+        def add_opening_balances(self, date: int) -> int:
             cursor = self.cursor()
 
             cursor.execute(
-                f"""
-                SELECT * FROM {self._NAME}
-                """,
+                self._CHECK_ENTRIES_SQL,
             )
 
-            return [
-                models.UserValues(
-                    **dict(row),
-                ) for row in cursor.fetchall()
-            ]
+            if cursor.fetchone()[0]:
+                return int()
 
-        def get_ref_count(self, tg_id: int) -> int:
+            with self:
+                cursor.execute(
+                    self._ADD_OPENING_BALANCES_SQL,
+                    (
+                        models.LedgerAccountType.USER.value,
+                        models.LedgerEntryType.OPENING.value,
+                        date,
+                    ),
+                )
+                opening_count = cursor.rowcount
+
+                cursor.execute(
+                    self._ADD_OPENING_COUNTER_SQL,
+                    (
+                        models.LedgerEntryType.OPENING.counter_account_type.value,
+                        models.LedgerEntryType.OPENING.value,
+                        date,
+                    ),
+                )
+
+            return opening_count
+
+        def add_snapshots(self, date: int) -> int:
+            cursor = self.cursor()
+
+            with self:
+                cursor.execute(
+                    self._ADD_SNAPSHOTS_SQL,
+                    (
+                        date,
+                        models.LedgerAccountType.USER.value,
+                    ),
+                )
+
+            return cursor.rowcount
+
+    class LedgerSnapshotsDatabase(IDatabase):
+        _NAME = "ledger_snapshots"
+        _SQL = f"""
+        CREATE TABLE IF NOT EXISTS {_NAME} (
+        id INTEGER PRIMARY KEY NOT NULL,
+        tg_id INTEGER NOT NULL,
+        entry_id INTEGER NOT NULL,
+        balance INTEGER NOT NULL,
+        date INTEGER NOT NULL
+        )
+        """
+        _MIGRATIONS = {
+            1: (
+                (
+                    models.MigrationType.STATEMENT,
+                    f"CREATE INDEX IF NOT EXISTS {_NAME}_tg_id_entry_id ON {_NAME} (tg_id, entry_id)",
+                ),
+                (
+                    models.MigrationType.STATEMENT,
+                    f"CREATE INDEX IF NOT EXISTS {_NAME}_entry_id ON {_NAME} (entry_id)",
+                ),
+            ),
+        }
+        _GET_LATEST_SNAPSHOT_SQL = f"""
+        SELECT * FROM {_NAME} WHERE tg_id == ? ORDER BY entry_id DESC LIMIT 1
+        """
+
+        def get_latest_snapshot(self, tg_id: int) -> models.LedgerSnapshotValues | None:
             cursor = self.cursor()
 
             cursor.execute(
-                f"""
-                SELECT COUNT(*) from {self._NAME} WHERE referrer_id == ?
-                """,
+                self._GET_LATEST_SNAPSHOT_SQL,
                 (
                     tg_id,
                 ),
             )
+            result = cursor.fetchone()
 
-            return cursor.fetchone()[0]
+            return self._get_values(
+                values_type=models.LedgerSnapshotValues,
+                result=result,
+            )
+
+    class PaymentsDatabase(IDatabase):
+        _NAME = "payments"
+        _SQL = f"""
+        CREATE TABLE IF NOT EXISTS {_NAME} (
+        id INTEGER PRIMARY KEY NOT NULL,
+        provider_id TEXT,
+        amount INTEGER NOT NULL,
+        currency TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        date INTEGER NOT NULL,
+        tg_id INTEGER NOT NULL
+        )
+        """
+        _MIGRATIONS = {
+            1: (
+                (
+                    models.MigrationType.METHOD,
+                    "_remove_duplicate_payments",
+                ),
+                (
+                    models.MigrationType.STATEMENT,
+                    f"CREATE UNIQUE INDEX IF NOT EXISTS {_NAME}_provider_id ON {_NAME} (provider_id)",
+                ),
+                (
+                    models.MigrationType.STATEMENT,
+                    f"CREATE INDEX IF NOT EXISTS {_NAME}_tg_id_provider_id ON {_NAME} (tg_id, provider_id)",
+                ),
+            ),
+        }
+        _USERS_ALIAS = "users_database"
+        _ADD_PAYMENT_SQL = f"""
+        INSERT INTO {_NAME} (
+        provider_id,
+        amount,
+        currency,
+        payload,
+        date,
+        tg_id
+        )
+        VALUES (?, ?, ?, ?, ?, ?)
+        """
+        _GET_BY_ROWID_SQL = f"""
+        SELECT * FROM {_NAME} WHERE rowid == ?
+        """
+        _GET_PAYMENT_SQL = f"""
+        SELECT * FROM {_NAME} WHERE id == ?
+        """
+        _GET_ALL_PAYMENTS_SQL = f"""
+        SELECT * FROM {_NAME}
+        """
+        _GET_ALL_PAYMENTS_LABELS_SQL = f"""
+        SELECT id, amount FROM {_NAME}
+        """
+        _GET_PAYMENTS_COUNT_SQL = f"""
+        SELECT COUNT(*) FROM {_NAME}
+        """
+        _GET_USER_PAYMENTS_SQL = f"""
+        SELECT * FROM {_NAME} WHERE tg_id == ?
+        """
+        _GET_USER_PAYMENTS_LABELS_SQL = f"""
+        SELECT id, amount FROM {_NAME} WHERE tg_id == ?
+        """
+        _CHECK_PROVIDER_PAYMENT_SQL = f"""
+        SELECT EXISTS (SELECT 1 FROM {_NAME} WHERE provider_id == ?)
+        """
+        _ADD_USER_BALANCE_SQL = f"""
+        UPDATE {_USERS_ALIAS}.users
+        SET balance = balance + ? WHERE tg_id == ?
+        """
+        _CHECK_FIRST_PAYMENT_SQL = f"""
+        SELECT EXISTS (SELECT 1 FROM {_NAME} WHERE tg_id == ? AND provider_id IS NOT NULL)
+        """
+        _GET_DUPLICATE_PAYMENTS_SQL = f"""
+        SELECT * FROM {_NAME}
+        WHERE provider_id IS NOT NULL AND id NOT IN (
+        SELECT MIN(id) FROM {_NAME} WHERE provider_id IS NOT NULL GROUP BY provider_id
+        )
+        """
+        _REMOVE_PAYMENT_SQL = f"""
+        DELETE FROM {_NAME} WHERE id == ?
+        """
+
+        def _remove_duplicate_payments(self, cursor: sqlite3.Cursor) -> None:
+            cursor.execute(
+                self._GET_DUPLICATE_PAYMENTS_SQL,
+            )
+            duplicate_payments = self._get_values_list(
+                values_type=models.PaymentValues,
+                rows=cursor.fetchall(),
+            )
+
+            if not duplicate_payments:
+                return
+
+            cursor.execute(
+                self._CHECK_LEDGER_ENTRIES_SQL,
+            )
+            is_ledger_started = bool(cursor.fetchone()[0])
+
+            for payment in duplicate_payments:
+                cursor.execute(
+                    self._REMOVE_PAYMENT_SQL,
+                    (
+                        payment.id,
+                    ),
+                )
+                cursor.execute(
+                    self._ADD_USER_BALANCE_SQL,
+                    (
+                        -payment.amount,
+                        payment.tg_id,
+                    ),
+                )
 
-        def edit_balance(self, tg_id: int, balance: int) -> None:
+                if is_ledger_started:
+                    self._add_ledger_transaction(
+                        cursor=cursor,
+                        kind=models.LedgerEntryType.ADJUSTMENT,
+                        tg_id=payment.tg_id,
+                        amount=-payment.amount,
+                        date=payment.date,
+                        reference=payment.provider_id,
+                    )
+
+                if self._LOGGER:
+                    self._LOGGER.warning(
+                        f"{self._remove_duplicate_payments.__name__} ({payment.id=}, {payment.amount=})",
+                    )
+
+        def add_payment(
+                self,
+                provider_id: str | None,
+                amount: int,
+                currency: str,
+                payload: str,
+                date: int,
+                tg_id: int,
+        ) -> models.PaymentValues | None:
             cursor = self.cursor()
 
+            with self:
+                cursor.execute(
+                    self._ADD_PAYMENT_SQL,
+                    (
+                        provider_id,
+                        amount,
+                        currency,
+                        payload,
+                        date,
+                        tg_id,
+                    ),
+                )
+
             cursor.execute(
-                f"""
-                UPDATE {self._NAME} SET balance = ? WHERE tg_id == ?
-                """,
+                self._GET_BY_ROWID_SQL,
                 (
-                    balance,
-                    tg_id,
+                    cursor.lastrowid,
                 ),
             )
+            result = cursor.fetchone()
 
-            self.commit()
+            return self._get_values(
+                values_type=models.PaymentValues,
+                result=result,
+            )
 
-        def add_balance(self, tg_id: int, amount: int) -> None:
-            current_user = self.get_user(tg_id)
+        def get_payment(self, payment_id: int) -> models.PaymentValues | None:
+            cursor = self.cursor()
 
-            self.edit_balance(
-                tg_id=tg_id,
-                balance=current_user.balance + amount,
+            cursor.execute(
+                self._GET_PAYMENT_SQL,
+                (
+                    payment_id,
+                ),
             )
+            result = cursor.fetchone()
 
-        def reduce_balance(self, tg_id: int, amount: int) -> None:
-            current_user = self.get_user(tg_id)
+            return self._get_values(
+                values_type=models.PaymentValues,
+                result=result,
+            )
 
-            self.edit_balance(
-                tg_id=tg_id,
-                balance=current_user.balance - amount,
+        def get_all_payments(self) -> list[models.PaymentValues] | None:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._GET_ALL_PAYMENTS_SQL,
             )
 
-    _DATABASE_OBJECTS = {
-        "config": ConfigsDatabase,
-        "payments": PaymentsDatabase,
-        "subscriptions": SubscriptionsDatabase,
-        "users": UsersDatabase,
-    }
-    config: ConfigsDatabase
-    payments: PaymentsDatabase
-    subscriptions: SubscriptionsDatabase
-    users: UsersDatabase
+            return self._get_values_list(
+                values_type=models.PaymentValues,
+                rows=cursor.fetchall(),
+            )
 
+        def get_all_payments_labels(self) -> list[models.PaymentValues]:
+            cursor = self.cursor()
 
-# endregion
+            cursor.execute(
+                self._GET_ALL_PAYMENTS_LABELS_SQL,
+            )
 
-# region Services
+            return self._get_values_list(
+                values_type=models.PaymentValues,
+                rows=cursor.fetchall(),
+            )
 
-class LoggerService(pyquoks.data.LoggerService):
-    def log_user_interaction(self, user: aiogram.types.User, interaction: str) -> None:
-        user_info = f"@{user.username} ({user.id})" if user.username else user.id
-        self.info(f"{user_info} - \"{interaction}\"")
+        def get_payments_count(self) -> int:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._GET_PAYMENTS_COUNT_SQL,
+            )
+
+            return cursor.fetchone()[0]
+
+        def get_user_payments(self, tg_id: int) -> list[models.PaymentValues]:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._GET_USER_PAYMENTS_SQL,
+                (
+                    tg_id,
+                ),
+            )
+
+            return self._get_values_list(
+                values_type=models.PaymentValues,
+                rows=cursor.fetchall(),
+            )
+
+        def get_user_payments_labels(self, tg_id: int) -> list[models.PaymentValues]:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._GET_USER_PAYMENTS_LABELS_SQL,
+                (
+                    tg_id,
+                ),
+            )
+
+            return self._get_values_list(
+                values_type=models.PaymentValues,
+                rows=cursor.fetchall(),
+            )
+
+        def check_provider_payment(self, provider_id: str) -> bool:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._CHECK_PROVIDER_PAYMENT_SQL,
+                (
+                    provider_id,
+                ),
+            )
+
+            return bool(cursor.fetchone()[0])
+
+        def add_successful_payment(
+                self,
+                provider_id: str,
+                amount: int,
+                currency: str,
+                payload: str,
+                date: int,
+                tg_id: int,
+                referrer_id: int | None,
+                referrer_amount: int,
+                referrer_payload: str | None,
+        ) -> bool:
+            cursor = self.cursor()
+
+            try:
+                with self:
+                    cursor.execute(
+                        self._ADD_PAYMENT_SQL,
+                        (
+                            provider_id,
+                            amount,
+                            currency,
+                            payload,
+                            date,
+                            tg_id,
+                        ),
+                    )
+                    cursor.execute(
+                        self._ADD_USER_BALANCE_SQL,
+                        (
+                            amount,
+                            tg_id,
+                        ),
+                    )
+                    self._add_ledger_transaction(
+                        cursor=cursor,
+                        kind=models.LedgerEntryType.PAYMENT,
+                        tg_id=tg_id,
+                        amount=amount,
+                        date=date,
+                        reference=provider_id,
+                    )
+
+                    if referrer_id:
+                        cursor.execute(
+                            self._ADD_PAYMENT_SQL,
+                            (
+                                None,
+                                referrer_amount,
+                                currency,
+                                referrer_payload,
+                                date,
+                                referrer_id,
+                            ),
+                        )
+                        cursor.execute(
+                            self._ADD_USER_BALANCE_SQL,
+                            (
+                                referrer_amount,
+                                referrer_id,
+                            ),
+                        )
+                        self._add_ledger_transaction(
+                            cursor=cursor,
+                            kind=models.LedgerEntryType.REFERRAL,
+                            tg_id=referrer_id,
+                            amount=referrer_amount,
+                            date=date,
+                            reference=provider_id,
+                        )
+            except sqlite3.IntegrityError:
+                return False
+
+            return True
+
+        def check_first_payment(self, tg_id: int) -> bool:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._CHECK_FIRST_PAYMENT_SQL,
+                (
+                    tg_id,
+                ),
+            )
+
+            return not bool(cursor.fetchone()[0])
+
+    class SubscriptionsDatabase(IDatabase):
+        _NAME = "subscriptions"
+        _SQL = f"""
+        CREATE TABLE IF NOT EXISTS {_NAME} (
+        id INTEGER PRIMARY KEY NOT NULL,
+        plan_id INTEGER NOT NULL,
+        is_active INTEGER NOT NULL,
+        is_checked INTEGER NOT NULL,
+        subscribed_at INTEGER NOT NULL,
+        expires_at INTEGER NOT NULL,
+        tg_id INTEGER NOT NULL,
+        config_id INTEGER NOT NULL
+        )
+        """
+        _MIGRATIONS = {
+            1: (
+                (
+                    models.MigrationType.STATEMENT,
+                    f"CREATE INDEX IF NOT EXISTS {_NAME}_tg_id_expires_at ON {_NAME} (tg_id, expires_at)",
+                ),
+            ),
+        }
+        _ADD_SUBSCRIPTION_SQL = f"""
+        INSERT INTO {_NAME} (
+        plan_id,
+        is_active,
+        is_checked,
+        subscribed_at,
+        expires_at,
+        tg_id,
+        config_id
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """
+        _GET_BY_ROWID_SQL = f"""
+        SELECT * FROM {_NAME} WHERE rowid == ?
+        """
+        _GET_SUBSCRIPTION_SQL = f"""
+        SELECT * FROM {_NAME} WHERE id == ?
+        """
+        _GET_ALL_SUBSCRIPTIONS_SQL = f"""
+        SELECT * FROM {_NAME}
+        """
+        _GET_ALL_SUBSCRIPTIONS_LABELS_SQL = f"""
+        SELECT id, plan_id FROM {_NAME}
+        """
+        _GET_SUBSCRIPTIONS_COUNT_SQL = f"""
+        SELECT COUNT(*) FROM {_NAME}
+        """
+        _GET_USER_SUBSCRIPTIONS_SQL = f"""
+        SELECT * FROM {_NAME} WHERE tg_id == ?
+        """
+        _GET_USER_SUBSCRIPTIONS_LABELS_SQL = f"""
+        SELECT id, plan_id FROM {_NAME} WHERE tg_id == ?
+        """
+        _GET_USER_ACTIVE_SUBSCRIPTIONS_SQL = f"""
+        SELECT * FROM {_NAME} WHERE tg_id == ? AND expires_at >= ?
+        """
+        _GET_USER_ACTIVE_SUBSCRIPTIONS_LABELS_SQL = f"""
+        SELECT id, plan_id FROM {_NAME} WHERE tg_id == ? AND expires_at >= ?
+        """
+        _GET_USER_ACTIVE_SUBSCRIPTIONS_COUNT_SQL = f"""
+        SELECT COUNT(*) FROM {_NAME} WHERE tg_id == ? AND expires_at >= ?
+        """
+        _GET_UNCHECKED_EXPIRED_SUBSCRIPTIONS_SQL = f"""
+        SELECT * FROM {_NAME} WHERE is_checked == 0 AND expires_at < ?
+        """
+        _EDIT_EXPIRES_AT_SQL = f"""
+        UPDATE {_NAME} SET expires_at = ? WHERE id == ?
+        """
+        _SWITCH_ACTIVE_SQL = f"""
+        UPDATE {_NAME} SET is_active = ? WHERE id == ?
+        """
+        _SWITCH_CHECKED_SQL = f"""
+        UPDATE {_NAME} SET is_checked = ? WHERE id == ?
+        """
+
+        def add_subscription(
+                self,
+                plan_id: int,
+                is_active: int,
+                is_checked: int,
+                subscribed_at: int,
+                expires_at: int,
+                tg_id: int,
+                config_id: int,
+        ) -> models.SubscriptionValues | None:
+            cursor = self.cursor()
+
+            with self:
+                cursor.execute(
+                    self._ADD_SUBSCRIPTION_SQL,
+                    (
+                        plan_id,
+                        is_active,
+                        is_checked,
+                        subscribed_at,
+                        expires_at,
+                        tg_id,
+                        config_id,
+                    ),
+                )
+
+            cursor.execute(
+                self._GET_BY_ROWID_SQL,
+                (
+                    cursor.lastrowid,
+                ),
+            )
+            result = cursor.fetchone()
+
+            return self._get_values(
+                values_type=models.SubscriptionValues,
+                result=result,
+            )
+
+        def get_subscription(self, subscription_id: int) -> models.SubscriptionValues | None:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._GET_SUBSCRIPTION_SQL,
+                (
+                    subscription_id,
+                ),
+            )
+            result = cursor.fetchone()
+
+            return self._get_values(
+                values_type=models.SubscriptionValues,
+                result=result,
+            )
+
+        def get_all_subscriptions(self) -> list[models.SubscriptionValues]:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._GET_ALL_SUBSCRIPTIONS_SQL,
+            )
+
+            return self._get_values_list(
+                values_type=models.SubscriptionValues,
+                rows=cursor.fetchall(),
+            )
+
+        def get_all_subscriptions_labels(self) -> list[models.SubscriptionValues]:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._GET_ALL_SUBSCRIPTIONS_LABELS_SQL,
+            )
+
+            return self._get_values_list(
+                values_type=models.SubscriptionValues,
+                rows=cursor.fetchall(),
+            )
+
+        def get_subscriptions_count(self) -> int:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._GET_SUBSCRIPTIONS_COUNT_SQL,
+            )
+
+            return cursor.fetchone()[0]
+
+        def get_user_subscriptions(self, tg_id: int) -> list[models.SubscriptionValues]:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._GET_USER_SUBSCRIPTIONS_SQL,
+                (
+                    tg_id,
+                ),
+            )
+
+            return self._get_values_list(
+                values_type=models.SubscriptionValues,
+                rows=cursor.fetchall(),
+            )
+
+        def get_user_subscriptions_labels(self, tg_id: int) -> list[models.SubscriptionValues]:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._GET_USER_SUBSCRIPTIONS_LABELS_SQL,
+                (
+                    tg_id,
+                ),
+            )
+
+            return self._get_values_list(
+                values_type=models.SubscriptionValues,
+                rows=cursor.fetchall(),
+            )
+
+        def get_user_active_subscriptions(self, tg_id: int, timestamp: int) -> list[models.SubscriptionValues]:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._GET_USER_ACTIVE_SUBSCRIPTIONS_SQL,
+                (
+                    tg_id,
+                    timestamp,
+                ),
+            )
+
+            return self._get_values_list(
+                values_type=models.SubscriptionValues,
+                rows=cursor.fetchall(),
+            )
+
+        def get_user_active_subscriptions_labels(self, tg_id: int, timestamp: int) -> list[models.SubscriptionValues]:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._GET_USER_ACTIVE_SUBSCRIPTIONS_LABELS_SQL,
+                (
+                    tg_id,
+                    timestamp,
+                ),
+            )
+
+            return self._get_values_list(
+                values_type=models.SubscriptionValues,
+                rows=cursor.fetchall(),
+            )
+
+        def get_user_active_subscriptions_count(self, tg_id: int, timestamp: int) -> int:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._GET_USER_ACTIVE_SUBSCRIPTIONS_COUNT_SQL,
+                (
+                    tg_id,
+                    timestamp,
+                ),
+            )
+
+            return cursor.fetchone()[0]
+
+        def get_unchecked_expired_subscriptions(self, timestamp: int) -> list[models.SubscriptionValues]:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._GET_UNCHECKED_EXPIRED_SUBSCRIPTIONS_SQL,
+                (
+                    timestamp,
+                ),
+            )
+
+            return self._get_values_list(
+                values_type=models.SubscriptionValues,
+                rows=cursor.fetchall(),
+            )
+
+        def edit_expires_at(self, subscription_id: int, expires_at: int) -> None:
+            cursor = self.cursor()
+
+            with self:
+                cursor.execute(
+                    self._EDIT_EXPIRES_AT_SQL,
+                    (
+                        expires_at,
+                        subscription_id,
+                    ),
+                )
+
+        def switch_active(self, subscription_id: int) -> None:
+            cursor = self.cursor()
+
+            with self:
+                current_subscription = self.get_subscription(
+                    subscription_id=subscription_id,
+                )
+
+                cursor.execute(
+                    self._SWITCH_ACTIVE_SQL,
+                    (
+                        int(
+                            not bool(current_subscription.is_active)
+                        ),
+                        subscription_id,
+                    ),
+                )
+
+        def switch_checked(self, subscription_id: int) -> None:
+            cursor = self.cursor()
+
+            with self:
+                current_subscription = self.get_subscription(
+                    subscription_id=subscription_id,
+                )
+
+                cursor.execute(
+                    self._SWITCH_CHECKED_SQL,
+                    (
+                        int(
+                            not bool(current_subscription.is_checked)
+                        ),
+                        subscription_id,
+                    ),
+                )
+
+    class UsersDatabase(IDatabase):
+        _NAME = "users"
+        _SQL = f"""
+        CREATE TABLE IF NOT EXISTS {_NAME} (
+        tg_id INTEGER PRIMARY KEY NOT NULL,
+        tg_username TEXT,
+        balance INTEGER NOT NULL,
+        referrer_id INTEGER,
+        referrals_count INTEGER NOT NULL DEFAULT 0
+        )
+        """
+        _MIGRATIONS = {
+            1: (
+                (
+                    models.MigrationType.COLUMN,
+                    "referrals_count",
+                    "INTEGER NOT NULL DEFAULT 0",
+                ),
+                (
+                    models.MigrationType.STATEMENT,
+                    f"CREATE INDEX IF NOT EXISTS {_NAME}_referrer_id ON {_NAME} (referrer_id)",
+                ),
+                (
+                    models.MigrationType.BACKFILL,
+                    f"""
+                    UPDATE {_NAME} SET referrals_count = (
+                    SELECT COUNT(*) FROM {_NAME} AS referrals WHERE referrals.referrer_id == {_NAME}.tg_id
+                    )
+                    WHERE rowid > ? AND rowid <= ?
+                    """,
+                ),
+            ),
+        }
+        _PAYMENTS_ALIAS = "payments_database"
+        _ADD_USER_SQL = f"""
+        INSERT OR IGNORE INTO {_NAME} (
+        tg_id,
+        tg_username,
+        balance,
+        referrer_id
+        )
+        VALUES (?, ?, ?, ?)
+        """
+        _ADD_REFERRAL_SQL = f"""
+        UPDATE {_NAME} SET referrals_count = referrals_count + 1 WHERE tg_id == ?
+        """
+        _GET_USER_SQL = f"""
+        SELECT * FROM {_NAME} WHERE tg_id == ?
+        """
+        _GET_ALL_USERS_SQL = f"""
+        SELECT * FROM {_NAME}
+        """
+        _GET_ALL_USERS_LABELS_SQL = f"""
+        SELECT tg_id, tg_username FROM {_NAME}
+        """
+        _GET_USERS_COUNT_SQL = f"""
+        SELECT COUNT(*) FROM {_NAME}
+        """
+        _GET_REF_COUNT_SQL = f"""
+        SELECT referrals_count FROM {_NAME} WHERE tg_id == ?
+        """
+        _GET_REFERRAL_TREE_SQL = f"""
+        WITH RECURSIVE referrals (tg_id, depth, path) AS (
+        SELECT tg_id, 0, printf('%020d', tg_id) FROM {_NAME} WHERE tg_id == ?
+        UNION ALL
+        SELECT {_NAME}.tg_id, referrals.depth + 1, referrals.path || printf('%020d', {_NAME}.tg_id)
+        FROM {_NAME} JOIN referrals ON {_NAME}.referrer_id == referrals.tg_id
+        WHERE referrals.depth < ?
+        )
+        SELECT {_NAME}.*, referrals.depth, (
+        SELECT COALESCE(SUM(amount), 0) FROM {_PAYMENTS_ALIAS}.payments
+        WHERE tg_id == referrals.tg_id AND provider_id IS NULL AND payload LIKE 'referral %'
+        ) AS earnings
+        FROM referrals JOIN {_NAME} ON {_NAME}.tg_id == referrals.tg_id
+        ORDER BY referrals.path
+        LIMIT ?
+        """
+        _GET_BALANCE_SQL = f"""
+        SELECT balance FROM {_NAME} WHERE tg_id == ?
+        """
+        _EDIT_BALANCE_SQL = f"""
+        UPDATE {_NAME} SET balance = ? WHERE tg_id == ?
+        """
+        _ADD_BALANCE_SQL = f"""
+        UPDATE {_NAME} SET balance = balance + ? WHERE tg_id == ?
+        """
+
+        def add_user(
+                self,
+                tg_id: int,
+                tg_username: str | None,
+                balance: int,
+                referrer_id: int | None,
+        ) -> None:
+            cursor = self.cursor()
+
+            with self:
+                cursor.execute(
+                    self._ADD_USER_SQL,
+                    (
+                        tg_id,
+                        tg_username,
+                        balance,
+                        referrer_id,
+                    ),
+                )
+
+                if cursor.rowcount and referrer_id:
+                    cursor.execute(
+                        self._ADD_REFERRAL_SQL,
+                        (
+                            referrer_id,
+                        ),
+                    )
+
+        def get_user(self, tg_id: int) -> models.UserValues | None:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._GET_USER_SQL,
+                (
+                    tg_id,
+                ),
+            )
+            result = cursor.fetchone()
+
+            return self._get_values(
+                values_type=models.UserValues,
+                result=result,
+            )
+
+        def get_all_users(self) -> list[models.UserValues]:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._GET_ALL_USERS_SQL,
+            )
+
+            return self._get_values_list(
+                values_type=models.UserValues,
+                rows=cursor.fetchall(),
+            )
+
+        def get_all_users_labels(self) -> list[models.UserValues]:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._GET_ALL_USERS_LABELS_SQL,
+            )
+
+            return self._get_values_list(
+                values_type=models.UserValues,
+                rows=cursor.fetchall(),
+            )
+
+        def get_users_count(self) -> int:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._GET_USERS_COUNT_SQL,
+            )
+
+            return cursor.fetchone()[0]
+
+        def get_ref_count(self, tg_id: int) -> int:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._GET_REF_COUNT_SQL,
+                (
+                    tg_id,
+                ),
+            )
+            result = cursor.fetchone()
+
+            return result[0] if result else int()
+
+        def get_referral_tree(self, tg_id: int, max_depth: int, limit: int) -> list[models.ReferralValues]:
+            cursor = self.cursor()
+
+            cursor.execute(
+                self._GET_REFERRAL_TREE_SQL,
+                (
+                    tg_id,
+                    max_depth,
+                    limit,
+                ),
+            )
+
+            return self._get_values_list(
+                values_type=models.ReferralValues,
+                rows=cursor.fetchall(),
+            )
+
+        def edit_balance(self, tg_id: int, balance: int, date: int) -> None:
+            cursor = self.cursor()
+
+            with self:
+                cursor.execute(
+                    self._GET_BALANCE_SQL,
+                    (
+                        tg_id,
+                    ),
+                )
+                result = cursor.fetchone()
+
+                cursor.execute(
+                    self._EDIT_BALANCE_SQL,
+                    (
+                        balance,
+                        tg_id,
+                    ),
+                )
+
+                if result:
+                    self._add_ledger_transaction(
+                        cursor=cursor,
+                        kind=models.LedgerEntryType.ADJUSTMENT,
+                        tg_id=tg_id,
+                        amount=balance - result[0],
+                        date=date,
+                        reference=None,
+                    )
+
+        def add_balance(
+                self,
+                tg_id: int,
+                amount: int,
+                kind: models.LedgerEntryType,
+                date: int,
+                reference: str | None = None,
+        ) -> None:
+            cursor = self.cursor()
+
+            with self:
+                cursor.execute(
+                    self._ADD_BALANCE_SQL,
+                    (
+                        amount,
+                        tg_id,
+                    ),
+                )
+
+                if cursor.rowcount:
+                    self._add_ledger_transaction(
+                        cursor=cursor,
+                        kind=kind,
+                        tg_id=tg_id,
+                        amount=amount,
+                        date=date,
+                        reference=reference,
+                    )
+
+        def reduce_balance(
+                self,
+                tg_id: int,
+                amount: int,
+                kind: models.LedgerEntryType,
+                date: int,
+                reference: str | None = None,
+        ) -> None:
+            self.add_balance(
+                tg_id=tg_id,
+                amount=-amount,
+                kind=kind,
+                date=date,
+                reference=reference,
+            )
+
+    _DATABASE_OBJECTS = {
+        "config": ConfigsDatabase,
+        "config_blobs": ConfigBlobsDatabase,
+        "ledger": LedgerDatabase,
+        "ledger_snapshots": LedgerSnapshotsDatabase,
+        "payments": PaymentsDatabase,
+        "subscriptions": SubscriptionsDatabase,
+        "users": UsersDatabase,
+    }
+    config: ConfigsDatabase
+    config_blobs: ConfigBlobsDatabase
+    ledger: LedgerDatabase
+    ledger_snapshots: LedgerSnapshotsDatabase
+    payments: PaymentsDatabase
+    subscriptions: SubscriptionsDatabase
+    users: UsersDatabase
+
+    def __init__(self, logger: logging.Logger | None = None) -> None:
+        self.IDatabase._LOGGER = logger
+
+        super().__init__()
+
+        self.payments.attach_database(
+            path=self.users.path,
+            alias=self.payments._USERS_ALIAS,
+        )
+        self.users.attach_database(
+            path=self.payments.path,
+            alias=self.users._PAYMENTS_ALIAS,
+        )
+
+        self.config.attach_database(
+            path=self.config_blobs.path,
+            alias=self.config._BLOBS_ALIAS,
+        )
+        self.config.attach_database(
+            path=self.subscriptions.path,
+            alias=self.config._SUBSCRIPTIONS_ALIAS,
+        )
+
+        for database in (self.payments, self.users):
+            database.attach_database(
+                path=self.ledger.path,
+                alias=database._LEDGER_ALIAS,
+            )
+
+        self.ledger.attach_database(
+            path=self.users.path,
+            alias=self.ledger._USERS_ALIAS,
+        )
+        self.ledger.attach_database(
+            path=self.ledger_snapshots.path,
+            alias=self.ledger._SNAPSHOTS_ALIAS,
+        )
+
+        self.migrate()
+
+
+class PostgresDatabaseManager(IDatabaseBackend):
+    class IDatabase(IDatabaseBackend.IDatabaseObject):
+        _OBSERVERS: list[typing.Callable[[str, float], None]] = list()
+        _SLOW_QUERY_OBSERVERS: list[typing.Callable[[str, float, list[str]], None]] = list()
+        _PROFILER: DatabaseManager.QueryProfiler | None = None
+        _LOCAL = threading.local()
+        _NAME: str
+        _MIGRATIONS: dict[int, tuple[str, ...]] = dict()
+        _SCHEMA_VERSION_NAME = "schema_version"
+        _LOCK_SCHEMA_VERSION_SQL = f"""
+        SELECT pg_advisory_xact_lock(hashtext('{_SCHEMA_VERSION_NAME}'))
+        """
+        _CREATE_SCHEMA_VERSION_SQL = f"""
+        CREATE TABLE IF NOT EXISTS {_SCHEMA_VERSION_NAME} (
+        name TEXT NOT NULL,
+        version INTEGER NOT NULL,
+        date BIGINT NOT NULL,
+        PRIMARY KEY (name, version)
+        )
+        """
+        _GET_SCHEMA_VERSION_SQL = f"""
+        SELECT COALESCE(MAX(version), 0) FROM {_SCHEMA_VERSION_NAME} WHERE name = $1
+        """
+        _ADD_SCHEMA_VERSION_SQL = f"""
+        INSERT INTO {_SCHEMA_VERSION_NAME} (
+        name,
+        version,
+        date
+        )
+        VALUES ($1, $2, EXTRACT(EPOCH FROM now())::bigint)
+        """
+        _ADD_LEDGER_TRANSACTION_SQL = """
+        INSERT INTO ledger (
+        transaction_id,
+        account_type,
+        account_id,
+        kind,
+        amount,
+        date,
+        reference
+        )
+        SELECT transactions.id, entries.account_type, entries.account_id, $1::integer, entries.amount, $2::bigint, $3::text
+        FROM (SELECT nextval('ledger_transaction_id_seq') AS id) AS transactions
+        CROSS JOIN (
+        VALUES ($4::integer, $5::bigint, $6::bigint), ($7::integer, 0::bigint, -$6::bigint)
+        ) AS entries (account_type, account_id, amount)
+        """
+
+        def __init__(self, parent: PostgresDatabaseManager) -> None:
+            self._parent = parent
+
+        def __init_subclass__(cls, **kwargs) -> None:
+            super().__init_subclass__(**kwargs)
+
+            for name, value in list(vars(cls).items()):
+                if callable(value) and not name.startswith("_"):
+                    setattr(cls, name, DatabaseManager.IDatabase._get_observed_method(f"{cls.__name__}.{name}", value))
+
+        def _get_rowcount(self, status: str) -> int:
+            return int(status.split()[-1])
+
+        async def _execute(self, connection: typing.Any, method: str, statement: str, *args) -> typing.Any:
+            if not self._PROFILER:
+                return await getattr(connection, method)(statement, *args)
+
+            current_statement = self._PROFILER.get_normalized_statement(statement)
+            time_started = time.perf_counter()
+            result = await getattr(connection, method)(statement, *args)
+            elapsed = time.perf_counter() - time_started
+
+            self._PROFILER.add_execution(
+                statement=current_statement,
+                elapsed=elapsed,
+                rows=len(result) if isinstance(result, list) else int(method == "fetchrow" and result is not None),
+            )
+
+            if self._PROFILER.is_slow(elapsed):
+                for observer in self._SLOW_QUERY_OBSERVERS:
+                    observer(current_statement, elapsed, list())
+
+            return result
+
+        async def _query(self, method: str, statement: str, *args) -> typing.Any:
+            async with self._parent._pool.acquire() as connection:
+                return await self._execute(connection, method, statement, *args)
+
+        async def _transaction(self, callback: typing.Callable, **kwargs) -> typing.Any:
+            async with self._parent._pool.acquire() as connection:
+                async with connection.transaction():
+                    return await callback(connection, **kwargs)
+
+        def _run_query(self, method: str, statement: str, *args) -> typing.Any:
+            return self._parent._run(
+                self._query(method, statement, *args),
+            )
+
+        def _run_transaction(self, callback: typing.Callable, **kwargs) -> typing.Any:
+            return self._parent._run(
+                self._transaction(callback, **kwargs),
+            )
+
+        async def _add_ledger_transaction(
+                self,
+                connection: typing.Any,
+                kind: models.LedgerEntryType,
+                tg_id: int,
+                amount: int,
+                date: int,
+                reference: str | None,
+        ) -> None:
+            current_entries = self._get_ledger_entries(
+                kind=kind,
+                tg_id=tg_id,
+                amount=amount,
+            )
+
+            if not current_entries:
+                return
+
+            (user_account_type, user_account_id, user_amount), (counter_account_type, _, _) = current_entries
+
+            await self._execute(
+                connection,
+                "execute",
+                self._ADD_LEDGER_TRANSACTION_SQL,
+                kind.value,
+                date,
+                reference,
+                user_account_type.value,
+                user_account_id,
+                user_amount,
+                counter_account_type.value,
+            )
+
+        async def _get_schema_version(self, connection: typing.Any) -> int:
+            await self._execute(connection, "execute", self._LOCK_SCHEMA_VERSION_SQL)
+            await self._execute(connection, "execute", self._CREATE_SCHEMA_VERSION_SQL)
+
+            return await self._execute(connection, "fetchval", self._GET_SCHEMA_VERSION_SQL, self._NAME)
+
+        async def _migrate(self, connection: typing.Any) -> list[int]:
+            current_version = await self._get_schema_version(connection)
+            pending_versions = [version for version in sorted(self._MIGRATIONS) if version > current_version]
+
+            for version in pending_versions:
+                for statement in self._MIGRATIONS[version]:
+                    await self._execute(connection, "execute", statement)
+
+                await self._execute(connection, "execute", self._ADD_SCHEMA_VERSION_SQL, self._NAME, version)
+
+            return pending_versions
+
+        def get_schema_version(self) -> int:
+            return self._run_transaction(
+                self._get_schema_version,
+            )
+
+        def migrate(self) -> list[int]:
+            return self._run_transaction(
+                self._migrate,
+            )
+
+    class ConfigBlobsDatabase(IDatabase):
+        _NAME = "config_blobs"
+        _MIGRATIONS = {
+            1: (
+                f"""
+                CREATE TABLE IF NOT EXISTS {_NAME} (
+                hash TEXT PRIMARY KEY NOT NULL,
+                data BYTEA NOT NULL,
+                size BIGINT NOT NULL
+                )
+                """,
+            ),
+        }
+
+    class ConfigsDatabase(IDatabase):
+        _NAME = "configs"
+        _MIGRATIONS = {
+            1: (
+                f"""
+                CREATE TABLE IF NOT EXISTS {_NAME} (
+                id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+                name TEXT NOT NULL,
+                data_hash TEXT NOT NULL,
+                subscription_id BIGINT,
+                reserved_until BIGINT
+                )
+                """,
+                f"CREATE INDEX IF NOT EXISTS {_NAME}_available ON {_NAME} (id, reserved_until) WHERE subscription_id IS NULL",
+                f"CREATE INDEX IF NOT EXISTS {_NAME}_data_hash ON {_NAME} (data_hash)",
+                f"CREATE INDEX IF NOT EXISTS {_NAME}_name ON {_NAME} (name)",
+            ),
+        }
+        _ADD_BLOBS_SQL = """
+        INSERT INTO config_blobs (
+        hash,
+        data,
+        size
+        )
+        SELECT * FROM unnest($1::text[], $2::bytea[], $3::bigint[])
+        ON CONFLICT (hash) DO NOTHING
+        """
+        _DELETE_UNUSED_BLOBS_SQL = f"""
+        DELETE FROM config_blobs AS blobs
+        WHERE NOT EXISTS (SELECT 1 FROM {_NAME} WHERE data_hash = blobs.hash)
+        """
+        _ADD_CONFIG_SQL = f"""
+        INSERT INTO {_NAME} (
+        name,
+        data_hash,
+        subscription_id
+        )
+        VALUES ($1, $2, $3)
+        RETURNING *
+        """
+        _ADD_CONFIGS_SQL = f"""
+        INSERT INTO {_NAME} (
+        name,
+        data_hash
+        )
+        SELECT * FROM unnest($1::text[], $2::text[])
+        """
+        _GET_CONFIG_DATA_SQL = f"""
+        SELECT blobs.data FROM {_NAME}
+        JOIN config_blobs AS blobs
+        ON blobs.hash = {_NAME}.data_hash
+        WHERE {_NAME}.id = $1
+        """
+        _GET_CONFIG_SQL = f"""
+        SELECT * FROM {_NAME} WHERE id = $1
+        """
+        _GET_ALL_CONFIGS_SQL = f"""
+        SELECT * FROM {_NAME} ORDER BY id
+        """
+        _GET_ALL_CONFIGS_LABELS_SQL = f"""
+        SELECT id, name FROM {_NAME} ORDER BY id
+        """
+        _GET_CONFIGS_COUNT_SQL = f"""
+        SELECT COUNT(*) FROM {_NAME}
+        """
+        _GET_AVAILABLE_CONFIGS_SQL = f"""
+        SELECT * FROM {_NAME} WHERE subscription_id IS NULL ORDER BY id
+        """
+        _GET_AVAILABLE_CONFIG_IDS_SQL = f"""
+        SELECT id FROM {_NAME}
+        WHERE subscription_id IS NULL AND (reserved_until IS NULL OR reserved_until <= $1)
+        ORDER BY id LIMIT $2
+        """
+        _GET_AVAILABLE_CONFIGS_COUNT_SQL = f"""
+        SELECT COUNT(*) FROM {_NAME}
+        WHERE subscription_id IS NULL AND (reserved_until IS NULL OR reserved_until <= $1)
+        """
+        _RESERVE_CONFIG_SQL = f"""
+        UPDATE {_NAME} SET reserved_until = $2
+        WHERE id = (
+        SELECT id FROM {_NAME}
+        WHERE id = $1 AND subscription_id IS NULL AND (reserved_until IS NULL OR reserved_until <= $3)
+        FOR UPDATE SKIP LOCKED
+        )
+        """
+        _RELEASE_CONFIG_SQL = f"""
+        UPDATE {_NAME} SET reserved_until = NULL WHERE id = $1 AND subscription_id IS NULL
+        """
+        _GET_RECYCLABLE_CONFIGS_SQL = f"""
+        UPDATE {_NAME} SET reserved_until = EXTRACT(EPOCH FROM now())::bigint + $3
+        WHERE id IN (
+        SELECT {_NAME}.id FROM {_NAME}
+        JOIN subscriptions
+        ON subscriptions.id = {_NAME}.subscription_id
+        WHERE subscriptions.is_checked = 1 AND subscriptions.expires_at < $1
+        AND ({_NAME}.reserved_until IS NULL OR {_NAME}.reserved_until <= EXTRACT(EPOCH FROM now())::bigint)
+        ORDER BY {_NAME}.id LIMIT $2
+        FOR UPDATE OF {_NAME} SKIP LOCKED
+        )
+        RETURNING *
+        """
+        _RECYCLE_CONFIGS_SQL = f"""
+        UPDATE {_NAME}
+        SET data_hash = COALESCE(recycled.data_hash, {_NAME}.data_hash), subscription_id = NULL, reserved_until = NULL
+        FROM unnest($1::text[], $2::bigint[], $3::bigint[]) AS recycled (data_hash, id, subscription_id)
+        WHERE {_NAME}.id = recycled.id AND {_NAME}.subscription_id = recycled.subscription_id
+        """
+        _ATTACH_SUBSCRIPTION_SQL = f"""
+        UPDATE {_NAME} SET subscription_id = $1, reserved_until = NULL WHERE id = $2
+        """
+        _GET_CONFIG_NAMES_SQL = f"""
+        SELECT name FROM {_NAME}
+        """
+        _CHECK_CONFIG_NAME_SQL = f"""
+        SELECT EXISTS (SELECT 1 FROM {_NAME} WHERE name = $1)
+        """
+        _get_blob = DatabaseManager.ConfigsDatabase._get_blob
+
+        async def _add_blobs(self, connection: typing.Any, blobs: typing.Iterable[tuple[str, bytes, int]]) -> None:
+            current_blobs = list(blobs)
+
+            await self._execute(
+                connection,
+                "execute",
+                self._ADD_BLOBS_SQL,
+                [blob[0] for blob in current_blobs],
+                [blob[1] for blob in current_blobs],
+                [blob[2] for blob in current_blobs],
+            )
+
+        async def _add_config(
+                self,
+                connection: typing.Any,
+                name: str,
+                data: str,
+                subscription_id: int | None,
+        ) -> models.ConfigValues | None:
+            current_blob = self._get_blob(data)
+
+            await self._add_blobs(
+                connection=connection,
+                blobs=[current_blob],
+            )
+            result = await self._execute(
+                connection,
+                "fetchrow",
+                self._ADD_CONFIG_SQL,
+                name,
+                current_blob[0],
+                subscription_id,
+            )
+
+            return self._get_values(
+                values_type=models.ConfigValues,
+                result=result,
+            )
+
+        async def _add_configs(self, connection: typing.Any, configs: list[tuple[str, str]]) -> int:
+            current_blobs = [self._get_blob(data) for _, data in configs]
+
+            await self._add_blobs(
+                connection=connection,
+                blobs=current_blobs,
+            )
+            status = await self._execute(
+                connection,
+                "execute",
+                self._ADD_CONFIGS_SQL,
+                [name for name, _ in configs],
+                [blob[0] for blob in current_blobs],
+            )
+
+            return self._get_rowcount(status)
+
+        async def _recycle_configs(self, connection: typing.Any, configs: list[tuple[str | None, int, int]]) -> int:
+            current_blobs = {
+                data: self._get_blob(data) for data, _, _ in configs if data is not None
+            }
+
+            await self._add_blobs(
+                connection=connection,
+                blobs=current_blobs.values(),
+            )
+            status = await self._execute(
+                connection,
+                "execute",
+                self._RECYCLE_CONFIGS_SQL,
+                [current_blobs[data][0] if data is not None else None for data, _, _ in configs],
+                [config_id for _, config_id, _ in configs],
+                [subscription_id for _, _, subscription_id in configs],
+            )
+
+            if current_blobs:
+                await self._execute(connection, "execute", self._DELETE_UNUSED_BLOBS_SQL)
+
+            return self._get_rowcount(status)
+
+        def add_config(self, name: str, data: str, subscription_id: int | None) -> models.ConfigValues | None:
+            return self._run_transaction(
+                self._add_config,
+                name=name,
+                data=data,
+                subscription_id=subscription_id,
+            )
+
+        def add_configs(self, configs: list[tuple[str, str]]) -> int:
+            return self._run_transaction(
+                self._add_configs,
+                configs=configs,
+            )
+
+        def get_config_data(self, config_id: int) -> str | None:
+            result = self._run_query(
+                "fetchval",
+                self._GET_CONFIG_DATA_SQL,
+                config_id,
+            )
+
+            return zlib.decompress(result).decode() if result else None
+
+        def get_config(self, config_id: int) -> models.ConfigValues | None:
+            result = self._run_query(
+                "fetchrow",
+                self._GET_CONFIG_SQL,
+                config_id,
+            )
+
+            return self._get_values(
+                values_type=models.ConfigValues,
+                result=result,
+            )
+
+        def get_all_configs(self) -> list[models.ConfigValues] | None:
+            return self._get_values_list(
+                values_type=models.ConfigValues,
+                rows=self._run_query("fetch", self._GET_ALL_CONFIGS_SQL),
+            )
+
+        def get_all_configs_labels(self) -> list[models.ConfigValues]:
+            return self._get_values_list(
+                values_type=models.ConfigValues,
+                rows=self._run_query("fetch", self._GET_ALL_CONFIGS_LABELS_SQL),
+            )
+
+        def get_configs_count(self) -> int:
+            return self._run_query(
+                "fetchval",
+                self._GET_CONFIGS_COUNT_SQL,
+            )
+
+        def get_available_configs(self) -> list[models.ConfigValues] | None:
+            return self._get_values_list(
+                values_type=models.ConfigValues,
+                rows=self._run_query("fetch", self._GET_AVAILABLE_CONFIGS_SQL),
+            )
+
+        def get_available_config_ids(self, timestamp: int, limit: int) -> list[int]:
+            return [
+                row[0] for row in self._run_query("fetch", self._GET_AVAILABLE_CONFIG_IDS_SQL, timestamp, limit)
+            ]
+
+        def get_available_configs_count(self, timestamp: int) -> int:
+            return self._run_query(
+                "fetchval",
+                self._GET_AVAILABLE_CONFIGS_COUNT_SQL,
+                timestamp,
+            )
+
+        def reserve_config(self, config_id: int, timestamp: int, reserved_until: int) -> bool:
+            status = self._run_query(
+                "execute",
+                self._RESERVE_CONFIG_SQL,
+                config_id,
+                reserved_until,
+                timestamp,
+            )
+
+            return bool(self._get_rowcount(status))
+
+        def release_config(self, config_id: int) -> None:
+            self._run_query(
+                "execute",
+                self._RELEASE_CONFIG_SQL,
+                config_id,
+            )
+
+        def get_recyclable_configs(self, timestamp: int, limit: int) -> list[models.ConfigValues]:
+            return self._get_values_list(
+                values_type=models.ConfigValues,
+                rows=self._run_query(
+                    "fetch",
+                    self._GET_RECYCLABLE_CONFIGS_SQL,
+                    timestamp,
+                    limit,
+                    constants.WORKER_CLAIM_TTL,
+                ),
+            )
+
+        def recycle_configs(self, configs: list[tuple[str | None, int, int]]) -> int:
+            return self._run_transaction(
+                self._recycle_configs,
+                configs=configs,
+            )
+
+        def attach_subscription(self, config_id: int, subscription_id: int) -> None:
+            self._run_query(
+                "execute",
+                self._ATTACH_SUBSCRIPTION_SQL,
+                subscription_id,
+                config_id,
+            )
+
+        def get_config_names(self) -> set[str]:
+            return {
+                row[0] for row in self._run_query("fetch", self._GET_CONFIG_NAMES_SQL)
+            }
+
+        def check_config_name(self, name: str) -> bool:
+            return not self._run_query(
+                "fetchval",
+                self._CHECK_CONFIG_NAME_SQL,
+                name,
+            )
+
+    class LedgerDatabase(IDatabase):
+        _NAME = "ledger"
+        _MIGRATIONS = {
+            1: (
+                f"""
+                CREATE TABLE IF NOT EXISTS {_NAME} (
+                id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+                transaction_id BIGINT NOT NULL,
+                account_type INTEGER NOT NULL,
+                account_id BIGINT NOT NULL,
+                kind INTEGER NOT NULL,
+                amount BIGINT NOT NULL,
+                date BIGINT NOT NULL,
+                reference TEXT
+                )
+                """,
+                f"CREATE SEQUENCE IF NOT EXISTS {_NAME}_transaction_id_seq",
+                f"CREATE INDEX IF NOT EXISTS {_NAME}_account ON {_NAME} (account_type, account_id, id)",
+                f"CREATE INDEX IF NOT EXISTS {_NAME}_transaction_id ON {_NAME} (transaction_id)",
+            ),
+        }
+        _LOCK_SQL = f"""
+        LOCK TABLE {_NAME} IN SHARE ROW EXCLUSIVE MODE
+        """
+        _GET_TRANSACTION_SQL = f"""
+        SELECT * FROM {_NAME} WHERE transaction_id = $1 ORDER BY id
+        """
+        _GET_USER_ENTRIES_SQL = f"""
+        SELECT * FROM {_NAME} WHERE account_type = $1 AND account_id = $2 AND id > $3 ORDER BY id
+        """
+        _GET_BALANCE_SQL = f"""
+        WITH snapshot AS (
+        SELECT balance, entry_id FROM ledger_snapshots WHERE tg_id = $2 ORDER BY entry_id DESC LIMIT 1
+        )
+        SELECT (COALESCE((SELECT balance FROM snapshot), 0) + COALESCE(SUM(amount), 0))::bigint FROM {_NAME}
+        WHERE account_type = $1 AND account_id = $2 AND id > COALESCE((SELECT entry_id FROM snapshot), 0)
+        """
+        _GET_USER_BALANCE_SQL = """
+        SELECT balance FROM users WHERE tg_id = $1
+        """
+        _CHECK_ENTRIES_SQL = f"""
+        SELECT EXISTS (SELECT 1 FROM {_NAME})
+        """
+        _ADD_OPENING_BALANCES_SQL = f"""
+        INSERT INTO {_NAME} (
+        transaction_id,
+        account_type,
+        account_id,
+        kind,
+        amount,
+        date
+        )
+        SELECT 0, $1::integer, tg_id, $2::integer, balance, $3::bigint
+        FROM users WHERE balance != 0
+        """
+        _ADD_OPENING_COUNTER_SQL = f"""
+        INSERT INTO {_NAME} (
+        transaction_id,
+        account_type,
+        account_id,
+        kind,
+        amount,
+        date
+        )
+        SELECT 0, $1::integer, 0, $2::integer, -SUM(amount), $3::bigint
+        FROM {_NAME} HAVING COUNT(*) > 0
+        """
+        _ADD_SNAPSHOTS_SQL = f"""
+        INSERT INTO ledger_snapshots (
+        tg_id,
+        entry_id,
+        balance,
+        date
+        )
+        SELECT
+        entries.account_id,
+        MAX(entries.id),
+        SUM(entries.amount) + COALESCE((
+        SELECT snapshots.balance FROM ledger_snapshots AS snapshots
+        WHERE snapshots.tg_id = entries.account_id ORDER BY snapshots.entry_id DESC LIMIT 1
+        ), 0),
+        $1::bigint
+        FROM {_NAME} AS entries
+        WHERE entries.account_type = $2::integer AND entries.id > (
+        SELECT COALESCE(MAX(entry_id), 0) FROM ledger_snapshots
+        )
+        GROUP BY entries.account_id
+        """
+
+        async def _add_opening_balances(self, connection: typing.Any, date: int) -> int:
+            await self._execute(connection, "execute", self._LOCK_SQL)
+
+            if await self._execute(connection, "fetchval", self._CHECK_ENTRIES_SQL):
+                return int()
+
+            status = await self._execute(
+                connection,
+                "execute",
+                self._ADD_OPENING_BALANCES_SQL,
+                models.LedgerAccountType.USER.value,
+                models.LedgerEntryType.OPENING.value,
+                date,
+            )
+            await self._execute(
+                connection,
+                "execute",
+                self._ADD_OPENING_COUNTER_SQL,
+                models.LedgerEntryType.OPENING.counter_account_type.value,
+                models.LedgerEntryType.OPENING.value,
+                date,
+            )
+
+            return self._get_rowcount(status)
+
+        async def _add_snapshots(self, connection: typing.Any, date: int) -> int:
+            await self._execute(connection, "execute", self._LOCK_SQL)
+
+            status = await self._execute(
+                connection,
+                "execute",
+                self._ADD_SNAPSHOTS_SQL,
+                date,
+                models.LedgerAccountType.USER.value,
+            )
+
+            return self._get_rowcount(status)
+
+        def get_transaction(self, transaction_id: int) -> list[models.LedgerEntryValues]:
+            return self._get_values_list(
+                values_type=models.LedgerEntryValues,
+                rows=self._run_query("fetch", self._GET_TRANSACTION_SQL, transaction_id),
+            )
+
+        def get_user_entries(self, tg_id: int, entry_id: int = 0) -> list[models.LedgerEntryValues]:
+            return self._get_values_list(
+                values_type=models.LedgerEntryValues,
+                rows=self._run_query(
+                    "fetch",
+                    self._GET_USER_ENTRIES_SQL,
+                    models.LedgerAccountType.USER.value,
+                    tg_id,
+                    entry_id,
+                ),
+            )
+
+        def get_balance(self, tg_id: int) -> int:
+            return self._run_query(
+                "fetchval",
+                self._GET_BALANCE_SQL,
+                models.LedgerAccountType.USER.value,
+                tg_id,
+            )
+
+        def verify_balance(self, tg_id: int) -> bool:
+            result = self._run_query(
+                "fetchval",
+                self._GET_USER_BALANCE_SQL,
+                tg_id,
+            )
+
+            return self._is_balance_verified(
+                user_balance=result,
+                ledger_balance=self.get_balance(
+                    tg_id=tg_id,
+                ),
+            )
+
+        def add_opening_balances(self, date: int) -> int:
+            return self._run_transaction(
+                self._add_opening_balances,
+                date=date,
+            )
+
+        def add_snapshots(self, date: int) -> int:
+            return self._run_transaction(
+                self._add_snapshots,
+                date=date,
+            )
+
+    class LedgerSnapshotsDatabase(IDatabase):
+        _NAME = "ledger_snapshots"
+        _MIGRATIONS = {
+            1: (
+                f"""
+                CREATE TABLE IF NOT EXISTS {_NAME} (
+                id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+                tg_id BIGINT NOT NULL,
+                entry_id BIGINT NOT NULL,
+                balance BIGINT NOT NULL,
+                date BIGINT NOT NULL
+                )
+                """,
+                f"CREATE INDEX IF NOT EXISTS {_NAME}_tg_id_entry_id ON {_NAME} (tg_id, entry_id)",
+                f"CREATE INDEX IF NOT EXISTS {_NAME}_entry_id ON {_NAME} (entry_id)",
+            ),
+        }
+        _GET_LATEST_SNAPSHOT_SQL = f"""
+        SELECT * FROM {_NAME} WHERE tg_id = $1 ORDER BY entry_id DESC LIMIT 1
+        """
+
+        def get_latest_snapshot(self, tg_id: int) -> models.LedgerSnapshotValues | None:
+            result = self._run_query(
+                "fetchrow",
+                self._GET_LATEST_SNAPSHOT_SQL,
+                tg_id,
+            )
+
+            return self._get_values(
+                values_type=models.LedgerSnapshotValues,
+                result=result,
+            )
+
+    class PaymentsDatabase(IDatabase):
+        _NAME = "payments"
+        _MIGRATIONS = {
+            1: (
+                f"""
+                CREATE TABLE IF NOT EXISTS {_NAME} (
+                id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+                provider_id TEXT,
+                amount BIGINT NOT NULL,
+                currency TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                date BIGINT NOT NULL,
+                tg_id BIGINT NOT NULL
+                )
+                """,
+                f"CREATE UNIQUE INDEX IF NOT EXISTS {_NAME}_provider_id ON {_NAME} (provider_id)",
+                f"CREATE INDEX IF NOT EXISTS {_NAME}_tg_id_provider_id ON {_NAME} (tg_id, provider_id)",
+            ),
+        }
+        _ADD_PAYMENT_SQL = f"""
+        INSERT INTO {_NAME} (
+        provider_id,
+        amount,
+        currency,
+        payload,
+        date,
+        tg_id
+        )
+        VALUES ($1, $2, $3, $4, $5, $6)
+        RETURNING *
+        """
+        _ADD_PROVIDER_PAYMENT_SQL = f"""
+        INSERT INTO {_NAME} (
+        provider_id,
+        amount,
+        currency,
+        payload,
+        date,
+        tg_id
+        )
+        VALUES ($1, $2, $3, $4, $5, $6)
+        ON CONFLICT (provider_id) DO NOTHING
+        RETURNING id
+        """
+        _GET_PAYMENT_SQL = f"""
+        SELECT * FROM {_NAME} WHERE id = $1
+        """
+        _GET_ALL_PAYMENTS_SQL = f"""
+        SELECT * FROM {_NAME} ORDER BY id
+        """
+        _GET_ALL_PAYMENTS_LABELS_SQL = f"""
+        SELECT id, amount FROM {_NAME} ORDER BY id
+        """
+        _GET_PAYMENTS_COUNT_SQL = f"""
+        SELECT COUNT(*) FROM {_NAME}
+        """
+        _GET_USER_PAYMENTS_SQL = f"""
+        SELECT * FROM {_NAME} WHERE tg_id = $1 ORDER BY id
+        """
+        _GET_USER_PAYMENTS_LABELS_SQL = f"""
+        SELECT id, amount FROM {_NAME} WHERE tg_id = $1 ORDER BY id
+        """
+        _CHECK_PROVIDER_PAYMENT_SQL = f"""
+        SELECT EXISTS (SELECT 1 FROM {_NAME} WHERE provider_id = $1)
+        """
+        _ADD_USER_BALANCE_SQL = """
+        UPDATE users SET balance = balance + $1 WHERE tg_id = $2
+        """
+        _CHECK_FIRST_PAYMENT_SQL = f"""
+        SELECT EXISTS (SELECT 1 FROM {_NAME} WHERE tg_id = $1 AND provider_id IS NOT NULL)
+        """
+
+        async def _add_successful_payment(
+                self,
+                connection: typing.Any,
+                provider_id: str,
+                amount: int,
+                currency: str,
+                payload: str,
+                date: int,
+                tg_id: int,
+                referrer_id: int | None,
+                referrer_amount: int,
+                referrer_payload: str | None,
+        ) -> bool:
+            payment_id = await self._execute(
+                connection,
+                "fetchval",
+                self._ADD_PROVIDER_PAYMENT_SQL,
+                provider_id,
+                amount,
+                currency,
+                payload,
+                date,
+                tg_id,
+            )
+
+            if payment_id is None:
+                return False
+
+            await self._execute(connection, "execute", self._ADD_USER_BALANCE_SQL, amount, tg_id)
+            await self._add_ledger_transaction(
+                connection=connection,
+                kind=models.LedgerEntryType.PAYMENT,
+                tg_id=tg_id,
+                amount=amount,
+                date=date,
+                reference=provider_id,
+            )
+
+            if referrer_id:
+                await self._execute(
+                    connection,
+                    "execute",
+                    self._ADD_PAYMENT_SQL,
+                    None,
+                    referrer_amount,
+                    currency,
+                    referrer_payload,
+                    date,
+                    referrer_id,
+                )
+                await self._execute(connection, "execute", self._ADD_USER_BALANCE_SQL, referrer_amount, referrer_id)
+                await self._add_ledger_transaction(
+                    connection=connection,
+                    kind=models.LedgerEntryType.REFERRAL,
+                    tg_id=referrer_id,
+                    amount=referrer_amount,
+                    date=date,
+                    reference=provider_id,
+                )
+
+            return True
+
+        def add_payment(
+                self,
+                provider_id: str | None,
+                amount: int,
+                currency: str,
+                payload: str,
+                date: int,
+                tg_id: int,
+        ) -> models.PaymentValues | None:
+            result = self._run_query(
+                "fetchrow",
+                self._ADD_PAYMENT_SQL,
+                provider_id,
+                amount,
+                currency,
+                payload,
+                date,
+                tg_id,
+            )
+
+            return self._get_values(
+                values_type=models.PaymentValues,
+                result=result,
+            )
+
+        def get_payment(self, payment_id: int) -> models.PaymentValues | None:
+            result = self._run_query(
+                "fetchrow",
+                self._GET_PAYMENT_SQL,
+                payment_id,
+            )
+
+            return self._get_values(
+                values_type=models.PaymentValues,
+                result=result,
+            )
+
+        def get_all_payments(self) -> list[models.PaymentValues] | None:
+            return self._get_values_list(
+                values_type=models.PaymentValues,
+                rows=self._run_query("fetch", self._GET_ALL_PAYMENTS_SQL),
+            )
+
+        def get_all_payments_labels(self) -> list[models.PaymentValues]:
+            return self._get_values_list(
+                values_type=models.PaymentValues,
+                rows=self._run_query("fetch", self._GET_ALL_PAYMENTS_LABELS_SQL),
+            )
+
+        def get_payments_count(self) -> int:
+            return self._run_query(
+                "fetchval",
+                self._GET_PAYMENTS_COUNT_SQL,
+            )
+
+        def get_user_payments(self, tg_id: int) -> list[models.PaymentValues]:
+            return self._get_values_list(
+                values_type=models.PaymentValues,
+                rows=self._run_query("fetch", self._GET_USER_PAYMENTS_SQL, tg_id),
+            )
+
+        def get_user_payments_labels(self, tg_id: int) -> list[models.PaymentValues]:
+            return self._get_values_list(
+                values_type=models.PaymentValues,
+                rows=self._run_query("fetch", self._GET_USER_PAYMENTS_LABELS_SQL, tg_id),
+            )
+
+        def check_provider_payment(self, provider_id: str) -> bool:
+            return self._run_query(
+                "fetchval",
+                self._CHECK_PROVIDER_PAYMENT_SQL,
+                provider_id,
+            )
+
+        def add_successful_payment(
+                self,
+                provider_id: str,
+                amount: int,
+                currency: str,
+                payload: str,
+                date: int,
+                tg_id: int,
+                referrer_id: int | None,
+                referrer_amount: int,
+                referrer_payload: str | None,
+        ) -> bool:
+            return self._run_transaction(
+                self._add_successful_payment,
+                provider_id=provider_id,
+                amount=amount,
+                currency=currency,
+                payload=payload,
+                date=date,
+                tg_id=tg_id,
+                referrer_id=referrer_id,
+                referrer_amount=referrer_amount,
+                referrer_payload=referrer_payload,
+            )
+
+        def check_first_payment(self, tg_id: int) -> bool:
+            return not self._run_query(
+                "fetchval",
+                self._CHECK_FIRST_PAYMENT_SQL,
+                tg_id,
+            )
+
+    class SubscriptionsDatabase(IDatabase):
+        _NAME = "subscriptions"
+        _COLUMNS = "id, plan_id, is_active, is_checked, subscribed_at, expires_at, tg_id, config_id"
+        _MIGRATIONS = {
+            1: (
+                f"""
+                CREATE TABLE IF NOT EXISTS {_NAME} (
+                id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+                plan_id INTEGER NOT NULL,
+                is_active INTEGER NOT NULL,
+                is_checked INTEGER NOT NULL,
+                subscribed_at BIGINT NOT NULL,
+                expires_at BIGINT NOT NULL,
+                tg_id BIGINT NOT NULL,
+                config_id BIGINT NOT NULL,
+                claimed_until BIGINT
+                )
+                """,
+                f"CREATE INDEX IF NOT EXISTS {_NAME}_tg_id_expires_at ON {_NAME} (tg_id, expires_at)",
+            ),
+        }
+        _ADD_SUBSCRIPTION_SQL = f"""
+        INSERT INTO {_NAME} (
+        plan_id,
+        is_active,
+        is_checked,
+        subscribed_at,
+        expires_at,
+        tg_id,
+        config_id
+        )
+        VALUES ($1, $2, $3, $4, $5, $6, $7)
+        RETURNING {_COLUMNS}
+        """
+        _GET_SUBSCRIPTION_SQL = f"""
+        SELECT {_COLUMNS} FROM {_NAME} WHERE id = $1
+        """
+        _GET_ALL_SUBSCRIPTIONS_SQL = f"""
+        SELECT {_COLUMNS} FROM {_NAME} ORDER BY id
+        """
+        _GET_ALL_SUBSCRIPTIONS_LABELS_SQL = f"""
+        SELECT id, plan_id FROM {_NAME} ORDER BY id
+        """
+        _GET_SUBSCRIPTIONS_COUNT_SQL = f"""
+        SELECT COUNT(*) FROM {_NAME}
+        """
+        _GET_USER_SUBSCRIPTIONS_SQL = f"""
+        SELECT {_COLUMNS} FROM {_NAME} WHERE tg_id = $1 ORDER BY id
+        """
+        _GET_USER_SUBSCRIPTIONS_LABELS_SQL = f"""
+        SELECT id, plan_id FROM {_NAME} WHERE tg_id = $1 ORDER BY id
+        """
+        _GET_USER_ACTIVE_SUBSCRIPTIONS_SQL = f"""
+        SELECT {_COLUMNS} FROM {_NAME} WHERE tg_id = $1 AND expires_at >= $2 ORDER BY id
+        """
+        _GET_USER_ACTIVE_SUBSCRIPTIONS_LABELS_SQL = f"""
+        SELECT id, plan_id FROM {_NAME} WHERE tg_id = $1 AND expires_at >= $2 ORDER BY id
+        """
+        _GET_USER_ACTIVE_SUBSCRIPTIONS_COUNT_SQL = f"""
+        SELECT COUNT(*) FROM {_NAME} WHERE tg_id = $1 AND expires_at >= $2
+        """
+        _GET_UNCHECKED_EXPIRED_SUBSCRIPTIONS_SQL = f"""
+        UPDATE {_NAME} SET claimed_until = EXTRACT(EPOCH FROM now())::bigint + $2
+        WHERE id IN (
+        SELECT id FROM {_NAME}
+        WHERE is_checked = 0 AND expires_at < $1
+        AND (claimed_until IS NULL OR claimed_until <= EXTRACT(EPOCH FROM now())::bigint)
+        FOR UPDATE SKIP LOCKED
+        )
+        RETURNING {_COLUMNS}
+        """
+        _EDIT_EXPIRES_AT_SQL = f"""
+        UPDATE {_NAME} SET expires_at = $1 WHERE id = $2
+        """
+        _SWITCH_ACTIVE_SQL = f"""
+        UPDATE {_NAME} SET is_active = 1 - is_active WHERE id = $1
+        """
+        _SWITCH_CHECKED_SQL = f"""
+        UPDATE {_NAME} SET is_checked = 1 - is_checked WHERE id = $1
+        """
+
+        def add_subscription(
+                self,
+                plan_id: int,
+                is_active: int,
+                is_checked: int,
+                subscribed_at: int,
+                expires_at: int,
+                tg_id: int,
+                config_id: int,
+        ) -> models.SubscriptionValues | None:
+            result = self._run_query(
+                "fetchrow",
+                self._ADD_SUBSCRIPTION_SQL,
+                plan_id,
+                is_active,
+                is_checked,
+                subscribed_at,
+                expires_at,
+                tg_id,
+                config_id,
+            )
+
+            return self._get_values(
+                values_type=models.SubscriptionValues,
+                result=result,
+            )
+
+        def get_subscription(self, subscription_id: int) -> models.SubscriptionValues | None:
+            result = self._run_query(
+                "fetchrow",
+                self._GET_SUBSCRIPTION_SQL,
+                subscription_id,
+            )
+
+            return self._get_values(
+                values_type=models.SubscriptionValues,
+                result=result,
+            )
+
+        def get_all_subscriptions(self) -> list[models.SubscriptionValues]:
+            return self._get_values_list(
+                values_type=models.SubscriptionValues,
+                rows=self._run_query("fetch", self._GET_ALL_SUBSCRIPTIONS_SQL),
+            )
+
+        def get_all_subscriptions_labels(self) -> list[models.SubscriptionValues]:
+            return self._get_values_list(
+                values_type=models.SubscriptionValues,
+                rows=self._run_query("fetch", self._GET_ALL_SUBSCRIPTIONS_LABELS_SQL),
+            )
+
+        def get_subscriptions_count(self) -> int:
+            return self._run_query(
+                "fetchval",
+                self._GET_SUBSCRIPTIONS_COUNT_SQL,
+            )
+
+        def get_user_subscriptions(self, tg_id: int) -> list[models.SubscriptionValues]:
+            return self._get_values_list(
+                values_type=models.SubscriptionValues,
+                rows=self._run_query("fetch", self._GET_USER_SUBSCRIPTIONS_SQL, tg_id),
+            )
+
+        def get_user_subscriptions_labels(self, tg_id: int) -> list[models.SubscriptionValues]:
+            return self._get_values_list(
+                values_type=models.SubscriptionValues,
+                rows=self._run_query("fetch", self._GET_USER_SUBSCRIPTIONS_LABELS_SQL, tg_id),
+            )
+
+        def get_user_active_subscriptions(self, tg_id: int, timestamp: int) -> list[models.SubscriptionValues]:
+            return self._get_values_list(
+                values_type=models.SubscriptionValues,
+                rows=self._run_query("fetch", self._GET_USER_ACTIVE_SUBSCRIPTIONS_SQL, tg_id, timestamp),
+            )
+
+        def get_user_active_subscriptions_labels(self, tg_id: int, timestamp: int) -> list[models.SubscriptionValues]:
+            return self._get_values_list(
+                values_type=models.SubscriptionValues,
+                rows=self._run_query("fetch", self._GET_USER_ACTIVE_SUBSCRIPTIONS_LABELS_SQL, tg_id, timestamp),
+            )
+
+        def get_user_active_subscriptions_count(self, tg_id: int, timestamp: int) -> int:
+            return self._run_query(
+                "fetchval",
+                self._GET_USER_ACTIVE_SUBSCRIPTIONS_COUNT_SQL,
+                tg_id,
+                timestamp,
+            )
+
+        def get_unchecked_expired_subscriptions(self, timestamp: int) -> list[models.SubscriptionValues]:
+            return self._get_values_list(
+                values_type=models.SubscriptionValues,
+                rows=self._run_query(
+                    "fetch",
+                    self._GET_UNCHECKED_EXPIRED_SUBSCRIPTIONS_SQL,
+                    timestamp,
+                    constants.WORKER_CLAIM_TTL,
+                ),
+            )
+
+        def edit_expires_at(self, subscription_id: int, expires_at: int) -> None:
+            self._run_query(
+                "execute",
+                self._EDIT_EXPIRES_AT_SQL,
+                expires_at,
+                subscription_id,
+            )
+
+        def switch_active(self, subscription_id: int) -> None:
+            self._run_query(
+                "execute",
+                self._SWITCH_ACTIVE_SQL,
+                subscription_id,
+            )
+
+        def switch_checked(self, subscription_id: int) -> None:
+            self._run_query(
+                "execute",
+                self._SWITCH_CHECKED_SQL,
+                subscription_id,
+            )
+
+    class UsersDatabase(IDatabase):
+        _NAME = "users"
+        _MIGRATIONS = {
+            1: (
+                f"""
+                CREATE TABLE IF NOT EXISTS {_NAME} (
+                tg_id BIGINT PRIMARY KEY NOT NULL,
+                tg_username TEXT,
+                balance BIGINT NOT NULL,
+                referrer_id BIGINT,
+                referrals_count INTEGER NOT NULL DEFAULT 0
+                )
+                """,
+                f"CREATE INDEX IF NOT EXISTS {_NAME}_referrer_id ON {_NAME} (referrer_id)",
+            ),
+        }
+        _ADD_USER_SQL = f"""
+        WITH inserted AS (
+        INSERT INTO {_NAME} (
+        tg_id,
+        tg_username,
+        balance,
+        referrer_id
+        )
+        VALUES ($1, $2, $3, $4)
+        ON CONFLICT (tg_id) DO NOTHING
+        RETURNING referrer_id
+        )
+        UPDATE {_NAME} SET referrals_count = referrals_count + 1
+        WHERE tg_id = (SELECT referrer_id FROM inserted)
+        """
+        _GET_USER_SQL = f"""
+        SELECT * FROM {_NAME} WHERE tg_id = $1
+        """
+        _GET_ALL_USERS_SQL = f"""
+        SELECT * FROM {_NAME} ORDER BY tg_id
+        """
+        _GET_ALL_USERS_LABELS_SQL = f"""
+        SELECT tg_id, tg_username FROM {_NAME} ORDER BY tg_id
+        """
+        _GET_USERS_COUNT_SQL = f"""
+        SELECT COUNT(*) FROM {_NAME}
+        """
+        _GET_REF_COUNT_SQL = f"""
+        SELECT referrals_count FROM {_NAME} WHERE tg_id = $1
+        """
+        _GET_REFERRAL_TREE_SQL = f"""
+        WITH RECURSIVE referrals (tg_id, depth, path) AS (
+        SELECT tg_id, 0, lpad(tg_id::text, 20, '0') FROM {_NAME} WHERE tg_id = $1
+        UNION ALL
+        SELECT {_NAME}.tg_id, referrals.depth + 1, referrals.path || lpad({_NAME}.tg_id::text, 20, '0')
+        FROM {_NAME} JOIN referrals ON {_NAME}.referrer_id = referrals.tg_id
+        WHERE referrals.depth < $2
+        )
+        SELECT {_NAME}.*, referrals.depth, (
+        SELECT COALESCE(SUM(amount), 0)::bigint FROM payments
+        WHERE tg_id = referrals.tg_id AND provider_id IS NULL AND payload LIKE 'referral %'
+        ) AS earnings
+        FROM referrals JOIN {_NAME} ON {_NAME}.tg_id = referrals.tg_id
+        ORDER BY referrals.path
+        LIMIT $3
+        """
+        _GET_BALANCE_SQL = f"""
+        SELECT balance FROM {_NAME} WHERE tg_id = $1 FOR UPDATE
+        """
+        _EDIT_BALANCE_SQL = f"""
+        UPDATE {_NAME} SET balance = $1 WHERE tg_id = $2
+        """
+        _ADD_BALANCE_SQL = f"""
+        UPDATE {_NAME} SET balance = balance + $1 WHERE tg_id = $2
+        """
+
+        async def _edit_balance(self, connection: typing.Any, tg_id: int, balance: int, date: int) -> None:
+            current_balance = await self._execute(connection, "fetchval", self._GET_BALANCE_SQL, tg_id)
+
+            await self._execute(connection, "execute", self._EDIT_BALANCE_SQL, balance, tg_id)
+
+            if current_balance is not None:
+                await self._add_ledger_transaction(
+                    connection=connection,
+                    kind=models.LedgerEntryType.ADJUSTMENT,
+                    tg_id=tg_id,
+                    amount=balance - current_balance,
+                    date=date,
+                    reference=None,
+                )
+
+        async def _add_balance(
+                self,
+                connection: typing.Any,
+                tg_id: int,
+                amount: int,
+                kind: models.LedgerEntryType,
+                date: int,
+                reference: str | None,
+        ) -> None:
+            status = await self._execute(connection, "execute", self._ADD_BALANCE_SQL, amount, tg_id)
+
+            if self._get_rowcount(status):
+                await self._add_ledger_transaction(
+                    connection=connection,
+                    kind=kind,
+                    tg_id=tg_id,
+                    amount=amount,
+                    date=date,
+                    reference=reference,
+                )
+
+        def add_user(
+                self,
+                tg_id: int,
+                tg_username: str | None,
+                balance: int,
+                referrer_id: int | None,
+        ) -> None:
+            self._run_query(
+                "execute",
+                self._ADD_USER_SQL,
+                tg_id,
+                tg_username,
+                balance,
+                referrer_id,
+            )
+
+        def get_user(self, tg_id: int) -> models.UserValues | None:
+            result = self._run_query(
+                "fetchrow",
+                self._GET_USER_SQL,
+                tg_id,
+            )
+
+            return self._get_values(
+                values_type=models.UserValues,
+                result=result,
+            )
+
+        def get_all_users(self) -> list[models.UserValues]:
+            return self._get_values_list(
+                values_type=models.UserValues,
+                rows=self._run_query("fetch", self._GET_ALL_USERS_SQL),
+            )
+
+        def get_all_users_labels(self) -> list[models.UserValues]:
+            return self._get_values_list(
+                values_type=models.UserValues,
+                rows=self._run_query("fetch", self._GET_ALL_USERS_LABELS_SQL),
+            )
+
+        def get_users_count(self) -> int:
+            return self._run_query(
+                "fetchval",
+                self._GET_USERS_COUNT_SQL,
+            )
+
+        def get_ref_count(self, tg_id: int) -> int:
+            result = self._run_query(
+                "fetchval",
+                self._GET_REF_COUNT_SQL,
+                tg_id,
+            )
+
+            return result if result is not None else int()
+
+        def get_referral_tree(self, tg_id: int, max_depth: int, limit: int) -> list[models.ReferralValues]:
+            return self._get_values_list(
+                values_type=models.ReferralValues,
+                rows=self._run_query("fetch", self._GET_REFERRAL_TREE_SQL, tg_id, max_depth, limit),
+            )
+
+        def edit_balance(self, tg_id: int, balance: int, date: int) -> None:
+            self._run_transaction(
+                self._edit_balance,
+                tg_id=tg_id,
+                balance=balance,
+                date=date,
+            )
+
+        def add_balance(
+                self,
+                tg_id: int,
+                amount: int,
+                kind: models.LedgerEntryType,
+                date: int,
+                reference: str | None = None,
+        ) -> None:
+            self._run_transaction(
+                self._add_balance,
+                tg_id=tg_id,
+                amount=amount,
+                kind=kind,
+                date=date,
+                reference=reference,
+            )
+
+        def reduce_balance(
+                self,
+                tg_id: int,
+                amount: int,
+                kind: models.LedgerEntryType,
+                date: int,
+                reference: str | None = None,
+        ) -> None:
+            self.add_balance(
+                tg_id=tg_id,
+                amount=-amount,
+                kind=kind,
+                date=date,
+                reference=reference,
+            )
+
+    _DATABASE_OBJECTS = {
+        "config": ConfigsDatabase,
+        "config_blobs": ConfigBlobsDatabase,
+        "ledger": LedgerDatabase,
+        "ledger_snapshots": LedgerSnapshotsDatabase,
+        "payments": PaymentsDatabase,
+        "subscriptions": SubscriptionsDatabase,
+        "users": UsersDatabase,
+    }
+    config: ConfigsDatabase
+    config_blobs: ConfigBlobsDatabase
+    ledger: LedgerDatabase
+    ledger_snapshots: LedgerSnapshotsDatabase
+    payments: PaymentsDatabase
+    subscriptions: SubscriptionsDatabase
+    users: UsersDatabase
+
+    def __init__(self, dsn: str, pool_min_size: int, pool_max_size: int) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever,
+            name=self.__class__.__name__,
+            daemon=True,
+        )
+        self._thread.start()
+        self._pool = self._run(
+            self._create_pool(
+                dsn=dsn,
+                pool_min_size=pool_min_size,
+                pool_max_size=pool_max_size,
+            ),
+        )
+
+        for name, database in self._DATABASE_OBJECTS.items():
+            setattr(self, name, database(parent=self))
+
+        self.migrate()
+
+    async def _create_pool(self, dsn: str, pool_min_size: int, pool_max_size: int) -> typing.Any:
+        import asyncpg
+
+        return await asyncpg.create_pool(
+            dsn=dsn,
+            min_size=pool_min_size,
+            max_size=pool_max_size,
+        )
+
+    def _run(self, coroutine: typing.Coroutine) -> typing.Any:
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def close_all(self) -> None:
+        self._run(
+            self._pool.close(),
+        )
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+# endregion
+
+# region Services
+
+class LoggerService(pyquoks.data.LoggerService):
+    class QueueHandler(logging.handlers.QueueHandler):
+        def __init__(self, records_queue: queue.Queue) -> None:
+            super().__init__(records_queue)
+            self.dropped_count = int()
+            self.max_queue_size = int()
+
+        def enqueue(self, record: logging.LogRecord) -> None:
+            try:
+                self.queue.put_nowait(record)
+                current_queue_size = self.queue.qsize()
+
+                with self.lock:
+                    self.max_queue_size = max(self.max_queue_size, current_queue_size)
+            except queue.Full:
+                with self.lock:
+                    self.dropped_count += 1
+
+    class QueueListener(logging.handlers.QueueListener):
+        def enqueue_sentinel(self) -> None:
+            self.queue.put(self._sentinel)
+
+    class JsonFormatter(logging.Formatter):
+        _DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+        def format(self, record: logging.LogRecord) -> str:
+            current_fields = {
+                "time": self.formatTime(record, self._DATE_FORMAT),
+                "level": record.levelname,
+                "name": record.name,
+                "message": record.getMessage(),
+            }
+            current_fields.update(getattr(record, LoggerService._FIELDS_ATTRIBUTE, dict()))
+
+            if record.exc_info:
+                current_fields["exception"] = self.formatException(record.exc_info)
+
+            return json.dumps(
+                current_fields,
+                ensure_ascii=False,
+                default=str,
+            )
+
+    class Interaction:
+        def __init__(self, event_type: str) -> None:
+            self.event_type = event_type
+            self.handler = None
+            self.route = None
+            self.user_id = None
+            self.username = None
+            self.interaction = None
+            self.database_time = float()
+            self.api_time = float()
+            self.time_started = time.perf_counter()
+
+    _INTERACTION = contextvars.ContextVar("interaction", default=None)
+
+    _ROTATION_SIZE = "size"
+    _FIELDS_ATTRIBUTE = "fields"
+    _CHUNK_SIZE = 65536
+    _DATE_FORMATS = {
+        re.compile(rb'^\{"time": "(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})"'): "%Y-%m-%d %H:%M:%S",
+        re.compile(rb"^\[?(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})"): "%Y-%m-%d %H:%M:%S",
+        re.compile(rb"^\[?(\d{2}\.\d{2}\.\d{2} \d{2}:\d{2}:\d{2})"): "%d.%m.%y %H:%M:%S",
+    }
+
+    def __init__(
+            self,
+            *args,
+            queue_size: int,
+            rotation_when: str,
+            max_bytes: int,
+            backup_count: int,
+            sample_rate: float,
+            sampled_routes: list[str],
+            **kwargs,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+
+        self._sample_rate = sample_rate
+        self._sampled_routes = set(sampled_routes)
+
+        handlers = list()
+
+        for handler in list(self.handlers):
+            self.removeHandler(handler)
+
+            if isinstance(handler, logging.FileHandler):
+                if rotation_when == self._ROTATION_SIZE:
+                    rotating_handler = logging.handlers.RotatingFileHandler(
+                        filename=handler.baseFilename,
+                        maxBytes=max_bytes,
+                        backupCount=backup_count,
+                        encoding=handler.encoding,
+                    )
+                else:
+                    rotating_handler = logging.handlers.TimedRotatingFileHandler(
+                        filename=handler.baseFilename,
+                        when=rotation_when,
+                        backupCount=backup_count,
+                        encoding=handler.encoding,
+                    )
+
+                rotating_handler.setLevel(handler.level)
+                rotating_handler.setFormatter(self.JsonFormatter())
+                handler.close()
+
+                handler = rotating_handler
+
+            handlers.append(handler)
+
+        self._queue_handler = self.QueueHandler(
+            records_queue=queue.Queue(
+                maxsize=queue_size,
+            ),
+        )
+        self._queue_listener = self.QueueListener(
+            self._queue_handler.queue,
+            *handlers,
+            respect_handler_level=True,
+        )
+
+        self.addHandler(self._queue_handler)
+        self._queue_listener.start()
+
+    @property
+    def dropped_count(self) -> int:
+        return self._queue_handler.dropped_count
+
+    @property
+    def max_queue_size(self) -> int:
+        return self._queue_handler.max_queue_size
+
+    def stop_listener(self) -> None:
+        self._queue_listener.stop()
+
+    def _log_interaction(self, interaction: LoggerService.Interaction, total_time: float | None) -> None:
+        is_sampled = interaction.route in self._sampled_routes
+
+        if is_sampled and random.random() >= self._sample_rate:
+            return
+
+        self.info(
+            f"{interaction.handler} ({interaction.user_id=}, {interaction.interaction=})",
+            extra={
+                self._FIELDS_ATTRIBUTE: {
+                    "event_type": interaction.event_type,
+                    "handler": interaction.handler,
+                    "route": interaction.route,
+                    "user_id": interaction.user_id,
+                    "username": interaction.username,
+                    "interaction": interaction.interaction,
+                    "database_ms": round(interaction.database_time * 1000, 3),
+                    "api_ms": round(interaction.api_time * 1000, 3),
+                    "total_ms": round(total_time * 1000, 3) if total_time is not None else None,
+                    "sample_rate": self._sample_rate if is_sampled else 1.0,
+                },
+            },
+        )
+
+    def start_interaction(self, event_type: str) -> LoggerService.Interaction:
+        current_interaction = self.Interaction(
+            event_type=event_type,
+        )
+
+        self._INTERACTION.set(current_interaction)
+
+        return current_interaction
+
+    def finish_interaction(self, interaction: LoggerService.Interaction) -> None:
+        if interaction.handler:
+            self._log_interaction(
+                interaction=interaction,
+                total_time=time.perf_counter() - interaction.time_started,
+            )
+
+    def add_database_time(self, method_name: str, elapsed: float) -> None:
+        if current_interaction := self._INTERACTION.get():
+            current_interaction.database_time += elapsed
+
+    def add_api_time(self, elapsed: float) -> None:
+        if current_interaction := self._INTERACTION.get():
+            current_interaction.api_time += elapsed
+
+    def log_slow_query(self, statement: str, elapsed: float, query_plan: list[str]) -> None:
+        self.warning(
+            f"{self.log_slow_query.__name__} ({elapsed=})",
+            extra={
+                self._FIELDS_ATTRIBUTE: {
+                    "event_type": "slow_query",
+                    "statement": statement,
+                    "elapsed_ms": round(elapsed * 1000, 3),
+                    "query_plan": query_plan,
+                },
+            },
+        )
+
+    def log_user_interaction(self, user: aiogram.types.User, interaction: str, handler: str) -> None:
+        current_interaction = self._INTERACTION.get()
+        is_tracked = current_interaction is not None
+
+        if not is_tracked:
+            current_interaction = self.Interaction(
+                event_type=None,
+            )
+
+        current_interaction.handler = handler
+        current_interaction.route = interaction.split()[0] if interaction else None
+        current_interaction.user_id = user.id
+        current_interaction.username = user.username
+        current_interaction.interaction = interaction
+
+        if not is_tracked:
+            self._log_interaction(
+                interaction=current_interaction,
+                total_time=None,
+            )
+
+    @property
+    def logs_path(self) -> str | None:
+        for handler in self._queue_listener.handlers:
+            if isinstance(handler, logging.FileHandler):
+                return handler.baseFilename
+        return None
+
+    def get_logs_paths(self) -> list[str]:
+        logs_directory = os.path.dirname(self.logs_path)
+        logs_file_name = os.path.basename(self.logs_path)
+
+        return sorted(
+            [
+                entry.path for entry in os.scandir(logs_directory)
+                if entry.is_file() and entry.name.startswith(logs_file_name)
+            ],
+            key=os.path.getmtime,
+            reverse=True,
+        )
+
+    def _get_line_date(self, line: bytes) -> datetime.datetime | None:
+        for pattern, date_format in self._DATE_FORMATS.items():
+            if match := pattern.match(line):
+                return datetime.datetime.strptime(match.group(1).decode(), date_format)
+        return None
+
+    def _iter_reversed_lines(self, path: str) -> typing.Iterator[bytes]:
+        with open(path, "rb") as logs_file:
+            position = logs_file.seek(0, os.SEEK_END)
+            remainder = bytes()
+
+            while position > 0:
+                chunk_size = min(self._CHUNK_SIZE, position)
+                position -= chunk_size
+                logs_file.seek(position)
+
+                lines = (logs_file.read(chunk_size) + remainder).split(b"\n")
+                remainder = lines.pop(0)
+
+                for line in reversed(lines):
+                    yield line
+
+            yield remainder
+
+    def get_logs_tail(self, lines_count: int) -> bytes:
+        lines = list()
+
+        for line in self._iter_reversed_lines(self.logs_path):
+            if line or lines:
+                lines.append(line)
+            if len(lines) >= lines_count:
+                break
+
+        return b"\n".join(reversed(lines))
+
+    def get_logs_since(self, date: datetime.datetime, max_size: int) -> bytes:
+        lines = list()
+        pending_lines = list()
+        size = int()
+
+        for line in self._iter_reversed_lines(self.logs_path):
+            line_date = self._get_line_date(line)
+
+            if line_date is None:
+                if line:
+                    pending_lines.append(line)
+            elif line_date >= date and size + len(line) <= max_size:
+                lines.extend(pending_lines)
+                lines.append(line)
+                size += sum(len(pending_line) + 1 for pending_line in pending_lines) + len(line) + 1
+                pending_lines.clear()
+            else:
+                break
+
+        return b"\n".join(reversed(lines))
+
+    def export_logs(self, path: str) -> str:
+        import tempfile, gzip, shutil
+
+        export_file = tempfile.NamedTemporaryFile(
+            suffix=".gz",
+            delete=False,
+        )
+
+        with open(path, "rb") as logs_file, gzip.GzipFile(fileobj=export_file, mode="wb") as gzip_file:
+            shutil.copyfileobj(logs_file, gzip_file, self._CHUNK_SIZE)
+
+        export_file.close()
+
+        return export_file.name
+
+
+class ConfigPoolService:
+    def __init__(
+            self,
+            database: IDatabaseBackend,
+            clock: utils.Clock,
+            size: int,
+            reservation_ttl: int,
+            low_stock_threshold: int,
+            recycle_grace_period: int,
+            recycle_batch_size: int,
+            recycle_without_rotation: bool,
+            rotation_hook: typing.Callable[[models.ConfigValues], str | None] | None = None,
+    ) -> None:
+        self._database = database
+        self._clock = clock
+        self._size = size
+        self._reservation_ttl = reservation_ttl
+        self._low_stock_threshold = low_stock_threshold
+        self._recycle_grace_period = recycle_grace_period
+        self._recycle_batch_size = recycle_batch_size
+        self._recycle_without_rotation = recycle_without_rotation
+        self._rotation_hook = rotation_hook
+        self._queue = collections.deque()
+        self._available_count = int()
+        self._is_low_stock = False
+        self._lock = threading.Lock()
+
+    @property
+    def available_count(self) -> int:
+        with self._lock:
+            return self._available_count
+
+    @property
+    def is_refill_needed(self) -> bool:
+        with self._lock:
+            return len(self._queue) < self._size // 2
+
+    def _get_next_config_id(self) -> int | None:
+        with self._lock:
+            return self._queue.popleft() if self._queue else None
+
+    def refill(self) -> None:
+        current_timestamp = self._clock.timestamp()
+        current_config_ids = self._database.config.get_available_config_ids(
+            timestamp=current_timestamp,
+            limit=self._size,
+        )
+        current_available_count = self._database.config.get_available_configs_count(
+            timestamp=current_timestamp,
+        )
+
+        with self._lock:
+            self._queue = collections.deque(current_config_ids)
+            self._available_count = current_available_count
+
+    def check_low_stock(self) -> bool:
+        is_low_stock = self.available_count < self._low_stock_threshold
+        is_alerted = is_low_stock and not self._is_low_stock
+        self._is_low_stock = is_low_stock
+
+        return is_alerted
+
+    def claim(self) -> int | None:
+        for _ in range(2):
+            while (current_config_id := self._get_next_config_id()) is not None:
+                current_timestamp = self._clock.timestamp()
+
+                if self._database.config.reserve_config(
+                        config_id=current_config_id,
+                        timestamp=current_timestamp,
+                        reserved_until=current_timestamp + self._reservation_ttl,
+                ):
+                    with self._lock:
+                        self._available_count = max(self._available_count - 1, int())
+
+                    return current_config_id
+
+            self.refill()
+
+        return None
+
+    def release(self, config_id: int) -> None:
+        self._database.config.release_config(
+            config_id=config_id,
+        )
+
+    def set_rotation_hook(self, rotation_hook: typing.Callable[[models.ConfigValues], str | None] | None) -> None:
+        self._rotation_hook = rotation_hook
+
+    def recycle(self, timestamp: int) -> int:
+        if not self._rotation_hook and not self._recycle_without_rotation:
+            return int()
+
+        recycled_count = int()
+
+        while True:
+            current_configs = self._database.config.get_recyclable_configs(
+                timestamp=timestamp - self._recycle_grace_period,
+                limit=self._recycle_batch_size,
+            )
+
+            if not current_configs:
+                break
+
+            recycled_count += self._database.config.recycle_configs(
+                configs=[
+                    (
+                        self._rotation_hook(current_config) if self._rotation_hook else None,
+                        current_config.id,
+                        current_config.subscription_id,
+                    ) for current_config in current_configs
+                ],
+            )
+
+            if len(current_configs) < self._recycle_batch_size:
+                break
+
+        if recycled_count:
+            self.refill()
+
+        return recycled_count
+
+
+class MetricsService:
+    class IMetric(abc.ABC):
+        _TYPE: str = None
+
+        def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = tuple()) -> None:
+            self._name = name
+            self._documentation = documentation
+            self._labels = labels
+            self._lock = threading.Lock()
+
+        @staticmethod
+        def _escape(value: typing.Any) -> str:
+            return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace("\"", "\\\"")
+
+        def _get_labels_text(self, label_values: tuple, extra_labels: dict[str, typing.Any] | None = None) -> str:
+            labels = list(zip(self._labels, label_values)) + list((extra_labels or dict()).items())
+
+            return "{" + ",".join(
+                f"{label}=\"{self._escape(value)}\"" for label, value in labels
+            ) + "}" if labels else str()
+
+        @abc.abstractmethod
+        def _get_samples(self) -> list[str]:
+            pass
+
+        def collect(self) -> list[str]:
+            return [
+                f"# HELP {self._name} {self._documentation}",
+                f"# TYPE {self._name} {self._TYPE}",
+                *self._get_samples(),
+            ]
+
+    class Counter(IMetric):
+        _TYPE = "counter"
+
+        def __init__(
+                self,
+                name: str,
+                documentation: str,
+                labels: tuple[str, ...] = tuple(),
+                callback: typing.Callable[[], dict[tuple, float]] | None = None,
+        ) -> None:
+            super().__init__(name, documentation, labels)
+            self._values = dict()
+            self._callback = callback
+
+        def set_callback(self, callback: typing.Callable[[], dict[tuple, float]]) -> None:
+            self._callback = callback
+
+        def inc(self, *label_values: typing.Any, amount: float = 1.0) -> None:
+            with self._lock:
+                self._values[label_values] = self._values.get(label_values, float()) + amount
+
+        def _get_samples(self) -> list[str]:
+            if self._callback:
+                values = self._callback()
+            else:
+                with self._lock:
+                    values = dict(self._values)
+
+            return [
+                f"{self._name}{self._get_labels_text(label_values)} {value}"
+                for label_values, value in values.items()
+            ]
+
+    class Gauge(IMetric):
+        _TYPE = "gauge"
+
+        def __init__(
+                self,
+                name: str,
+                documentation: str,
+                labels: tuple[str, ...] = tuple(),
+                callback: typing.Callable[[], dict[tuple, float]] | None = None,
+        ) -> None:
+            super().__init__(name, documentation, labels)
+            self._values = dict()
+            self._callback = callback
+
+        def set_callback(self, callback: typing.Callable[[], dict[tuple, float]]) -> None:
+            self._callback = callback
+
+        def set(self, *label_values: typing.Any, value: float) -> None:
+            with self._lock:
+                self._values[label_values] = value
+
+        def _get_samples(self) -> list[str]:
+            if self._callback:
+                values = self._callback()
+            else:
+                with self._lock:
+                    values = dict(self._values)
+
+            return [
+                f"{self._name}{self._get_labels_text(label_values)} {value}"
+                for label_values, value in values.items()
+            ]
+
+    class Histogram(IMetric):
+        _TYPE = "histogram"
+        _BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+        def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = tuple()) -> None:
+            super().__init__(name, documentation, labels)
+            self._values = dict()
+
+        def observe(self, *label_values: typing.Any, value: float) -> None:
+            with self._lock:
+                buckets, total = self._values.get(label_values, ([0] * (len(self._BUCKETS) + 1), float()))
+                buckets[bisect.bisect_left(self._BUCKETS, value)] += 1
+                self._values[label_values] = (buckets, total + value)
+
+        def _get_samples(self) -> list[str]:
+            samples = list()
+
+            with self._lock:
+                for label_values, (buckets, total) in self._values.items():
+                    count = int()
+
+                    for bucket, bucket_count in zip([*self._BUCKETS, "+Inf"], buckets):
+                        count += bucket_count
+                        samples.append(
+                            f"{self._name}_bucket{self._get_labels_text(label_values, {'le': bucket})} {count}"
+                        )
+
+                    samples.append(f"{self._name}_sum{self._get_labels_text(label_values)} {total}")
+                    samples.append(f"{self._name}_count{self._get_labels_text(label_values)} {count}")
+
+            return samples
+
+    _PREFIX = "samplevpnbot"
+    _CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, host: str, port: int) -> None:
+        self._host = host
+        self._port = port
+        self._runner = None
+        self._metrics: list[MetricsService.IMetric] = list()
+
+        self.updates = self.add_metric(
+            self.Counter(f"{self._PREFIX}_updates_total", "Updates received by type.", ("event_type",)),
+        )
+        self.callback_queries = self.add_metric(
+            self.Counter(f"{self._PREFIX}_callback_queries_total", "Callback queries by route.", ("route",)),
+        )
+        self.handler_duration = self.add_metric(
+            self.Histogram(f"{self._PREFIX}_handler_duration_seconds", "Update handling latency.", ("handler",)),
+        )
+        self.database_duration = self.add_metric(
+            self.Histogram(f"{self._PREFIX}_database_duration_seconds", "Database method latency.", ("method",)),
+        )
+        self.api_requests = self.add_metric(
+            self.Counter(f"{self._PREFIX}_api_requests_total", "Telegram Bot API requests.", ("method",)),
+        )
+        self.api_errors = self.add_metric(
+            self.Counter(f"{self._PREFIX}_api_errors_total", "Telegram Bot API errors.", ("method", "error")),
+        )
+        self.api_duration = self.add_metric(
+            self.Histogram(f"{self._PREFIX}_api_duration_seconds", "Telegram Bot API latency.", ("method",)),
+        )
+        self.worker_duration = self.add_metric(
+            self.Histogram(f"{self._PREFIX}_worker_cycle_duration_seconds", "Renewal worker cycle duration."),
+        )
+        self.worker_backlog = self.add_metric(
+            self.Gauge(f"{self._PREFIX}_worker_due_subscriptions", "Due subscriptions in the last worker cycle."),
+        )
+        self.fsm_states = self.add_metric(
+            self.Gauge(f"{self._PREFIX}_fsm_states", "Users in each FSM state.", ("state",)),
+        )
+        self.log_records_dropped = self.add_metric(
+            self.Counter(f"{self._PREFIX}_log_records_dropped_total", "Log records dropped by the logging queue."),
+        )
+        self.configs_available = self.add_metric(
+            self.Gauge(f"{self._PREFIX}_configs_available", "Free configs at the last pool refill."),
+        )
+        self.configs_recycled = self.add_metric(
+            self.Counter(f"{self._PREFIX}_configs_recycled_total", "Configs returned to the pool after expiry."),
+        )
+
+    def add_metric(self, metric: MetricsService.IMetric) -> typing.Any:
+        self._metrics.append(metric)
+        return metric
+
+    def observe_database(self, method_name: str, elapsed: float) -> None:
+        self.database_duration.observe(method_name, value=elapsed)
+
+    def render(self) -> str:
+        return "\n".join(
+            line for metric in self._metrics for line in metric.collect()
+        ) + "\n"
+
+    async def _metrics_handler(self, request: aiohttp.web.Request) -> aiohttp.web.Response:
+        import aiohttp.web
+
+        return aiohttp.web.Response(
+            body=self.render().encode(),
+            headers={
+                "Content-Type": self._CONTENT_TYPE,
+            },
+        )
+
+    async def start(self) -> None:
+        import aiohttp.web
+
+        application = aiohttp.web.Application()
+        application.router.add_get("/metrics", self._metrics_handler)
+
+        self._runner = aiohttp.web.AppRunner(application)
+        await self._runner.setup()
+        await aiohttp.web.TCPSite(self._runner, self._host, self._port).start()
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
 
 # endregion
@@ -6,8 +6,8 @@ import models, data, constants
 
 class ButtonsContainer:
     def __init__(self) -> None:
-        self._data = data.DataProvider()
-        self._config = data.ConfigProvider()
+        self._data = data.DataProvider.get_instance()
+        self._config = data.ConfigProvider.get_instance()
 
     # region /start
 
@@ -179,6 +179,13 @@ class ButtonsContainer:
             callback_data=f"admin_user {tg_id}",
         )
 
+    @staticmethod
+    def admin_user_referrals(tg_id: int) -> aiogram.types.InlineKeyboardButton:
+        return aiogram.types.InlineKeyboardButton(
+            text="Рефералы",
+            callback_data=f"admin_user_referrals {tg_id}",
+        )
+
     @staticmethod
     def admin_user_balance_enter(tg_id: int) -> aiogram.types.InlineKeyboardButton:
         return aiogram.types.InlineKeyboardButton(
@@ -267,6 +274,34 @@ class ButtonsContainer:
             callback_data="admin_logs",
         )
 
+    @property
+    def admin_logs_tail(self) -> aiogram.types.InlineKeyboardButton:
+        return aiogram.types.InlineKeyboardButton(
+            text="Последние строки",
+            callback_data="admin_logs_tail",
+        )
+
+    @property
+    def admin_logs_range_hour(self) -> aiogram.types.InlineKeyboardButton:
+        return aiogram.types.InlineKeyboardButton(
+            text="За час",
+            callback_data=f"admin_logs_range {constants.SECONDS_IN_HOUR}",
+        )
+
+    @property
+    def admin_logs_range_day(self) -> aiogram.types.InlineKeyboardButton:
+        return aiogram.types.InlineKeyboardButton(
+            text="За сутки",
+            callback_data=f"admin_logs_range {constants.SECONDS_IN_DAY}",
+        )
+
+    @staticmethod
+    def admin_logs_export(logs_file_name: str) -> aiogram.types.InlineKeyboardButton:
+        return aiogram.types.InlineKeyboardButton(
+            text=f"Экспорт «{logs_file_name}»",
+            callback_data=f"admin_logs_export {logs_file_name}",
+        )
+
     @property
     def admin_settings(self) -> aiogram.types.InlineKeyboardButton:
         return aiogram.types.InlineKeyboardButton(
@@ -274,6 +309,20 @@ class ButtonsContainer:
             callback_data="admin_settings",
         )
 
+    @property
+    def admin_settings_queries(self) -> aiogram.types.InlineKeyboardButton:
+        return aiogram.types.InlineKeyboardButton(
+            text="Профиль запросов",
+            callback_data="admin_settings_queries",
+        )
+
+    @property
+    def admin_settings_queries_reset(self) -> aiogram.types.InlineKeyboardButton:
+        return aiogram.types.InlineKeyboardButton(
+            text="Сбросить статистику",
+            callback_data="admin_settings_queries_reset",
+        )
+
     @property
     def admin_settings_stop(self) -> aiogram.types.InlineKeyboardButton:
         return aiogram.types.InlineKeyboardButton(
@@ -1,5 +1,5 @@
 from __future__ import annotations
-import datetime, enum
+import enum
 import pyquoks.models
 import constants
 
@@ -13,6 +13,49 @@ class PlansType(enum.IntEnum):
     YEAR = 3
 
 
+class ConfigImportStatus(enum.IntEnum):
+    ADDED = 0
+    INVALID_EXTENSION = 1
+    INVALID_NAME = 2
+    INVALID_DATA = 3
+
+
+class LedgerAccountType(enum.IntEnum):
+    USER = 0
+    PROVIDER = 1
+    REVENUE = 2
+    REFERRALS = 3
+    ADJUSTMENTS = 4
+
+
+class LedgerEntryType(enum.IntEnum):
+    OPENING = 0
+    PAYMENT = 1
+    PURCHASE = 2
+    RENEWAL = 3
+    REFERRAL = 4
+    ADJUSTMENT = 5
+
+    @property
+    def counter_account_type(self) -> LedgerAccountType:
+        match self:
+            case LedgerEntryType.PAYMENT:
+                return LedgerAccountType.PROVIDER
+            case LedgerEntryType.PURCHASE | LedgerEntryType.RENEWAL:
+                return LedgerAccountType.REVENUE
+            case LedgerEntryType.REFERRAL:
+                return LedgerAccountType.REFERRALS
+            case _:
+                return LedgerAccountType.ADJUSTMENTS
+
+
+class MigrationType(enum.IntEnum):
+    STATEMENT = 0
+    COLUMN = 1
+    BACKFILL = 2
+    METHOD = 3
+
+
 # endregion
 
 # region Models & Containers
@@ -94,13 +137,51 @@ class ConfigValues(pyquoks.models.IValues):
     _ATTRIBUTES = {
         "id",
         "name",
-        "data",
+        "data_hash",
         "subscription_id",
+        "reserved_until",
     }
     id: int | None
     name: str | None
-    data: str | None
+    data_hash: str | None
     subscription_id: int | None
+    reserved_until: int | None
+
+
+class LedgerEntryValues(pyquoks.models.IValues):
+    _ATTRIBUTES = {
+        "id",
+        "transaction_id",
+        "account_type",
+        "account_id",
+        "kind",
+        "amount",
+        "date",
+        "reference",
+    }
+    id: int | None
+    transaction_id: int | None
+    account_type: int | None
+    account_id: int | None
+    kind: int | None
+    amount: int | None
+    date: int | None
+    reference: str | None
+
+
+class LedgerSnapshotValues(pyquoks.models.IValues):
+    _ATTRIBUTES = {
+        "id",
+        "tg_id",
+        "entry_id",
+        "balance",
+        "date",
+    }
+    id: int | None
+    tg_id: int | None
+    entry_id: int | None
+    balance: int | None
+    date: int | None
 
 
 class PaymentValues(pyquoks.models.IValues):
@@ -142,13 +223,8 @@ class SubscriptionValues(pyquoks.models.IValues):
     tg_id: int | None
     config_id: int | None
 
-    @property
-    def is_expired(self) -> bool:
-        return self.expires_at < datetime.datetime.now().timestamp()
-
-    @property
-    def status(self) -> str:
-        return "Истекла" if self.is_expired else "Активна" if self.is_active else "Отменена"
+    def is_expired(self, timestamp: int) -> bool:
+        return self.expires_at < timestamp
 
 
 class UserValues(pyquoks.models.IValues):
@@ -157,11 +233,13 @@ class UserValues(pyquoks.models.IValues):
         "tg_username",
         "balance",
         "referrer_id",
+        "referrals_count",
     }
     tg_id: int | None
     tg_username: str | None
     balance: int | None
     referrer_id: int | None
+    referrals_count: int | None
 
     @property
     def html_text(self) -> str:
@@ -171,4 +249,13 @@ class UserValues(pyquoks.models.IValues):
     def text(self) -> str:
         return f"@{self.tg_username} ({self.tg_id})" if self.tg_username else str(self.tg_id)
 
+
+class ReferralValues(UserValues):
+    _ATTRIBUTES = UserValues._ATTRIBUTES | {
+        "depth",
+        "earnings",
+    }
+    depth: int | None
+    earnings: int | None
+
 # endregion
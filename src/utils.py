@@ -1,8 +1,90 @@
 from __future__ import annotations
-import datetime
+import datetime, functools, os, string, tarfile, time, typing, zipfile
 
 
+@functools.lru_cache(maxsize=4096)
 def get_formatted_date(date: float | datetime.datetime) -> str:
     return (date if isinstance(date, datetime.datetime) else datetime.datetime.fromtimestamp(date)).strftime(
         format="%d.%m.%y %H:%M:%S",
     )
+
+
+@functools.lru_cache(maxsize=1024)
+def get_formatted_amount(amount: int, currency: str) -> str:
+    return f"{amount} {currency}"
+
+
+def get_formatted_size(size: int) -> str:
+    for unit in ["B", "KB", "MB"]:
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def get_percentile(samples: typing.Iterable[float], percentile: float) -> float:
+    current_samples = sorted(samples)
+
+    return current_samples[
+        min(int(len(current_samples) * percentile), len(current_samples) - 1)
+    ] if current_samples else float()
+
+
+def get_archive_files(file: typing.BinaryIO, max_size: int) -> typing.Iterator[tuple[str, bytes | None]]:
+    if zipfile.is_zipfile(file):
+        file.seek(0)
+
+        with zipfile.ZipFile(file) as archive:
+            for member in archive.infolist():
+                if member.is_dir() or os.path.basename(member.filename).startswith("."):
+                    continue
+
+                with archive.open(member) as member_file:
+                    member_data = member_file.read(max_size + 1)
+
+                yield os.path.basename(member.filename), member_data if len(member_data) <= max_size else None
+    else:
+        file.seek(0)
+
+        with tarfile.open(fileobj=file, mode="r|*") as archive:
+            for member in archive:
+                if not member.isfile() or os.path.basename(member.name).startswith("."):
+                    continue
+
+                member_data = archive.extractfile(member).read(max_size + 1)
+
+                yield os.path.basename(member.name), member_data if len(member_data) <= max_size else None
+
+
+class Clock:
+    def __init__(self, time_source: typing.Callable[[], float] = time.time) -> None:
+        self._time_source = time_source
+
+    def timestamp(self) -> int:
+        return int(self._time_source())
+
+
+class Template:
+    def __init__(self, source: str) -> None:
+        self._parts = list()
+
+        for literal_text, field_name, format_spec, conversion in string.Formatter().parse(source):
+            if literal_text:
+                self._parts.append(literal_text)
+            if field_name is not None:
+                self._parts.append(
+                    (
+                        field_name,
+                        format_spec,
+                    ),
+                )
+
+        self._text = "".join(self._parts) if all(isinstance(part, str) for part in self._parts) else None
+
+    def render(self, **kwargs) -> str:
+        if self._text is not None:
+            return self._text
+
+        return "".join([
+            part if isinstance(part, str) else format(kwargs[part[0]], part[1]) for part in self._parts
+        ])
@@ -0,0 +1,55 @@
+import logging, os, sys, typing
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import data
+
+POSTGRES_DSN_VARIABLE = "SAMPLEVPNBOT_TEST_POSTGRES_DSN"
+
+
+class TemporaryDatabaseManager(data.DatabaseManager):
+    def __init__(self, path: str, logger: logging.Logger | None = None) -> None:
+        self._PATH = path
+        super().__init__(
+            logger=logger,
+        )
+
+
+def _reset_postgres_database(database: data.PostgresDatabaseManager) -> None:
+    tables = [table._NAME for table in database._DATABASE_OBJECTS.values()]
+    tables.append(database.IDatabase._SCHEMA_VERSION_NAME)
+
+    database._run(
+        database._pool.execute(
+            f"DROP TABLE IF EXISTS {', '.join(tables)} CASCADE; DROP SEQUENCE IF EXISTS ledger_transaction_id_seq",
+        ),
+    )
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def database(request, tmp_path) -> typing.Iterator[data.IDatabaseBackend]:
+    match request.param:
+        case "postgresql":
+            if not os.environ.get(POSTGRES_DSN_VARIABLE):
+                pytest.skip(f"{POSTGRES_DSN_VARIABLE} is not set")
+
+            current_database = data.PostgresDatabaseManager(
+                dsn=os.environ[POSTGRES_DSN_VARIABLE],
+                pool_min_size=1,
+                pool_max_size=4,
+            )
+            _reset_postgres_database(current_database)
+            current_database.migrate()
+
+            yield current_database
+
+            _reset_postgres_database(current_database)
+        case _:
+            current_database = TemporaryDatabaseManager(
+                path=str(tmp_path),
+            )
+
+            yield current_database
+
+    current_database.close_all()
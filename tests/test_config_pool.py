@@ -0,0 +1,96 @@
+import threading
+import data, utils
+
+
+def _get_config_pool(database: data.IDatabaseBackend, recycle_without_rotation: bool) -> data.ConfigPoolService:
+    return data.ConfigPoolService(
+        database=database,
+        clock=utils.Clock(lambda: 1000),
+        size=10,
+        reservation_ttl=60,
+        low_stock_threshold=1,
+        recycle_grace_period=100,
+        recycle_batch_size=10,
+        recycle_without_rotation=recycle_without_rotation,
+    )
+
+
+def _add_expired_config(database: data.IDatabaseBackend) -> int:
+    current_config = database.config.add_config(
+        name="first",
+        data="first data",
+        subscription_id=None,
+    )
+    current_subscription = database.subscriptions.add_subscription(
+        plan_id=1,
+        is_active=1,
+        is_checked=0,
+        subscribed_at=10,
+        expires_at=100,
+        tg_id=1,
+        config_id=current_config.id,
+    )
+    database.config.attach_subscription(current_config.id, current_subscription.id)
+    database.subscriptions.switch_checked(current_subscription.id)
+
+    return current_config.id
+
+
+def test_recycle_requires_rotation(database: data.IDatabaseBackend) -> None:
+    config_id = _add_expired_config(database)
+    config_pool = _get_config_pool(
+        database=database,
+        recycle_without_rotation=False,
+    )
+
+    assert config_pool.recycle(1000) == 0
+    assert database.config.get_config(config_id).subscription_id is not None
+
+    config_pool.set_rotation_hook(lambda config: f"{config.name} rotated")
+
+    assert config_pool.recycle(1000) == 1
+    assert database.config.get_config_data(config_id) == "first rotated"
+    assert config_pool.available_count == 1
+
+
+def test_recycle_without_rotation(database: data.IDatabaseBackend) -> None:
+    config_id = _add_expired_config(database)
+    config_pool = _get_config_pool(
+        database=database,
+        recycle_without_rotation=True,
+    )
+
+    assert config_pool.recycle(1000) == 1
+    assert database.config.get_config_data(config_id) == "first data"
+
+
+def test_claim_with_concurrent_refill(database: data.IDatabaseBackend) -> None:
+    database.config.add_configs(
+        configs=[(f"config {config_number}", f"data {config_number}") for config_number in range(30)],
+    )
+    config_pool = _get_config_pool(
+        database=database,
+        recycle_without_rotation=False,
+    )
+    claimed_ids = list()
+    is_claiming = threading.Event()
+    is_claiming.set()
+
+    def refill_configs() -> None:
+        while is_claiming.is_set():
+            config_pool.refill()
+
+    refill_thread = threading.Thread(target=refill_configs)
+    refill_thread.start()
+
+    try:
+        while (config_id := config_pool.claim()) is not None:
+            claimed_ids.append(config_id)
+    finally:
+        is_claiming.clear()
+        refill_thread.join()
+
+    config_pool.refill()
+
+    assert len(claimed_ids) == len(set(claimed_ids)) == 30
+    assert config_pool.available_count == 0
@@ -0,0 +1,428 @@
+import threading
+import pytest
+import data, models
+
+
+def _add_users(database: data.IDatabaseBackend) -> None:
+    for tg_id, tg_username, referrer_id in (
+            (1, "first", None),
+            (2, "second", 1),
+            (3, "third", 2),
+            (4, None, 1),
+    ):
+        database.users.add_user(
+            tg_id=tg_id,
+            tg_username=tg_username,
+            balance=int(),
+            referrer_id=referrer_id,
+        )
+
+
+def _add_subscription(database: data.IDatabaseBackend, tg_id: int, config_id: int, expires_at: int) -> models.SubscriptionValues:
+    return database.subscriptions.add_subscription(
+        plan_id=1,
+        is_active=1,
+        is_checked=0,
+        subscribed_at=10,
+        expires_at=expires_at,
+        tg_id=tg_id,
+        config_id=config_id,
+    )
+
+
+def test_schema_versions(database: data.IDatabaseBackend) -> None:
+    assert set(database.get_schema_versions()) == set(database._DATABASE_OBJECTS)
+    assert not any(database.migrate().values())
+
+
+def test_users(database: data.IDatabaseBackend) -> None:
+    _add_users(database)
+    database.users.add_user(
+        tg_id=1,
+        tg_username="duplicate",
+        balance=100,
+        referrer_id=None,
+    )
+
+    assert database.users.get_user(1).tg_username == "first"
+    assert database.users.get_user(5) is None
+    assert [user.tg_id for user in database.users.get_all_users()] == [1, 2, 3, 4]
+    assert [user.tg_username for user in database.users.get_all_users_labels()] == ["first", "second", "third", None]
+    assert database.users.get_users_count() == 4
+    assert database.users.get_ref_count(1) == 2
+    assert database.users.get_ref_count(3) == 0
+    assert database.users.get_ref_count(5) == 0
+
+
+def test_referral_tree(database: data.IDatabaseBackend) -> None:
+    _add_users(database)
+    database.payments.add_payment(
+        provider_id=None,
+        amount=15,
+        currency="RUB",
+        payload="referral 3",
+        date=10,
+        tg_id=2,
+    )
+
+    referral_tree = database.users.get_referral_tree(
+        tg_id=1,
+        max_depth=2,
+        limit=10,
+    )
+
+    assert [(referral.tg_id, referral.depth, referral.earnings) for referral in referral_tree] == [
+        (1, 0, 0),
+        (2, 1, 15),
+        (3, 2, 0),
+        (4, 1, 0),
+    ]
+    assert len(database.users.get_referral_tree(tg_id=1, max_depth=1, limit=2)) == 2
+
+
+def test_balances(database: data.IDatabaseBackend) -> None:
+    _add_users(database)
+    database.users.add_balance(
+        tg_id=1,
+        amount=100,
+        kind=models.LedgerEntryType.PAYMENT,
+        date=10,
+        reference="payment",
+    )
+    database.users.reduce_balance(
+        tg_id=1,
+        amount=30,
+        kind=models.LedgerEntryType.PURCHASE,
+        date=11,
+    )
+    database.users.edit_balance(
+        tg_id=1,
+        balance=50,
+        date=12,
+    )
+    database.users.add_balance(
+        tg_id=5,
+        amount=100,
+        kind=models.LedgerEntryType.PAYMENT,
+        date=13,
+    )
+
+    assert database.users.get_user(1).balance == 50
+    assert [(entry.kind, entry.amount) for entry in database.ledger.get_user_entries(1)] == [
+        (models.LedgerEntryType.PAYMENT, 100),
+        (models.LedgerEntryType.PURCHASE, -30),
+        (models.LedgerEntryType.ADJUSTMENT, -20),
+    ]
+    assert not database.ledger.get_user_entries(5)
+
+
+def test_ledger(database: data.IDatabaseBackend) -> None:
+    database.users.add_user(
+        tg_id=1,
+        tg_username="first",
+        balance=40,
+        referrer_id=None,
+    )
+
+    assert database.ledger.add_opening_balances(10) == 1
+    assert database.ledger.add_opening_balances(11) == 0
+    assert database.ledger.get_balance(1) == 40
+
+    database.users.add_balance(
+        tg_id=1,
+        amount=60,
+        kind=models.LedgerEntryType.PAYMENT,
+        date=12,
+    )
+    payment_entry = database.ledger.get_user_entries(1)[-1]
+    current_transaction = database.ledger.get_transaction(payment_entry.transaction_id)
+
+    assert [entry.amount for entry in current_transaction] == [60, -60]
+    assert [entry.account_type for entry in current_transaction] == [
+        models.LedgerAccountType.USER,
+        models.LedgerAccountType.PROVIDER,
+    ]
+    assert database.ledger.get_user_entries(1, payment_entry.id) == []
+    assert database.ledger.get_balance(1) == 100
+    assert database.ledger.verify_balance(1)
+
+    assert database.ledger_snapshots.get_latest_snapshot(1) is None
+    assert database.ledger.add_snapshots(13) == 1
+
+    current_snapshot = database.ledger_snapshots.get_latest_snapshot(1)
+
+    assert (current_snapshot.balance, current_snapshot.entry_id) == (100, payment_entry.id)
+
+    database.users.reduce_balance(
+        tg_id=1,
+        amount=25,
+        kind=models.LedgerEntryType.RENEWAL,
+        date=14,
+    )
+
+    assert database.ledger.get_balance(1) == 75
+    assert database.ledger.verify_balance(1)
+    assert database.ledger.add_snapshots(15) == 1
+    assert database.ledger_snapshots.get_latest_snapshot(1).balance == 75
+
+
+def test_concurrent_balance_changes(database: data.IDatabaseBackend) -> None:
+    database.users.add_user(
+        tg_id=1,
+        tg_username="first",
+        balance=int(),
+        referrer_id=None,
+    )
+    database.users.add_balance(
+        tg_id=1,
+        amount=1000,
+        kind=models.LedgerEntryType.PAYMENT,
+        date=10,
+    )
+
+    def reduce_balance() -> None:
+        for date in range(50):
+            database.users.reduce_balance(
+                tg_id=1,
+                amount=10,
+                kind=models.LedgerEntryType.PURCHASE,
+                date=date,
+            )
+
+    current_threads = [threading.Thread(target=reduce_balance) for _ in range(2)]
+
+    for current_thread in current_threads:
+        current_thread.start()
+
+    for current_thread in current_threads:
+        current_thread.join()
+
+    current_entries = database.ledger.get_user_entries(1)
+
+    assert database.users.get_user(1).balance == 0
+    assert len({entry.transaction_id for entry in current_entries}) == len(current_entries) == 101
+    assert all(
+        [entry.amount for entry in database.ledger.get_transaction(entry.transaction_id)] == [entry.amount, -entry.amount]
+        for entry in current_entries
+    )
+    assert database.ledger.verify_balance(1)
+
+
+def test_payments(database: data.IDatabaseBackend) -> None:
+    _add_users(database)
+    current_payment = database.payments.add_payment(
+        provider_id="manual",
+        amount=100,
+        currency="RUB",
+        payload="payment",
+        date=10,
+        tg_id=1,
+    )
+
+    assert database.payments.get_payment(current_payment.id).provider_id == "manual"
+    assert database.payments.get_payment(current_payment.id + 1) is None
+    assert database.payments.check_provider_payment("manual")
+    assert not database.payments.check_first_payment(1)
+    assert database.payments.check_first_payment(2)
+
+    assert database.payments.add_successful_payment(
+        provider_id="provider",
+        amount=200,
+        currency="RUB",
+        payload="payment",
+        date=11,
+        tg_id=2,
+        referrer_id=1,
+        referrer_amount=20,
+        referrer_payload="referral 2",
+    )
+    assert not database.payments.add_successful_payment(
+        provider_id="provider",
+        amount=200,
+        currency="RUB",
+        payload="payment",
+        date=12,
+        tg_id=2,
+        referrer_id=1,
+        referrer_amount=20,
+        referrer_payload="referral 2",
+    )
+
+    assert database.users.get_user(2).balance == 200
+    assert database.users.get_user(1).balance == 20
+    assert database.ledger.verify_balance(1)
+    assert database.ledger.verify_balance(2)
+    assert database.payments.get_payments_count() == 3
+    assert [payment.amount for payment in database.payments.get_all_payments()] == [100, 200, 20]
+    assert [payment.amount for payment in database.payments.get_all_payments_labels()] == [100, 200, 20]
+    assert sorted(payment.payload for payment in database.payments.get_user_payments(1)) == ["payment", "referral 2"]
+    assert [payment.amount for payment in database.payments.get_user_payments_labels(2)] == [200]
+
+
+def test_subscriptions(database: data.IDatabaseBackend) -> None:
+    first_subscription = _add_subscription(database, tg_id=1, config_id=1, expires_at=100)
+    second_subscription = _add_subscription(database, tg_id=1, config_id=2, expires_at=300)
+    third_subscription = _add_subscription(database, tg_id=2, config_id=3, expires_at=300)
+
+    assert database.subscriptions.get_subscription(first_subscription.id).expires_at == 100
+    assert database.subscriptions.get_subscription(second_subscription.id + 10) is None
+    assert len(database.subscriptions.get_all_subscriptions()) == 3
+    assert [subscription.plan_id for subscription in database.subscriptions.get_all_subscriptions_labels()] == [1, 1, 1]
+    assert database.subscriptions.get_subscriptions_count() == 3
+    assert [subscription.config_id for subscription in database.subscriptions.get_user_subscriptions(1)] == [1, 2]
+    assert len(database.subscriptions.get_user_subscriptions_labels(2)) == 1
+    assert [
+        subscription.id for subscription in database.subscriptions.get_user_active_subscriptions(1, 200)
+    ] == [second_subscription.id]
+    assert len(database.subscriptions.get_user_active_subscriptions_labels(1, 200)) == 1
+    assert database.subscriptions.get_user_active_subscriptions_count(1, 50) == 2
+
+    assert [
+        subscription.id for subscription in database.subscriptions.get_unchecked_expired_subscriptions(200)
+    ] == [first_subscription.id]
+
+    database.subscriptions.edit_expires_at(first_subscription.id, 400)
+    database.subscriptions.switch_active(second_subscription.id)
+    database.subscriptions.switch_checked(second_subscription.id)
+
+    assert database.subscriptions.get_subscription(first_subscription.id).expires_at == 400
+    assert database.subscriptions.get_subscription(second_subscription.id).is_active == 0
+    assert database.subscriptions.get_subscription(second_subscription.id).is_checked == 1
+    assert [
+        subscription.id for subscription in database.subscriptions.get_unchecked_expired_subscriptions(350)
+    ] == [third_subscription.id]
+
+
+def test_subscription_expiry_boundary(database: data.IDatabaseBackend) -> None:
+    current_subscription = _add_subscription(database, tg_id=1, config_id=1, expires_at=100)
+
+    assert not current_subscription.is_expired(100)
+    assert database.subscriptions.get_user_active_subscriptions_count(1, 100) == 1
+    assert database.subscriptions.get_unchecked_expired_subscriptions(100) == []
+    assert current_subscription.is_expired(101)
+    assert database.subscriptions.get_user_active_subscriptions_count(1, 101) == 0
+    assert [
+        subscription.id for subscription in database.subscriptions.get_unchecked_expired_subscriptions(101)
+    ] == [current_subscription.id]
+
+
+def test_configs(database: data.IDatabaseBackend) -> None:
+    first_config = database.config.add_config(
+        name="first",
+        data="first data",
+        subscription_id=None,
+    )
+
+    assert database.config.add_configs(
+        configs=[
+            ("second", "second data"),
+            ("third", "first data"),
+        ],
+    ) == 2
+    assert database.config.get_config(first_config.id).name == "first"
+    assert database.config.get_config_data(first_config.id) == "first data"
+    assert database.config.get_config_data(first_config.id + 10) is None
+    assert len(database.config.get_all_configs()) == 3
+    assert [config.name for config in database.config.get_all_configs_labels()] == ["first", "second", "third"]
+    assert database.config.get_configs_count() == 3
+    assert database.config.get_config_names() == {"first", "second", "third"}
+    assert not database.config.check_config_name("first")
+    assert database.config.check_config_name("fourth")
+
+    available_ids = database.config.get_available_config_ids(
+        timestamp=10,
+        limit=2,
+    )
+
+    assert len(available_ids) == 2
+    assert database.config.reserve_config(available_ids[0], timestamp=10, reserved_until=20)
+    assert not database.config.reserve_config(available_ids[0], timestamp=15, reserved_until=25)
+    assert database.config.get_available_configs_count(15) == 2
+
+    database.config.release_config(available_ids[0])
+
+    assert database.config.get_available_configs_count(15) == 3
+    assert len(database.config.get_available_configs()) == 3
+
+
+def test_concurrent_config_imports(database: data.IDatabaseBackend) -> None:
+    def add_configs() -> None:
+        for batch in range(10):
+            database.config.add_configs(
+                configs=[
+                    (f"imported {batch} {index}", f"imported data {batch} {index}") for index in range(20)
+                ],
+            )
+
+    current_thread = threading.Thread(target=add_configs)
+    current_thread.start()
+
+    for index in range(50):
+        current_config = database.config.add_config(
+            name=f"added {index}",
+            data=f"added data {index}",
+            subscription_id=None,
+        )
+        database.config.reserve_config(current_config.id, timestamp=10, reserved_until=20)
+        database.config.release_config(current_config.id)
+
+    current_thread.join()
+
+    assert database.config.get_configs_count() == 250
+    assert database.config.get_available_configs_count(10) == 250
+
+
+def test_config_recycling(database: data.IDatabaseBackend) -> None:
+    current_config = database.config.add_config(
+        name="first",
+        data="first data",
+        subscription_id=None,
+    )
+    current_subscription = _add_subscription(database, tg_id=1, config_id=current_config.id, expires_at=100)
+    database.config.attach_subscription(current_config.id, current_subscription.id)
+    database.subscriptions.switch_checked(current_subscription.id)
+
+    assert database.config.get_available_configs_count(10) == 0
+    assert database.config.get_recyclable_configs(timestamp=50, limit=10) == []
+
+    recyclable_configs = database.config.get_recyclable_configs(
+        timestamp=200,
+        limit=10,
+    )
+
+    assert [config.id for config in recyclable_configs] == [current_config.id]
+    assert database.config.recycle_configs(
+        configs=[
+            ("rotated data", current_config.id, current_subscription.id),
+        ],
+    ) == 1
+    assert database.config.get_config(current_config.id).subscription_id is None
+    assert database.config.get_config_data(current_config.id) == "rotated data"
+    assert database.config.get_available_configs_count(10) == 1
+    assert database.config.recycle_configs(
+        configs=[
+            (None, current_config.id, current_subscription.id),
+        ],
+    ) == 0
+
+
+def test_claims_are_exclusive(database: data.IDatabaseBackend) -> None:
+    if not isinstance(database, data.PostgresDatabaseManager):
+        pytest.skip("claims are only taken by the PostgreSQL backend")
+
+    current_config = database.config.add_config(
+        name="first",
+        data="first data",
+        subscription_id=None,
+    )
+    checked_subscription = _add_subscription(database, tg_id=1, config_id=current_config.id, expires_at=100)
+    database.config.attach_subscription(current_config.id, checked_subscription.id)
+    database.subscriptions.switch_checked(checked_subscription.id)
+    unchecked_subscription = _add_subscription(database, tg_id=2, config_id=2, expires_at=100)
+
+    assert [
+        subscription.id for subscription in database.subscriptions.get_unchecked_expired_subscriptions(200)
+    ] == [unchecked_subscription.id]
+    assert database.subscriptions.get_unchecked_expired_subscriptions(200) == []
+    assert len(database.config.get_recyclable_configs(timestamp=200, limit=10)) == 1
+    assert database.config.get_recyclable_configs(timestamp=200, limit=10) == []
@@ -0,0 +1,34 @@
+import aiogram.types
+import data, utils
+
+
+def _get_identity_provider(monkeypatch, tmp_path, bot_token: str, timestamp: int) -> data.IdentityProvider:
+    monkeypatch.setattr(data.IdentityProvider, "_PATH", str(tmp_path / "cache" / "identity.json"))
+
+    return data.IdentityProvider(
+        bot_token=bot_token,
+        ttl=100,
+        clock=utils.Clock(
+            time_source=lambda: timestamp,
+        ),
+    )
+
+
+def test_identity_cache(monkeypatch, tmp_path) -> None:
+    current_user = aiogram.types.User(
+        id=1,
+        is_bot=True,
+        first_name="bot",
+        username="first_bot",
+    )
+
+    assert _get_identity_provider(monkeypatch, tmp_path, bot_token="1:first", timestamp=10).load() is None
+
+    _get_identity_provider(monkeypatch, tmp_path, bot_token="1:first", timestamp=10).save(
+        user=current_user,
+    )
+
+    assert _get_identity_provider(monkeypatch, tmp_path, bot_token="1:first", timestamp=50).load() == current_user
+    assert _get_identity_provider(monkeypatch, tmp_path, bot_token="1:second", timestamp=50).load() == current_user
+    assert _get_identity_provider(monkeypatch, tmp_path, bot_token="2:first", timestamp=50).load() is None
+    assert _get_identity_provider(monkeypatch, tmp_path, bot_token="1:first", timestamp=110).load() is None
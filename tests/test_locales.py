@@ -0,0 +1,77 @@
+import json, os, string, typing
+import pytest
+import data
+
+LOCALES_PATH = os.path.join(os.path.dirname(data.__file__), "locales")
+
+
+def _get_fields(source: str) -> set[str]:
+    return {
+        field_name for _, field_name, _, _ in string.Formatter().parse(source) if field_name is not None
+    }
+
+
+@pytest.fixture
+def locales(monkeypatch, tmp_path) -> typing.Iterator[data.LocalesProvider]:
+    for language_code, catalog_data in (
+            ("ru", {"menu": {"greeting": "Привет, {name}", "farewell": "Пока"}}),
+            ("en", {"menu": {"greeting": "Hello, {name}"}}),
+    ):
+        with open(tmp_path / f"{language_code}.json", "w", encoding="utf-8") as catalog_file:
+            json.dump(catalog_data, catalog_file, ensure_ascii=False)
+
+    monkeypatch.setattr(data.LocalesProvider, "_PATH", str(tmp_path))
+    monkeypatch.setattr(data.LocalesProvider, "_CATALOGS", dict())
+    monkeypatch.setattr(data.LocalesProvider, "_LANGUAGE_CODES", None)
+
+    current_locales = data.LocalesProvider()
+
+    yield current_locales
+
+    current_locales.set_language_code(None)
+
+
+def test_language_code(locales: data.LocalesProvider) -> None:
+    assert locales.language_codes == {"ru", "en"}
+
+    for language_code, expected_language_code in (
+            ("en-US", "en"),
+            ("EN", "en"),
+            ("de", "ru"),
+            (None, "ru"),
+    ):
+        locales.set_language_code(language_code)
+
+        assert locales.language_code == expected_language_code
+
+
+def test_render(locales: data.LocalesProvider) -> None:
+    assert locales.render("menu", "greeting", name="first") == "Привет, first"
+
+    locales.set_language_code("en")
+
+    assert locales.render("menu", "greeting", name="first") == "Hello, first"
+    assert locales.render("menu", "farewell") == "Пока"
+    assert locales.get_catalog("en") is locales.get_catalog("en")
+
+    with pytest.raises(KeyError):
+        locales.render("menu", "missing")
+
+
+def test_catalogs_match() -> None:
+    catalogs = dict()
+
+    for filename in os.listdir(LOCALES_PATH):
+        with open(os.path.join(LOCALES_PATH, filename), encoding="utf-8") as catalog_file:
+            catalogs[os.path.splitext(filename)[0]] = json.load(catalog_file)
+
+    default_catalog = catalogs.pop(data.LocalesProvider._DEFAULT_LANGUAGE_CODE)
+
+    for catalog in catalogs.values():
+        assert catalog.keys() == default_catalog.keys()
+
+        for section, strings in catalog.items():
+            assert strings.keys() == default_catalog[section].keys()
+
+            for key, value in strings.items():
+                assert _get_fields(value) == _get_fields(default_catalog[section][key]), (section, key)
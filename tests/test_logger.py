@@ -0,0 +1,31 @@
+import logging, queue, threading
+import data
+
+
+def test_queue_handler_counts_dropped_records() -> None:
+    current_handler = data.LoggerService.QueueHandler(
+        records_queue=queue.Queue(
+            maxsize=1,
+        ),
+    )
+
+    def handle_records() -> None:
+        for index in range(1000):
+            current_handler.handle(
+                logging.makeLogRecord(
+                    {
+                        "msg": f"record {index}",
+                    },
+                ),
+            )
+
+    current_threads = [threading.Thread(target=handle_records) for _ in range(4)]
+
+    for current_thread in current_threads:
+        current_thread.start()
+
+    for current_thread in current_threads:
+        current_thread.join()
+
+    assert current_handler.dropped_count == 3999
+    assert current_handler.max_queue_size == 1
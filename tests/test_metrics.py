@@ -0,0 +1,21 @@
+import pytest
+import data
+
+
+def test_log_records_dropped_is_counter() -> None:
+    metrics = data.MetricsService(
+        host="127.0.0.1",
+        port=int(),
+    )
+    metrics.log_records_dropped.set_callback(
+        lambda: {tuple(): 3},
+    )
+    rendered_lines = metrics.render().splitlines()
+
+    assert "# TYPE samplevpnbot_log_records_dropped_total counter" in rendered_lines
+    assert "samplevpnbot_log_records_dropped_total 3" in rendered_lines
+
+
+def test_metric_requires_samples() -> None:
+    with pytest.raises(TypeError):
+        data.MetricsService.IMetric("samplevpnbot_metric", "Metric.")
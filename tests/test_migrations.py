@@ -0,0 +1,113 @@
+import logging, os, sqlite3
+import models
+from conftest import TemporaryDatabaseManager
+
+
+def _create_legacy_database(path: str, name: str, sql: str, rows: list[tuple]) -> None:
+    connection = sqlite3.connect(os.path.join(path, f"{name}.db"))
+
+    with connection:
+        connection.execute(sql)
+        connection.executemany(
+            f"INSERT INTO {name} VALUES ({', '.join('?' * len(rows[0]))})",
+            rows,
+        )
+
+    connection.close()
+
+
+def test_duplicate_provider_payments_are_removed(tmp_path, caplog) -> None:
+    _create_legacy_database(
+        path=str(tmp_path),
+        name="users",
+        sql="CREATE TABLE users (tg_id INTEGER PRIMARY KEY NOT NULL, tg_username TEXT, balance INTEGER NOT NULL, referrer_id INTEGER)",
+        rows=[
+            (1, "first", 300, None),
+            (2, "second", 50, None),
+        ],
+    )
+    _create_legacy_database(
+        path=str(tmp_path),
+        name="payments",
+        sql=TemporaryDatabaseManager.PaymentsDatabase._SQL,
+        rows=[
+            (1, "X", 100, "RUB", "payment", 10, 1),
+            (2, "X", 100, "RUB", "payment", 11, 1),
+            (3, "X", 100, "RUB", "payment", 12, 1),
+            (4, "Y", 50, "RUB", "payment", 13, 2),
+            (5, None, 10, "RUB", "referral 1", 14, 2),
+            (6, None, 10, "RUB", "referral 1", 15, 2),
+        ],
+    )
+
+    with caplog.at_level(logging.WARNING):
+        database = TemporaryDatabaseManager(
+            path=str(tmp_path),
+            logger=logging.getLogger(__name__),
+        )
+
+    try:
+        assert [record.getMessage() for record in caplog.records] == [
+            "_remove_duplicate_payments (payment.id=2, payment.amount=100)",
+            "_remove_duplicate_payments (payment.id=3, payment.amount=100)",
+        ]
+        assert [payment.id for payment in database.payments.get_all_payments()] == [1, 4, 5, 6]
+        assert database.users.get_user(1).balance == 100
+        assert database.users.get_user(2).balance == 50
+        assert not database.ledger.get_user_entries(1)
+
+        database.ledger.add_opening_balances(
+            date=20,
+        )
+
+        assert database.ledger.verify_balance(1)
+        assert not database.payments.add_successful_payment(
+            provider_id="X",
+            amount=100,
+            currency="RUB",
+            payload="payment",
+            date=21,
+            tg_id=1,
+            referrer_id=None,
+            referrer_amount=int(),
+            referrer_payload=None,
+        )
+    finally:
+        database.close_all()
+
+
+def test_duplicate_provider_payments_are_reversed_in_ledger(tmp_path) -> None:
+    database = TemporaryDatabaseManager(
+        path=str(tmp_path),
+    )
+    database.users.add_user(
+        tg_id=1,
+        tg_username="first",
+        balance=int(),
+        referrer_id=None,
+    )
+    database.users.add_balance(
+        tg_id=1,
+        amount=200,
+        kind=models.LedgerEntryType.PAYMENT,
+        date=10,
+    )
+
+    with database.payments:
+        database.payments.execute("DROP INDEX payments_provider_id")
+        database.payments.execute("DELETE FROM schema_version")
+        database.payments.executemany(
+            "INSERT INTO payments (provider_id, amount, currency, payload, date, tg_id) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                ("X", 100, "RUB", "payment", 10, 1),
+                ("X", 100, "RUB", "payment", 11, 1),
+            ],
+        )
+
+    assert database.payments.migrate() == [1]
+    assert database.payments.get_payments_count() == 1
+    assert database.users.get_user(1).balance == 100
+    assert database.ledger.get_user_entries(1)[-1].kind == models.LedgerEntryType.ADJUSTMENT
+    assert database.ledger.verify_balance(1)
+
+    database.close_all()
@@ -0,0 +1,76 @@
+import data
+
+
+def test_query_profiler_statistics() -> None:
+    current_profiler = data.DatabaseManager.QueryProfiler(
+        slow_query_threshold=0.5,
+    )
+    current_statement = current_profiler.get_normalized_statement("\n        SELECT *\n        FROM users\n        ")
+
+    assert current_statement == "SELECT * FROM users"
+    assert current_profiler.is_explained(current_statement)
+    assert current_profiler.is_explained("with current AS (SELECT 1) SELECT * FROM current")
+    assert not current_profiler.is_explained("PRAGMA database_list")
+    assert current_profiler.is_slow(0.5)
+    assert not current_profiler.is_slow(0.4)
+
+    for elapsed in (0.1, 0.2, 0.3, 0.4):
+        current_profiler.add_execution(
+            statement=current_statement,
+            elapsed=elapsed,
+            rows=1,
+        )
+
+    current_profiler.add_execution(
+        statement="DELETE FROM users",
+        elapsed=0.5,
+    )
+    current_profiler.add_rows(
+        statement=current_statement,
+        rows=2,
+    )
+    current_profiler.add_rows(
+        statement="UPDATE users SET balance = 0",
+        rows=2,
+    )
+    current_statistics = current_profiler.get_statistics()
+
+    assert [statistics.statement for statistics in current_statistics] == [current_statement, "DELETE FROM users"]
+    assert (current_statistics[0].count, current_statistics[0].rows) == (4, 6)
+    assert round(current_statistics[0].total_time, 3) == 1.0
+    assert current_statistics[0].get_percentile(0.5) == 0.3
+
+    current_profiler.reset()
+
+    assert current_profiler.get_statistics() == []
+
+
+def test_database_profiling(monkeypatch, database: data.IDatabaseBackend) -> None:
+    slow_queries = list()
+
+    monkeypatch.setattr(database.IDatabase, "_PROFILER", None)
+    monkeypatch.setattr(database.IDatabase, "_SLOW_QUERY_OBSERVERS", list())
+
+    database.enable_profiling(
+        slow_query_threshold=0.0,
+    )
+    database.add_slow_query_observer(
+        lambda statement, elapsed, query_plan: slow_queries.append((statement, query_plan)),
+    )
+    database.users.add_user(
+        tg_id=1,
+        tg_username="first",
+        balance=int(),
+        referrer_id=None,
+    )
+
+    assert database.users.get_user(1).tg_username == "first"
+    assert database.profiler.get_statistics()
+    assert all(
+        statistics.statement == " ".join(statistics.statement.split()) for statistics in database.profiler.get_statistics()
+    )
+    assert any(statistics.rows == 1 for statistics in database.profiler.get_statistics() if "SELECT" in statistics.statement)
+    assert slow_queries
+
+    if isinstance(database, data.DatabaseManager):
+        assert any(query_plan for statement, query_plan in slow_queries if statement.startswith("SELECT"))
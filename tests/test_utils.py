@@ -0,0 +1,85 @@
+import datetime, io, tarfile, zipfile
+import pytest
+import utils
+
+
+def _get_zip_archive(files: dict[str, bytes]) -> io.BytesIO:
+    current_file = io.BytesIO()
+
+    with zipfile.ZipFile(current_file, "w") as archive:
+        archive.mkdir("folder")
+
+        for name, file_data in files.items():
+            archive.writestr(name, file_data)
+
+    return current_file
+
+
+def _get_tar_archive(files: dict[str, bytes]) -> io.BytesIO:
+    current_file = io.BytesIO()
+
+    with tarfile.open(fileobj=current_file, mode="w:gz") as archive:
+        folder_info = tarfile.TarInfo("folder")
+        folder_info.type = tarfile.DIRTYPE
+        archive.addfile(folder_info)
+
+        for name, file_data in files.items():
+            file_info = tarfile.TarInfo(name)
+            file_info.size = len(file_data)
+            archive.addfile(file_info, io.BytesIO(file_data))
+
+    return current_file
+
+
+@pytest.mark.parametrize("get_archive", [_get_zip_archive, _get_tar_archive])
+def test_archive_files(get_archive) -> None:
+    current_archive = get_archive(
+        {
+            "first.conf": b"first",
+            "folder/second.conf": b"second",
+            "folder/.hidden": b"hidden",
+            "../third.conf": b"third",
+            "large.conf": b"x" * 11,
+            "limit.conf": b"x" * 10,
+        },
+    )
+
+    assert list(utils.get_archive_files(current_archive, max_size=10)) == [
+        ("first.conf", b"first"),
+        ("second.conf", b"second"),
+        ("third.conf", b"third"),
+        ("large.conf", None),
+        ("limit.conf", b"x" * 10),
+    ]
+
+
+def test_bad_archive_files() -> None:
+    with pytest.raises(tarfile.ReadError):
+        list(utils.get_archive_files(io.BytesIO(b"not an archive"), max_size=10))
+
+    current_archive = _get_zip_archive(
+        {
+            "first.conf": b"first",
+        },
+    )
+    current_archive.truncate(len(current_archive.getvalue()) // 2)
+
+    with pytest.raises(tarfile.ReadError):
+        list(utils.get_archive_files(current_archive, max_size=10))
+
+
+def test_template_render() -> None:
+    assert utils.Template("static {{text}}").render(unused=1) == "static {text}"
+    assert utils.Template("{name}: {amount:>5}").render(name="first", amount=10) == "first:    10"
+    assert utils.Template("{first}{second}").render(first="a", second="b", third="c") == "ab"
+
+    with pytest.raises(KeyError):
+        utils.Template("{name}").render()
+
+
+def test_formatted_fragments() -> None:
+    assert utils.get_formatted_amount(100, "RUB") == "100 RUB"
+    assert utils.get_formatted_date(datetime.datetime(2026, 1, 2, 3, 4, 5)) == "02.01.26 03:04:05"
+    assert utils.get_formatted_date(datetime.datetime(2026, 1, 2, 3, 4, 5).timestamp()) == "02.01.26 03:04:05"
+    assert utils.get_formatted_size(512) == "512 B"
+    assert utils.get_formatted_size(1536) == "1.5 KB"